@@ -2,11 +2,13 @@ import sys, os
 import pandas as pd
 from pathlib import Path
 from abc import ABC, abstractmethod
+from typing import Optional, Sequence
 
 # Define MAIN_DIR to point to the project root directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 sys.path.append(MAIN_DIR)
 from utils import ErrorTrack, PipelineTrack
+from utils.frame_io import CSVFormat, format_of_path
 
 class ICSVLoader(ABC):
     """
@@ -14,7 +16,8 @@ class ICSVLoader(ABC):
     """
 
     @abstractmethod
-    def load_csv(self, file_path: str, delimiter: str = ",") -> pd.DataFrame:
+    def load_csv(self, file_path: str, delimiter: str = ",",
+                 columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
         """
         Load a CSV file into a Pandas DataFrame.
 
@@ -22,6 +25,7 @@ class ICSVLoader(ABC):
         -----------
         file_path (str): Path to the CSV file.
         delimiter (str): Delimiter used in the CSV file (default: ',').
+        columns (Optional[Sequence[str]]): Columns to load (default: all).
 
         Returns:
         --------
@@ -38,16 +42,22 @@ class ICSVLoader(ABC):
 class CSVLoader(ICSVLoader):
     """
     Concrete implementation of ICSVLoader for loading CSV files.
+
+    Intermediates saved as Parquet or Feather (see `utils.frame_io`) are
+    loaded too, by their extension, with their column types as written.
     """
 
-    def load_csv(self, file_path: str, delimiter: str = ",") -> pd.DataFrame:
+    def load_csv(self, file_path: str, delimiter: str = ",",
+                 columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
         """
         Load a CSV file into a Pandas DataFrame with error handling and logging.
 
         Parameters:
         -----------
-        file_path (str): Path to the CSV file.
+        file_path (str): Path to the CSV file (or a `.parquet` / `.feather` intermediate).
         delimiter (str): Delimiter used in the CSV file (default: ',').
+        columns (Optional[Sequence[str]]): Columns to load (default: all); columnar
+                                           files only read these from disk.
 
         Returns:
         --------
@@ -62,13 +72,18 @@ class CSVLoader(ICSVLoader):
 
             # Check if file exists
             file_path_obj = Path(file_path)
-            if not file_path_obj.exists() or not file_path_obj.is_file():
+            # Columnar intermediates are directories of part files
+            if not file_path_obj.exists():
                 error_msg = f"CSV file not found: {file_path}"
                 ErrorTrack(error_msg)
                 raise FileNotFoundError(error_msg)
 
             # Load the CSV into a DataFrame
-            df = pd.read_csv(file_path, delimiter=delimiter)
+            file_format = format_of_path(file_path)
+            if isinstance(file_format, CSVFormat):
+                df = pd.read_csv(file_path, delimiter=delimiter, usecols=columns)
+            else:
+                df = file_format.read(file_path, columns)
             if df.empty:
                 error_msg = f"The CSV file at {file_path} is empty."
                 ErrorTrack(error_msg)
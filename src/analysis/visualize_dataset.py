@@ -1,6 +1,8 @@
 import os
 import sys
 from abc import ABC, abstractmethod
+from typing import Optional
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
@@ -10,6 +12,9 @@ MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 sys.path.append(MAIN_DIR)
 
 from utils import ErrorTrack, PipelineTrack
+from utils.datetime_tools import parse_datetime_columns
+from utils.frame_io import read_frame
+from databaseOperations.warehouse_rollups import MISSING_GROUPS, read_rollups
 
 class VisualizationBase(ABC):
     """
@@ -52,11 +57,22 @@ class TrainVisualization(VisualizationBase):
     def __init__(self, avg_delay_file: str, train_status_file: str, output_dir: str):
         super().__init__(avg_delay_file, train_status_file, output_dir)
 
-    def load_data(self):
-        """Load CSV files into dataframes."""
+    def load_data(self, train_status_df: Optional[pd.DataFrame] = None):
+        """
+        Load CSV files into dataframes.
+
+        A transformed frame still held by the pipeline can be passed as
+        `train_status_df`; its typed datetime columns are then used as they are
+        instead of reading `train_status_file` back and parsing them again.
+        Parquet and Feather files (by their extension) keep their column types
+        as well, so only CSV timestamps are parsed.
+        """
         try:
-            self.avg_delay_df = pd.read_csv(self.avg_delay_file)
-            self.train_status_df = pd.read_csv(self.train_status_file)
+            self.avg_delay_df = read_frame(self.avg_delay_file)
+            if train_status_df is not None:
+                self.train_status_df = train_status_df
+            else:
+                self.train_status_df = read_frame(self.train_status_file)
         except Exception as e:
             ErrorTrack(e)
             raise
@@ -64,8 +80,8 @@ class TrainVisualization(VisualizationBase):
     def process_data(self):
         """Clean and prepare data for visualization."""
         try:
-            self.train_status_df['timeStamp'] = pd.to_datetime(self.train_status_df['timeStamp'])
-            self.train_status_df['date'] = pd.to_datetime(self.train_status_df['date'])
+            # Explicit formats, once per distinct value; typed columns are kept as they are
+            parse_datetime_columns(self.train_status_df)
             self.train_status_df['hour'] = self.train_status_df['timeStamp'].dt.hour
         except Exception as e:
             ErrorTrack(e)
@@ -154,6 +170,223 @@ class TrainVisualization(VisualizationBase):
             raise
 
 
+def _pearson(n: float, sum_x: float, sum_xx: float, sum_y: float, sum_yy: float, sum_xy: float) -> float:
+    """Pearson correlation from the count, sums, sums of squares and sum of products."""
+    covariance = sum_xy - sum_x * sum_y / n
+    variance = (sum_xx - sum_x ** 2 / n) * (sum_yy - sum_y ** 2 / n)
+    return covariance / np.sqrt(variance) if n > 1 and variance > 0 else np.nan
+
+
+def histogram_box_stats(values: np.ndarray, counts: np.ndarray, whis: float = 1.5) -> dict:
+    """
+    Box plot statistics (as `ax.bxp` takes them) of `values` each repeated `counts` times.
+
+    Matches `matplotlib.cbook.boxplot_stats` on the repeated values, but reads the
+    percentiles off the cumulative counts, so the cost grows with the number of
+    distinct values instead of the number of rows. Fliers are listed once per value.
+
+    Parameters:
+    -----------
+    values (np.ndarray): The distinct values.
+    counts (np.ndarray): How often each value occurs (at least one in total).
+    whis (float): Whisker reach, in interquartile ranges past the quartiles.
+
+    Returns:
+    --------
+    dict: mean, med, q1, q3, iqr, cilo, cihi, whislo, whishi and fliers.
+    """
+    order = np.argsort(values)
+    values, counts = np.asarray(values, dtype="float64")[order], np.asarray(counts, dtype="int64")[order]
+    ends = np.cumsum(counts)
+    n = int(ends[-1])
+
+    def percentile(q: float) -> float:
+        # Linear interpolation between the order statistics around (n - 1) * q, as np.percentile does
+        position = (n - 1) * q / 100
+        low = int(np.floor(position))
+        below, above = values[np.searchsorted(ends, [low, min(low + 1, n - 1)], side="right")]
+        return below + (position - low) * (above - below)
+
+    q1, med, q3 = percentile(25), percentile(50), percentile(75)
+    iqr = q3 - q1
+    inside_high = values[values <= q3 + whis * iqr]
+    inside_low = values[values >= q1 - whis * iqr]
+    whishi = q3 if len(inside_high) == 0 or inside_high.max() < q3 else inside_high.max()
+    whislo = q1 if len(inside_low) == 0 or inside_low.min() > q1 else inside_low.min()
+    return {"mean": float((values * counts).sum() / n), "med": med, "q1": q1, "q3": q3, "iqr": iqr,
+            "cilo": med - 1.57 * iqr / np.sqrt(n), "cihi": med + 1.57 * iqr / np.sqrt(n),
+            "whislo": whislo, "whishi": whishi, "fliers": values[(values < whislo) | (values > whishi)]}
+
+
+def rollup_correlation(train_hour: pd.DataFrame) -> pd.DataFrame:
+    """
+    Correlation matrix of train_id, hour and delay_minutes from the (train_id, hour) rollup.
+
+    Within a group train_id and hour are constant, so every sum the Pearson
+    correlation needs follows from the group counts and delay totals. Like
+    `DataFrame.corr`, each pair uses the rows where both values are present,
+    and train_id is left out if it is not numeric. Rows without a timestamp
+    (the `MISSING_GROUPS` hour) only count where hour is not involved.
+
+    Parameters:
+    -----------
+    train_hour (pd.DataFrame): The `rollup_train_hour` rollup (see `read_rollup`).
+
+    Returns:
+    --------
+    pd.DataFrame: The correlation matrix.
+    """
+    keys = [column for column in ("train_id", "hour") if pd.api.types.is_numeric_dtype(train_hour[column])]
+    names = keys + ["delay_minutes"]
+    correlation = pd.DataFrame(np.eye(len(names)), index=names, columns=names)
+    missing = MISSING_GROUPS.get("rollup_train_hour", {})
+    columns = {column: train_hour[column].astype("float64") for column in keys}
+    columns = {column: values.where(values != missing[column]) if column in missing else values
+               for column, values in columns.items()}
+    for position, x in enumerate(keys):
+        for y in keys[position + 1:]:
+            both = columns[x].notna() & columns[y].notna()
+            rows, values, other = train_hour["row_count"][both], columns[x][both], columns[y][both]
+            correlation.loc[x, y] = correlation.loc[y, x] = _pearson(
+                rows.sum(), (rows * values).sum(), (rows * values ** 2).sum(),
+                (rows * other).sum(), (rows * other ** 2).sum(), (rows * values * other).sum())
+        present = columns[x].notna()
+        delays, values, delay_sum = train_hour["delay_count"][present], columns[x][present], train_hour["delay_sum"][present]
+        correlation.loc[x, "delay_minutes"] = correlation.loc["delay_minutes", x] = _pearson(
+            delays.sum(), (delays * values).sum(), (delays * values ** 2).sum(),
+            delay_sum.sum(), train_hour["delay_sumsq"][present].sum(), (values * delay_sum).sum())
+    return correlation
+
+
+class WarehouseTrainVisualization(TrainVisualization):
+    """
+    TrainVisualization that draws the same charts from the rollup tables of the warehouse.
+
+    Every chart only needs per-group delay totals, which `warehouse_rollups`
+    keeps up to date with each load. Reading them is a few thousand rows at
+    most, so nothing rescans the row-level data. "Delays over time" is drawn
+    from hourly means per direction, and the box plot and histogram from the
+    exact delay counts per value.
+    """
+
+    def __init__(self, warehouse_db: str, output_dir: str):
+        # The rollups replace both CSV files
+        super().__init__(avg_delay_file=warehouse_db, train_status_file=warehouse_db, output_dir=output_dir)
+        self.warehouse_db = warehouse_db
+        self.rollups = None
+
+    def load_data(self, train_status_df: Optional[pd.DataFrame] = None):
+        """Read the rollups from the warehouse (`train_status_df` is not used)."""
+        try:
+            self.rollups = read_rollups(self.warehouse_db)
+        except Exception as e:
+            ErrorTrack(e)
+            raise
+
+    def process_data(self):
+        """Shape the rollups like the frames the charts of `TrainVisualization` draw."""
+        try:
+            train_hour = self.rollups["rollup_train_hour"]
+            delays = train_hour.groupby("train_id")[["delay_sum", "delay_count"]].sum()
+            self.avg_delay_df = (delays["delay_sum"] / delays["delay_count"].where(delays["delay_count"] > 0)
+                                 ).rename("avg_delay_minutes").reset_index()
+            direction_hour = self.rollups["rollup_direction_hour"]
+            self.train_status_df = pd.DataFrame({
+                "timeStamp": pd.to_datetime(direction_hour["time_bucket"], format="%Y-%m-%d %H:%M"),
+                "direction": direction_hour["direction"],
+                "delay_minutes": direction_hour["avg_delay_minutes"],
+            })
+        except Exception as e:
+            ErrorTrack(e)
+            raise
+
+    def create_plots(self):
+        """Create and save the visualizations of `TrainVisualization` from the rollups."""
+        try:
+            # Visualization 1: Average Delay per Train ID
+            plt.figure(figsize=(12, 6))
+            sns.barplot(data=self.avg_delay_df, x='train_id', y='avg_delay_minutes', palette='viridis')
+            plt.title('Average Delay per Train ID')
+            plt.ylabel('Average Delay (minutes)')
+            plt.xlabel('Train ID')
+            self.save_plot(plt, "average_delay_per_train_id.png")
+
+            # Visualization 2: Delays over time (hourly means)
+            plt.figure(figsize=(14, 7))
+            sns.lineplot(data=self.train_status_df, x='timeStamp', y='delay_minutes', hue='direction')
+            plt.title('Train Delays Over Time')
+            plt.ylabel('Delay (minutes)')
+            plt.xlabel('Timestamp')
+            self.save_plot(plt, "delays_over_time.png")
+
+            # Visualization 3: Delay distribution by day of the week
+            weekday_delay = self.rollups["rollup_weekday_delay"]
+            weekday_delay = weekday_delay[weekday_delay["row_count"] > 0]
+            days = list(dict.fromkeys(weekday_delay["day_of_week"]))
+            stats = []
+            for day in days:
+                counts = weekday_delay[weekday_delay["day_of_week"] == day]
+                day_stats = histogram_box_stats(counts["delay_minutes"].to_numpy(), counts["row_count"].to_numpy())
+                day_stats["label"] = day
+                stats.append(day_stats)
+            fig, ax = plt.subplots(figsize=(10, 6))
+            ax.bxp(stats, patch_artist=True)
+            for patch, color in zip(ax.patches, sns.color_palette('muted', len(days))):
+                patch.set_facecolor(color)
+            plt.title('Delay Distribution by Day of the Week')
+            plt.ylabel('Delay (minutes)')
+            plt.xlabel('Day of the Week')
+            self.save_plot(plt, "delay_distribution_by_day.png")
+
+            # Visualization 4: Heatmap of Delays Throughout the Day
+            delay_heatmap = self.rollups["rollup_weekday_hour"].pivot_table(
+                index='day_of_week', columns='hour', values='avg_delay_minutes'
+            )
+            plt.figure(figsize=(14, 7))
+            sns.heatmap(delay_heatmap, cmap='YlGnBu', annot=True, fmt=".1f")
+            plt.title('Average Delay (Minutes) Heatmap by Hour and Day')
+            plt.ylabel('Day of the Week')
+            plt.xlabel('Hour of the Day')
+            self.save_plot(plt, "heatmap_delays_by_hour_day.png")
+
+            # Visualization 5: Delays by Origin Station
+            station_delays = self.rollups["rollup_origin_station"]
+            plt.figure(figsize=(14, 6))
+            sns.barplot(data=station_delays, x='originStation', y='delay_sum', palette='viridis')
+            plt.title('Total Delays by Origin Station')
+            plt.ylabel('Total Delay (minutes)')
+            plt.xlabel('Origin Station')
+            plt.xticks(rotation=45)
+            self.save_plot(plt, "delays_by_origin_station.png")
+
+            # Visualization 6: Delays by Next Station
+            next_station_delays = self.rollups["rollup_next_station"]
+            plt.figure(figsize=(14, 6))
+            sns.barplot(data=next_station_delays, x='nextStation', y='avg_delay_minutes', palette='cool')
+            plt.title('Average Delays by Next Station')
+            plt.ylabel('Average Delay (minutes)')
+            plt.xlabel('Next Station')
+            plt.xticks(rotation=45)
+            self.save_plot(plt, "delays_by_next_station.png")
+
+            # Visualization 7: Delay Distribution
+            plt.figure(figsize=(10, 6))
+            sns.histplot(data=weekday_delay, x='delay_minutes', weights='row_count', kde=True, bins=20, color='blue')
+            plt.title('Distribution of Delays')
+            plt.xlabel('Delay (minutes)')
+            plt.ylabel('Frequency')
+            self.save_plot(plt, "delay_distribution.png")
+
+            # Visualization 8: Correlation Matrix (Numerical Columns Only)
+            plt.figure(figsize=(10, 6))
+            correlation_matrix = rollup_correlation(self.rollups["rollup_train_hour"])
+            sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt='.2f', vmin=-1, vmax=1)
+            plt.title('Correlation Matrix of Numerical Columns in Train Data')
+            self.save_plot(plt, "correlation_matrix.png")
+
+        except Exception as e:
+            ErrorTrack(e)
+            raise
 
 
 if __name__ == "__main__":
@@ -66,10 +66,41 @@ DATASETURL = configs["etl_config"]["dataset_url" ]
 ARCHIVEDIR = configs["etl_config"]["archive_dir"]
 DATABASENAME = configs["etl_config"]["database_name"]
 EXTRACTEDDIR = configs["etl_config"]["extracted_dir"]
+DOWNLOADWORKERS = configs["etl_config"]["download_workers"]
+DOWNLOADSEGMENTMB = configs["etl_config"]["download_segment_mb"]
+STREAMINGEST = configs["etl_config"]["stream_ingest"]
+KEEPARCHIVE = configs["etl_config"]["keep_archive"]
+EXTRACTMEMBERS = configs["etl_config"]["extract_members"]
+UNZIPWORKERS = configs["etl_config"]["unzip_workers"]
 DBPATH =  configs["etl_config"]["db_path"]
 QUERY = configs["etl_config"]["query"]
+PUSHDOWNSTEPS = configs["etl_config"]["pushdown_steps"]
+OUTPUTCOLUMNS = configs["etl_config"]["output_columns"]
+TRANSFORMWORKERS = configs["etl_config"]["transform_workers"]
+TRANSFORMPARTITIONBY = configs["etl_config"]["transform_partition_by"]
+CHUNKROWS = configs["etl_config"]["chunk_rows"]
+INCREMENTAL = configs["etl_config"]["incremental"]
+WATERMARKCOLUMN = configs["etl_config"]["watermark_column"]
+EXTRACTSTATEFILE = configs["etl_config"]["extract_state_file"]
+AGGREGATEDB = configs["etl_config"]["aggregate_db"]
+WAREHOUSEDB = configs["etl_config"]["warehouse_db"]
+LOADBATCHROWS = configs["etl_config"]["load_batch_rows"]
+WAREHOUSEMODEL = configs["etl_config"]["warehouse_model"]
+LOADMODE = configs["etl_config"]["load_mode"]
+WAREHOUSEROLLUPS = configs["etl_config"]["warehouse_rollups"]
+PARTITIONDIR = configs["etl_config"]["partition_dir"]
+ARCHIVEAFTERMONTHS = configs["etl_config"]["archive_after_months"]
+EXTRACTWORKERS = configs["etl_config"]["extract_workers"]
+EXTRACTDTYPES = configs["etl_config"]["extract_dtypes"]
+SQLITEPROFILE = configs["etl_config"]["sqlite_profile"]
+CONNECTIONPOOLSIZE = configs["etl_config"]["connection_pool_size"]
+QUERYCACHEDIR = configs["etl_config"]["query_cache_dir"]
+QUERYCACHEMAXMB = configs["etl_config"]["query_cache_max_mb"]
 AVGDELAYFILE = configs["etl_config"]["avg_delay_file"]
 TRAINSTATUSFILES = configs["etl_config"]["train_status_file"]
 VISUALIZEOUTPUTDIR = configs["etl_config"]["visualize_output_dir"]
 DATAWHARESAVE = configs["etl_config"]["data_wharesave"]
-CSVDATA = configs["etl_config"]["csv_data"]
\ No newline at end of file
+CSVDATA = configs["etl_config"]["csv_data"]
+INTERMEDIATEFORMAT = configs["etl_config"]["intermediate_format"]
+STAGECACHEDIR = configs["etl_config"]["stage_cache_dir"]
+STAGECACHEMAXMB = configs["etl_config"]["stage_cache_max_mb"]
\ No newline at end of file
@@ -0,0 +1,243 @@
+import sqlite3, sys, os
+import pandas as pd
+from typing import List, Optional
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from databaseOperations.delay_aggregate import DelayAggregate, AGGREGATE_COLUMNS
+
+# Grain -> (table, key column). Days are rolled up from the hourly buckets.
+AGGREGATE_TABLES = {
+    'train': ('delay_by_train', 'train_id'),
+    'hour': ('delay_by_hour', 'hour'),
+}
+# Stored column of each `DelayAggregate` statistic.
+STORED_COLUMNS = {column: f"delay_{column}" for column in AGGREGATE_COLUMNS}
+
+
+def _upsert_sql(table: str, key: str) -> str:
+    """INSERT that folds a partial aggregate into an existing row of `table`."""
+    columns = ", ".join(STORED_COLUMNS.values())
+    placeholders = ", ".join("?" for _ in range(len(STORED_COLUMNS) + 1))
+    s, c, lo, hi, sq = (STORED_COLUMNS[column] for column in AGGREGATE_COLUMNS)
+    return (
+        f"INSERT INTO {table} ({key}, {columns}) VALUES ({placeholders}) "
+        f"ON CONFLICT({key}) DO UPDATE SET "
+        f"{s} = {s} + excluded.{s}, {c} = {c} + excluded.{c}, {sq} = {sq} + excluded.{sq}, "
+        # min()/max() of SQLite return NULL if either side is NULL (no delays yet)
+        f"{lo} = CASE WHEN {lo} IS NULL THEN excluded.{lo} WHEN excluded.{lo} IS NULL THEN {lo} ELSE min({lo}, excluded.{lo}) END, "
+        f"{hi} = CASE WHEN {hi} IS NULL THEN excluded.{hi} WHEN excluded.{hi} IS NULL THEN {hi} ELSE max({hi}, excluded.{hi}) END"
+    )
+
+
+class AggregateStore:
+    """
+    Delay aggregates kept in the warehouse and updated with every run's new rows.
+
+    Per-train and per-hour `DelayAggregate` statistics (sum, count, min, max,
+    sum of squares) live in a SQLite file. A run folds only its newly
+    transformed rows into them and reads the averages back from the stored
+    state, so refreshing `delay_summary.csv` costs time in proportion to the new
+    batch and the number of trains, not to the whole history in `df.csv`.
+
+    All folds of a run happen in one transaction (`begin` ... `commit`), so a
+    failed run leaves the stored aggregates as they were. Reads on the store's
+    connection already see the folds of the open run.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        """
+        Parameters:
+        -----------
+        db_path (str): The aggregate database, created if missing.
+        """
+        self.db_path = db_path
+        self.connection: Optional[sqlite3.Connection] = None
+
+    def begin(self, replace: bool = False) -> None:
+        """
+        Start the run's transaction.
+
+        Parameters:
+        -----------
+        replace (bool): Drop the stored aggregates first (full refresh / non-incremental runs).
+
+        Returns:
+        --------
+        None
+        """
+        if self.connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self.connection = sqlite3.connect(self.db_path, isolation_level=None)
+            self._create_tables()
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN IMMEDIATE")
+        if replace:
+            for table, _ in AGGREGATE_TABLES.values():
+                self.connection.execute(f"DELETE FROM {table}")
+            PipelineTrack(f"Cleared the stored delay aggregates in {self.db_path}")
+
+    def fold(self, df: pd.DataFrame) -> None:
+        """
+        Add the statistics of newly transformed rows to the stored aggregates.
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): Transformed rows with `train_id`, `delay_minutes` and,
+                           for the hourly buckets, a datetime `timeStamp`.
+
+        Returns:
+        --------
+        None
+        """
+        if self.connection is None or not self.connection.in_transaction:
+            self.begin()
+        try:
+            self._upsert('train', DelayAggregate.from_frame(df, key='train_id'))
+            if 'timeStamp' in df.columns and pd.api.types.is_datetime64_any_dtype(df['timeStamp']):
+                hours = pd.DataFrame({'hour': df['timeStamp'].dt.floor('h'), 'delay_minutes': df['delay_minutes']})
+                self._upsert('hour', DelayAggregate.from_frame(hours, key='hour'))
+        except sqlite3.Error as e:
+            error_msg = f"Error folding rows into the delay aggregates: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg)
+
+    def is_empty(self) -> bool:
+        """
+        Whether no rows have been folded in yet.
+
+        Returns:
+        --------
+        bool: True if the per-train table is empty.
+        """
+        self._require_connection()
+        return self.connection.execute("SELECT 1 FROM delay_by_train LIMIT 1").fetchone() is None
+
+    def delay_summary(self) -> pd.DataFrame:
+        """
+        Average delay per train over everything folded so far, including the open run.
+
+        Returns:
+        --------
+        pd.DataFrame: Columns (train_id, avg_delay_minutes), sorted by train_id,
+                      like `DelayAggregate.finalize`.
+        """
+        self._require_connection()
+        s, c = STORED_COLUMNS['sum'], STORED_COLUMNS['count']
+        return pd.read_sql_query(
+            f"SELECT train_id, {s} * 1.0 / NULLIF({c}, 0) AS avg_delay_minutes FROM delay_by_train ORDER BY train_id",
+            self.connection)
+
+    def statistics(self, grain: str = 'train') -> pd.DataFrame:
+        """
+        Count, mean, min, max and standard deviation of the delay per train, hour or day.
+
+        Parameters:
+        -----------
+        grain (str): "train", "hour" or "day".
+
+        Raises:
+        -------
+        ValueError: For an unknown grain.
+
+        Returns:
+        --------
+        pd.DataFrame: One row per group, see `DelayAggregate.statistics`.
+        """
+        self._require_connection()
+        if grain == 'day':
+            aggregate = self._load("SELECT substr(hour, 1, 10) AS day, SUM(delay_sum) AS delay_sum, "
+                                   "SUM(delay_count) AS delay_count, MIN(delay_min) AS delay_min, "
+                                   "MAX(delay_max) AS delay_max, SUM(delay_sumsq) AS delay_sumsq "
+                                   "FROM delay_by_hour GROUP BY day", 'day')
+        elif grain in AGGREGATE_TABLES:
+            table, key = AGGREGATE_TABLES[grain]
+            aggregate = self._load(f"SELECT * FROM {table}", key)
+        else:
+            error_msg = f"Unknown aggregate grain: {grain}. Use 'train', 'hour' or 'day'."
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+        return aggregate.statistics()
+
+    def commit(self) -> None:
+        """
+        Make the run's folds permanent.
+
+        Returns:
+        --------
+        None
+        """
+        if self.connection is not None and self.connection.in_transaction:
+            self.connection.execute("COMMIT")
+            PipelineTrack(f"Committed delay aggregates to {self.db_path}")
+
+    def rollback(self) -> None:
+        """
+        Discard the run's folds.
+
+        Returns:
+        --------
+        None
+        """
+        if self.connection is not None and self.connection.in_transaction:
+            self.connection.execute("ROLLBACK")
+            PipelineTrack(f"Rolled back delay aggregates in {self.db_path}")
+
+    def close(self) -> None:
+        """
+        Close the connection; an uncommitted run is rolled back.
+
+        Returns:
+        --------
+        None
+        """
+        if self.connection is not None:
+            self.rollback()
+            self.connection.close()
+            self.connection = None
+
+    def _create_tables(self) -> None:
+        """Create the aggregate tables if they do not exist yet."""
+        columns = ", ".join(f"{column} REAL" for column in STORED_COLUMNS.values())
+        # NUMERIC affinity stores '778' and 778 as the same key
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS delay_by_train (train_id NUMERIC PRIMARY KEY, {columns})")
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS delay_by_hour (hour TEXT PRIMARY KEY, {columns})")
+
+    def _upsert(self, grain: str, aggregate: DelayAggregate) -> None:
+        """Fold one partial aggregate into the table of `grain`."""
+        table, key = AGGREGATE_TABLES[grain]
+        totals = aggregate.totals
+        if totals.empty:
+            return
+        keys: List = totals.index.strftime('%Y-%m-%d %H:00').tolist() if grain == 'hour' else totals.index.tolist()
+        rows = zip(keys, *(totals[column].astype(object).where(totals[column].notna(), None).tolist()
+                           for column in AGGREGATE_COLUMNS))
+        self.connection.executemany(_upsert_sql(table, key), rows)
+
+    def _load(self, query: str, key: str) -> DelayAggregate:
+        """Read stored rows back into a `DelayAggregate`."""
+        stored = pd.read_sql_query(query, self.connection, index_col=key)
+        totals = stored.rename(columns={stored_column: column for column, stored_column in STORED_COLUMNS.items()})
+        return DelayAggregate(totals[AGGREGATE_COLUMNS].astype('float64'), key=key)
+
+    def _require_connection(self) -> None:
+        if self.connection is None:
+            self.begin()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from utils.synthetic_data import make_otp_frame
+    from databaseOperations.transform_database import TransformData
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = AggregateStore(os.path.join(tmp_dir, "aggregates.sqlite"))
+        for batch in range(3):
+            store.begin()
+            store.fold(TransformData().transform_rows(make_otp_frame(10_000, seed=batch)))
+            store.commit()
+        print(store.delay_summary().head())
+        print(store.statistics('day').head())
+        store.close()
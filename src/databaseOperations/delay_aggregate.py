@@ -0,0 +1,168 @@
+import sys, os
+import numpy as np
+import pandas as pd
+from typing import Iterable, Optional
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+
+# Partial statistics kept per group.
+AGGREGATE_COLUMNS = ['sum', 'count', 'min', 'max', 'sumsq']
+
+
+class DelayAggregate:
+    """
+    Partial delay statistics per group (by default per `train_id`) that can be
+    updated chunk by chunk and merged across workers.
+
+    Keeps the sum, count, minimum, maximum and sum of squares of `delay_minutes`
+    per group. All of them combine exactly (sums and counts add, minima and
+    maxima take the smaller/larger), so aggregating the chunks of a table in any
+    grouping and merging the results gives the statistics of the whole table.
+    Missing delays are not counted, like `groupby(...).mean()`.
+    """
+
+    def __init__(self, totals: Optional[pd.DataFrame] = None, key: str = 'train_id',
+                 value: str = 'delay_minutes') -> None:
+        """
+        Parameters:
+        -----------
+        totals (Optional[pd.DataFrame]): Existing partial statistics, indexed by group,
+                                         with the columns of `AGGREGATE_COLUMNS`.
+        key (str): The grouping column.
+        value (str): The aggregated column.
+        """
+        self.key = key
+        self.value = value
+        if totals is None:
+            totals = pd.DataFrame({column: pd.Series(dtype='float64') for column in AGGREGATE_COLUMNS})
+            totals.index.name = key
+        self.totals = totals
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, key: str = 'train_id', value: str = 'delay_minutes') -> "DelayAggregate":
+        """
+        Partial statistics of one frame or chunk.
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): Rows with the `key` and `value` columns.
+        key (str): The grouping column.
+        value (str): The aggregated column.
+
+        Returns:
+        --------
+        DelayAggregate: The statistics of `df`.
+        """
+        values = df[value].astype('float64')
+        grouped = pd.DataFrame({key: df[key], value: values, 'square': values * values}) \
+            .groupby(key, observed=True, sort=False)
+        totals = pd.DataFrame({
+            'sum': grouped[value].sum(),
+            'count': grouped[value].count().astype('float64'),
+            'min': grouped[value].min(),
+            'max': grouped[value].max(),
+            'sumsq': grouped['square'].sum(),
+        })
+        return cls(totals, key=key, value=value)
+
+    def update(self, df: pd.DataFrame) -> "DelayAggregate":
+        """
+        Fold a chunk into the statistics.
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): Rows with the `key` and `value` columns.
+
+        Returns:
+        --------
+        DelayAggregate: self, for chaining.
+        """
+        self.totals = self.merge(DelayAggregate.from_frame(df, self.key, self.value)).totals
+        return self
+
+    def merge(self, other: "DelayAggregate") -> "DelayAggregate":
+        """
+        Combine with the statistics of other rows (another chunk, worker or run).
+
+        Parameters:
+        -----------
+        other (DelayAggregate): Statistics over a disjoint set of rows.
+
+        Returns:
+        --------
+        DelayAggregate: The statistics of both sets of rows.
+        """
+        if self.totals.empty:
+            return DelayAggregate(other.totals.copy(), self.key, self.value)
+        if other.totals.empty:
+            return DelayAggregate(self.totals.copy(), self.key, self.value)
+
+        left, right = self.totals.align(other.totals, join='outer')
+        totals = left[['sum', 'count', 'sumsq']].add(right[['sum', 'count', 'sumsq']], fill_value=0)
+        # fmin/fmax ignore the NaN of a group missing on one side (or with no delays)
+        totals['min'] = np.fmin(left['min'], right['min'])
+        totals['max'] = np.fmax(left['max'], right['max'])
+        return DelayAggregate(totals[AGGREGATE_COLUMNS], self.key, self.value)
+
+    @classmethod
+    def merge_all(cls, aggregates: Iterable["DelayAggregate"], key: str = 'train_id',
+                  value: str = 'delay_minutes') -> "DelayAggregate":
+        """
+        Merge any number of partial statistics, e.g. one per worker.
+
+        Parameters:
+        -----------
+        aggregates (Iterable[DelayAggregate]): Statistics over disjoint sets of rows.
+        key (str): The grouping column, used when `aggregates` is empty.
+        value (str): The aggregated column, used when `aggregates` is empty.
+
+        Returns:
+        --------
+        DelayAggregate: The combined statistics.
+        """
+        merged = cls(key=key, value=value)
+        for aggregate in aggregates:
+            merged = merged.merge(aggregate)
+        return merged
+
+    def statistics(self) -> pd.DataFrame:
+        """
+        Final statistics per group: count, mean, min, max and population standard deviation.
+
+        Returns:
+        --------
+        pd.DataFrame: One row per group, sorted by group.
+        """
+        totals = self.totals.sort_index()
+        count = totals['count'].where(totals['count'] > 0)
+        mean = totals['sum'] / count
+        # Clip the rounding noise of E[x^2] - E[x]^2 below zero
+        variance = (totals['sumsq'] / count - mean * mean).clip(lower=0)
+        return pd.DataFrame({
+            'count': totals['count'].astype('int64'),
+            'mean': mean,
+            'min': totals['min'],
+            'max': totals['max'],
+            'std': np.sqrt(variance),
+        }).rename_axis(self.key)
+
+    def finalize(self) -> pd.DataFrame:
+        """
+        The delay summary: average delay per group, as written to `delay_summary.csv`.
+
+        Returns:
+        --------
+        pd.DataFrame: Columns (`key`, avg_delay_minutes), sorted by `key`.
+        """
+        if self.totals.empty:
+            return pd.DataFrame(columns=[self.key, 'avg_delay_minutes'])
+        return self.statistics()['mean'].rename('avg_delay_minutes').reset_index()
+
+
+if __name__ == "__main__":
+    df = pd.DataFrame({'train_id': [778, 598, 778, 279, 598], 'delay_minutes': [1.0, 3.0, 5.0, None, 2.0]})
+    halves = [DelayAggregate.from_frame(df.iloc[:2]), DelayAggregate.from_frame(df.iloc[2:])]
+    print(DelayAggregate.merge_all(halves).statistics())
+    print(DelayAggregate.merge_all(halves).finalize())
@@ -1,12 +1,93 @@
 import sqlite3, sys, os
 import pandas as pd
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional
 from abc import ABC, abstractmethod
 
 # Define MAIN_DIR to point to the project root directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 sys.path.append(MAIN_DIR)
 from utils import ErrorTrack, PipelineTrack
+from utils.datetime_tools import parse_datetimes
+from databaseOperations.sqlite_connection import SQLiteConnectionProfile, SQLiteConnectionPool, DEFAULT_PROFILE
+
+# Default number of rows per DataFrame yielded by `iter_query`.
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Column types of the `otp` table, applied at read time by `apply_schema`.
+# "datetime:<format>" parses strings with an explicit format.
+OTP_DTYPES = {
+    'train_id': 'Int64',
+    'direction': 'category',
+    'origin': 'category',
+    'next_station': 'category',
+    'status': 'category',
+    'date': 'datetime:%Y-%m-%d',
+    'timeStamp': 'datetime:%Y-%m-%d %H:%M:%S',
+}
+
+
+def apply_schema(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Convert the raw string columns of a query result to compact types.
+
+    Parameters:
+    -----------
+    df (pd.DataFrame): Query result as returned by `pd.read_sql_query`.
+    dtypes (Dict[str, str]): Column -> type. Supported types are "category", nullable
+                             integers such as "Int64" (unparsable values become <NA>),
+                             "datetime:<format>" and any other dtype accepted by `astype`.
+                             Columns missing from `df` are skipped.
+
+    Returns:
+    --------
+    pd.DataFrame: The frame with converted columns.
+    """
+    for column, dtype in dtypes.items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if dtype.startswith('datetime:'):
+            df[column] = parse_datetimes(values, dtype[len('datetime:'):])
+        elif dtype in ('Int8', 'Int16', 'Int32', 'Int64', 'UInt8', 'UInt16', 'UInt32', 'UInt64'):
+            numbers = pd.to_numeric(values, errors='coerce')
+            unparsable = int(numbers.isna().sum() - values.isna().sum())
+            if unparsable:
+                PipelineTrack(f"{unparsable} values of '{column}' are not integers and were set to <NA>.")
+            df[column] = numbers.astype(dtype)
+        else:
+            df[column] = values.astype(dtype)
+    return df
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate typed chunks without losing categorical columns.
+
+    `pd.concat` falls back to object columns when chunks have different categories,
+    so the categories are unified first.
+
+    Parameters:
+    -----------
+    frames (List[pd.DataFrame]): Chunks with the same columns.
+
+    Returns:
+    --------
+    pd.DataFrame: The concatenated frame with a fresh RangeIndex.
+    """
+    if not frames:
+        return pd.DataFrame()
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    """Resident size of a DataFrame in MB, including the strings behind object columns."""
+    return df.memory_usage(deep=True).sum() / (1024 ** 2)
 
 class IDatabaseExtractor(ABC):
     """
@@ -43,6 +124,22 @@ class IDatabaseExtractor(ABC):
         """
         pass
 
+    @abstractmethod
+    def iter_query(self, query: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Execute a query and stream the results as bounded-size DataFrames.
+
+        Parameters:
+        -----------
+        query (str): SQL query to execute.
+        chunk_rows (int): Maximum number of rows per yielded DataFrame.
+
+        Returns:
+        --------
+        Iterator[pd.DataFrame]: Chunks of the query result, in order.
+        """
+        pass
+
     @abstractmethod
     def close_connection(self) -> None:
         """
@@ -59,7 +156,24 @@ class SQLiteExtractor(IDatabaseExtractor):
     """
     Concreate implementation fo IDatabaseExtractor for SQLite database.
     """
-    def __init__(self) -> None:
+    def __init__(self, profile: Optional[SQLiteConnectionProfile] = None,
+                 pool: Optional[SQLiteConnectionPool] = None,
+                 dtypes: Optional[Dict[str, str]] = None) -> None:
+        """
+        Parameters:
+        -----------
+        profile (Optional[SQLiteConnectionProfile]): How to open and tune the connection.
+                                                     Defaults to a plain connection.
+        pool (Optional[SQLiteConnectionPool]): Take the connection from this pool and give
+                                               it back on close, instead of opening a new one.
+                                               The pool's own profile is used.
+        dtypes (Optional[Dict[str, str]]): Column types applied to every query result
+                                           (see `apply_schema`), e.g. `OTP_DTYPES`.
+        """
+        self.profile = profile or DEFAULT_PROFILE
+        self.pool = pool
+        self.dtypes = dtypes or {}
+        self.db_path = None
         self.connection = None
     
     def connect(self, db_path: str) -> None:
@@ -90,20 +204,26 @@ class SQLiteExtractor(IDatabaseExtractor):
             ErrorTrack(error_msg)
             raise FileNotFoundError(error_msg)
         try:
-            self.connection = sqlite3.connect(db_path)
+            if self.pool is not None:
+                self.connection = self.pool.acquire(db_path)
+            else:
+                self.connection = self.profile.open(db_path)
+            self.db_path = db_path
             PipelineTrack(f"Connected to database: {db_path}")
         except sqlite3.Error as e:
             error_msg = f"Error connecting to database: {str(e)}"
             ErrorTrack(error_msg)
             raise sqlite3.Error(error_msg)
     
-    def execute_query(self, query: str) -> pd.DataFrame:
+    def execute_query(self, query: str, dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
         """
         Execute a query on the database and return the results as a DataFrame.
 
         Parameters:
         -----------
         query (str): SQL query to execute.
+        dtypes (Optional[Dict[str, str]]): Column types for this query, overriding the
+                                           extractor's (see `apply_schema`).
 
         Raises:
         _______
@@ -115,20 +235,20 @@ class SQLiteExtractor(IDatabaseExtractor):
         ________
         pd.DataFrame: Results of the query as a pandas DataFrame.
         """
-        if not isinstance(query, str):
-            error_msg = f"The query must be a string. Provided type: {type(query)}"
-            ErrorTrack(error_msg)
-            raise TypeError(error_msg)
-        
-        if not query.strip():
-            error_msg = "The query strin is empty or invalid."
-            ErrorTrack(error_msg)
-            raise ValueError(error_msg)
-        
+        self._validate_query(query)
+
         try:
             PipelineTrack(f"Executing query: {query}")
             df = pd.read_sql_query(query, self.connection)
             PipelineTrack(f"Query executed successfully. Rows fetched: {len(df)}")
+
+            dtypes = self.dtypes if dtypes is None else dtypes
+            if dtypes:
+                raw_mb = frame_memory_mb(df)
+                df = apply_schema(df, dtypes)
+                typed_mb = frame_memory_mb(df)
+                PipelineTrack(f"Typed extraction memory: {raw_mb:.1f} MB raw -> {typed_mb:.1f} MB typed "
+                              f"({raw_mb / max(typed_mb, 1e-9):.1f}x smaller)")
             return df
         except sqlite3.Error as e:
             error_msg = f"Error executing query: {str(e)}"
@@ -139,6 +259,84 @@ class SQLiteExtractor(IDatabaseExtractor):
             ErrorTrack(error_msg)
             raise Exception(error_msg)
 
+    def iter_query(self, query: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                   dtypes: Optional[Dict[str, str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Execute a query on the database and yield the results chunk by chunk.
+
+        Rows are fetched from the cursor `chunk_rows` at a time, so peak memory is
+        bounded by the chunk size instead of the size of the result set. The index
+        of each chunk continues from the previous one, matching `execute_query`.
+
+        Parameters:
+        -----------
+        query (str): SQL query to execute.
+        chunk_rows (int): Maximum number of rows per yielded DataFrame.
+        dtypes (Optional[Dict[str, str]]): Column types for this query, overriding the
+                                           extractor's (see `apply_schema`).
+
+        Raises:
+        _______
+        TypeError: If the query is not a string.
+        ValueError: If the query is empty or `chunk_rows` is not a positive integer.
+        sqlite3.Error: If an error occurs during query execution.
+        Exception: For any other unforeseen errors.
+
+        Returns:
+        ________
+        Iterator[pd.DataFrame]: Chunks of the query result, in order.
+        """
+        self._validate_query(query)
+
+        if not isinstance(chunk_rows, int) or chunk_rows <= 0:
+            error_msg = f"chunk_rows must be a positive integer. Provided: {chunk_rows}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+
+        try:
+            PipelineTrack(f"Streaming query in chunks of {chunk_rows} rows: {query}")
+            dtypes = self.dtypes if dtypes is None else dtypes
+            offset = 0
+            raw_mb = typed_mb = 0.0
+            for chunk in pd.read_sql_query(query, self.connection, chunksize=chunk_rows):
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                if dtypes:
+                    raw_mb += frame_memory_mb(chunk)
+                    chunk = apply_schema(chunk, dtypes)
+                    typed_mb += frame_memory_mb(chunk)
+                yield chunk
+            PipelineTrack(f"Query streamed successfully. Rows fetched: {offset}")
+            if dtypes:
+                PipelineTrack(f"Typed extraction memory over all chunks: {raw_mb:.1f} MB raw -> {typed_mb:.1f} MB typed")
+        except sqlite3.Error as e:
+            error_msg = f"Error executing query: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg)
+        except Exception as e:
+            error_msg = f"Unexpected error during query execution: {str(e)}"
+            ErrorTrack(error_msg)
+            raise Exception(error_msg)
+
+    def _validate_query(self, query: str) -> None:
+        """
+        Ensure the query is a non-empty string.
+
+        Raises:
+        _______
+        TypeError: If the query is not a string.
+        ValueError: If the query string is empty.
+        """
+        if not isinstance(query, str):
+            error_msg = f"The query must be a string. Provided type: {type(query)}"
+            ErrorTrack(error_msg)
+            raise TypeError(error_msg)
+
+        if not query.strip():
+            error_msg = "The query strin is empty or invalid."
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+
     def close_connection(self) -> None:
         """
         Close the database connection.
@@ -148,8 +346,13 @@ class SQLiteExtractor(IDatabaseExtractor):
         None
         """
         try:
-            if self.connection:
+            if self.connection and self.pool is not None:
+                self.pool.release(self.db_path, self.connection)
+                self.connection = None
+                PipelineTrack("Database connection returned to the pool.")
+            elif self.connection:
                 self.connection.close()
+                self.connection = None
                 PipelineTrack("Database connection closed.")
         except sqlite3.Error as e:
             error_msg = f"Error closing the database connection: {str(e)}"
@@ -159,7 +362,7 @@ class SQLiteExtractor(IDatabaseExtractor):
 
 if __name__ == "__main__":
     # Instantiate the extractor
-    db_extractor = SQLiteExtractor()
+    db_extractor = SQLiteExtractor(dtypes=OTP_DTYPES)
 
     # Define the database file path
     database_path = "/workspaces/Data-Wharehouse-ETL/database/sql/database.sqlite"
@@ -174,6 +377,7 @@ if __name__ == "__main__":
         # Execute the query and fetch results as DataFrame
         data_frame = db_extractor.execute_query(sql_query)
         print(data_frame.head())
+        print(data_frame.dtypes)
 
         # Close the connection
         db_extractor.close_connection()
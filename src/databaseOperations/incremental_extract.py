@@ -0,0 +1,312 @@
+import json, sys, os
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+from abc import ABC, abstractmethod
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from utils.sql_tools import SelectQuery, sql_literal
+from utils.datetime_tools import TIMESTAMP_FORMAT
+from databaseOperations.extract_database import IDatabaseExtractor, DEFAULT_CHUNK_ROWS
+
+# Name of the helper column that carries the source rowid through the query.
+ROWID_COLUMN = "_rowid"
+
+# Columns the high-water mark can be kept on.
+WATERMARK_COLUMNS = ("rowid", "timeStamp")
+
+
+def timestamp_text(values: pd.Series) -> pd.Series:
+    """
+    Non-missing timestamps as the source table's text, so marks compare with it in SQL.
+
+    Datetime columns are always formatted with `TIMESTAMP_FORMAT`: `astype(str)`
+    drops the time of day when every value is at midnight, and a mark like
+    '2016-03-23' would select the same midnight rows again on every run.
+
+    Parameters:
+    -----------
+    values (pd.Series): The timeStamp column (datetime64 or text).
+
+    Returns:
+    --------
+    pd.Series: Text timestamps, on the index of the rows that have one.
+    """
+    values = values.dropna()
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.strftime(TIMESTAMP_FORMAT)
+    return values.astype(str)
+
+
+class IExtractionState(ABC):
+    """
+    Abstract Base Class (ABC) for persisting the incremental extraction high-water mark.
+    """
+
+    @abstractmethod
+    def load(self) -> Dict[str, Any]:
+        """
+        Load the stored high-water mark.
+
+        Returns:
+        --------
+        Dict[str, Any]: The stored state, or an empty dict if nothing was stored yet.
+        """
+        pass
+
+    @abstractmethod
+    def save(self, state: Dict[str, Any]) -> None:
+        """
+        Persist the high-water mark.
+
+        Parameters:
+        -----------
+        state (Dict[str, Any]): The state to store.
+
+        Returns:
+        --------
+        None
+        """
+        pass
+
+
+class ExtractionStateFile(IExtractionState):
+    """
+    Concrete implementation of IExtractionState backed by a small JSON file.
+    """
+
+    def __init__(self, state_path: str) -> None:
+        if not isinstance(state_path, str):
+            error_msg = f"The state file path must be a string. Provided type: {type(state_path)}"
+            ErrorTrack(error_msg)
+            raise TypeError(error_msg)
+        self.state_path = state_path
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Load the stored high-water mark.
+
+        Raises:
+        -------
+        ValueError: If the state file exists but cannot be parsed.
+
+        Returns:
+        --------
+        Dict[str, Any]: The stored state, or an empty dict if the file does not exist.
+        """
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            error_msg = f"The extraction state file is corrupted: {self.state_path}: {str(e)}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg) from e
+
+    def save(self, state: Dict[str, Any]) -> None:
+        """
+        Persist the high-water mark, replacing the file atomically.
+
+        Parameters:
+        -----------
+        state (Dict[str, Any]): The state to store.
+
+        Returns:
+        --------
+        None
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+        PipelineTrack(f"Saved extraction high-water mark to {self.state_path}: {state}")
+
+
+class IncrementalExtractor(IDatabaseExtractor):
+    """
+    IDatabaseExtractor that only fetches rows past a persisted high-water mark.
+
+    The configured query is rewritten to select the source rowid and to skip every
+    row at or below the stored mark. The new mark is tracked while rows are read
+    and only persisted by `commit`, once the caller has processed the batch, so a
+    failed run is simply retried on the next schedule.
+    """
+
+    def __init__(self, extractor: IDatabaseExtractor, state: IExtractionState,
+                 watermark_column: str = "rowid", full_refresh: bool = False) -> None:
+        if watermark_column not in WATERMARK_COLUMNS:
+            error_msg = f"watermark_column must be one of {WATERMARK_COLUMNS}. Provided: {watermark_column}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+
+        self.extractor = extractor
+        self.state = state
+        self.watermark_column = watermark_column
+        self.full_refresh = full_refresh
+        self.pending_state: Optional[Dict[str, Any]] = None
+
+    def connect(self, db_path: str) -> None:
+        """
+        Connect the wrapped extractor to the SQLite database.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the SQLite database file.
+
+        Returns:
+        --------
+        None
+        """
+        self.extractor.connect(db_path)
+
+    def build_query(self, query: str) -> str:
+        """
+        Rewrite the query to fetch only rows newer than the stored high-water mark.
+
+        Parameters:
+        -----------
+        query (str): A simple single-table SELECT, e.g. "SELECT * FROM otp".
+
+        Raises:
+        -------
+        ValueError: If the query cannot be rewritten.
+
+        Returns:
+        --------
+        str: The rewritten query. It has an extra `_rowid` column.
+        """
+        select = SelectQuery.parse(query)
+        select = select.with_columns(f"rowid AS {ROWID_COLUMN}, {select.columns}")
+
+        state = {} if self.full_refresh else self.state.load()
+        last_rowid = state.get("rowid")
+        last_timestamp = state.get("timeStamp")
+
+        if self.watermark_column == "rowid" and last_rowid is not None:
+            select = select.with_predicate(f"rowid > {sql_literal(int(last_rowid))}")
+        elif self.watermark_column == "timeStamp" and last_timestamp is not None:
+            timestamp = sql_literal(last_timestamp)
+            select = select.with_predicate(
+                f"timeStamp > {timestamp} OR (timeStamp = {timestamp} AND rowid > {sql_literal(int(last_rowid or 0))})"
+            )
+
+        if self.full_refresh:
+            PipelineTrack("Full refresh requested: ignoring the stored high-water mark.")
+        else:
+            PipelineTrack(f"Incremental extraction from high-water mark: rowid={last_rowid}, timeStamp={last_timestamp}")
+
+        self.pending_state = dict(state)
+        self.pending_state.setdefault("rowid", None)
+        self.pending_state.setdefault("timeStamp", None)
+        self.pending_state["rows"] = 0
+        return select.to_sql()
+
+    def execute_query(self, query: str) -> pd.DataFrame:
+        """
+        Execute the query and return only the new rows.
+
+        Parameters:
+        -----------
+        query (str): SQL query to execute.
+
+        Returns:
+        --------
+        pd.DataFrame: The rows past the high-water mark.
+        """
+        df = self.extractor.execute_query(self.build_query(query))
+        return self._track(df)
+
+    def iter_query(self, query: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Execute the query and yield only the new rows, chunk by chunk.
+
+        Parameters:
+        -----------
+        query (str): SQL query to execute.
+        chunk_rows (int): Maximum number of rows per yielded DataFrame.
+
+        Returns:
+        --------
+        Iterator[pd.DataFrame]: Chunks of the rows past the high-water mark.
+        """
+        for chunk in self.extractor.iter_query(self.build_query(query), chunk_rows=chunk_rows):
+            yield self._track(chunk)
+
+    def commit(self) -> None:
+        """
+        Persist the high-water mark reached by the last query.
+
+        Call this once the extracted rows have been transformed and saved.
+
+        Returns:
+        --------
+        None
+        """
+        if self.pending_state is None:
+            return
+        self.pending_state["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        self.state.save(self.pending_state)
+        PipelineTrack(f"Incremental extraction committed. New rows: {self.pending_state['rows']}")
+        self.pending_state = None
+
+    def close_connection(self) -> None:
+        """
+        Close the wrapped extractor's connection.
+
+        Returns:
+        --------
+        None
+        """
+        self.extractor.close_connection()
+
+    def _track(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Advance the pending high-water mark past `df` and drop the helper rowid column."""
+        if self.pending_state is None:
+            error_msg = "build_query must be called before rows can be tracked."
+            ErrorTrack(error_msg)
+            raise RuntimeError(error_msg)
+
+        if len(df):
+            pending = self.pending_state
+            if self.watermark_column == "timeStamp":
+                # The mark is the (timeStamp, rowid) pair of the latest row
+                timestamps = timestamp_text(df["timeStamp"])
+                if len(timestamps):
+                    max_timestamp = timestamps.max()
+                    max_rowid = int(df.loc[timestamps.index[timestamps == max_timestamp], ROWID_COLUMN].max())
+                    if pending["timeStamp"] is None or (max_timestamp, max_rowid) > (pending["timeStamp"], pending["rowid"] or 0):
+                        pending["timeStamp"], pending["rowid"] = max_timestamp, max_rowid
+            else:
+                max_rowid = int(df[ROWID_COLUMN].max())
+                if pending["rowid"] is None or max_rowid > pending["rowid"]:
+                    pending["rowid"] = max_rowid
+                timestamps = timestamp_text(df["timeStamp"]) if "timeStamp" in df.columns else ()
+                if len(timestamps):
+                    max_timestamp = timestamps.max()
+                    if pending["timeStamp"] is None or max_timestamp > pending["timeStamp"]:
+                        pending["timeStamp"] = max_timestamp
+            pending["rows"] += len(df)
+
+        return df.drop(columns=[ROWID_COLUMN])
+
+
+if __name__ == "__main__":
+    from databaseOperations.extract_database import SQLiteExtractor
+
+    database_path = "/workspaces/Data-Wharehouse-ETL/database/sql/database.sqlite"
+    state_path = "/workspaces/Data-Wharehouse-ETL/database/csv_data/extract_state.json"
+
+    extractor = IncrementalExtractor(SQLiteExtractor(), ExtractionStateFile(state_path))
+    try:
+        extractor.connect(database_path)
+        new_rows = extractor.execute_query("SELECT * FROM otp")
+        print(f"New rows: {len(new_rows)}")
+        extractor.commit()
+        extractor.close_connection()
+    except Exception as e:
+        print(f"Error: {e}")
@@ -1,4 +1,9 @@
-import gdown, sys, os
+import json, sys, os
+import hashlib
+import urllib.error
+import urllib.request
+from datetime import datetime
+from typing import Any, Dict
 from pathlib import Path
 from abc import ABC, abstractmethod
 
@@ -7,13 +12,160 @@ MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 sys.path.append(MAIN_DIR)
 from utils import ErrorTrack, PipelineTrack
 
+# Bytes read from the network and written to disk at a time.
+DOWNLOAD_BLOCK_SIZE = 1024 * 1024
+
+
+def resolve_download_url(url: str) -> str:
+    """
+    Turn a Google Drive share link into a direct download URL.
+
+    Other HTTP(S) URLs are returned unchanged.
+
+    Parameters:
+    -----------
+    url (str): A Drive share link (".../file/d/<id>/...") or any HTTP(S) URL.
+
+    Raises:
+    -------
+    ValueError: If the URL is neither a Drive link nor an HTTP(S) URL.
+
+    Returns:
+    --------
+    str: The URL to download from.
+    """
+    if "drive.google.com" in url:
+        try:
+            file_id = url.split('/d/')[1].split('/')[0]
+        except IndexError:
+            error_msg = f"Invalid Google Drive URL format: {url}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+        # The usercontent endpoint serves the file itself (no virus-scan page with
+        # confirm=t) and supports Range and conditional requests.
+        return f"https://drive.usercontent.google.com/download?id={file_id}&export=download&confirm=t"
+
+    if not url.startswith(("http://", "https://")):
+        error_msg = f"Only Google Drive and HTTP(S) URLs are supported: {url}"
+        ErrorTrack(error_msg)
+        raise ValueError(error_msg)
+    return url
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 hex digest of a file, read in large blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(DOWNLOAD_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DownloadManifest:
+    """
+    What was downloaded last time: size, checksum and the server's validators.
+
+    Stored as JSON next to the archive (`<name>.manifest.json`). The ETag and
+    Last-Modified headers are sent back as conditional-request headers, so an
+    unchanged remote file is not transferred again.
+    """
+
+    def __init__(self, manifest_path: str) -> None:
+        self.manifest_path = manifest_path
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Load the manifest.
+
+        Returns:
+        --------
+        Dict[str, Any]: The manifest, or an empty dict if it is missing or unreadable.
+        """
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            PipelineTrack(f"Ignoring unreadable download manifest: {self.manifest_path}")
+            return {}
+
+    def save(self, manifest: Dict[str, Any]) -> None:
+        """
+        Persist the manifest, replacing the file atomically.
+
+        Parameters:
+        -----------
+        manifest (Dict[str, Any]): The manifest to store.
+
+        Returns:
+        --------
+        None
+        """
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def validator_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+    """Conditional-request headers for the validators stored in a manifest entry."""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def archive_matches(save_path: str, manifest: Dict[str, Any]) -> bool:
+    """Whether the local archive has the size recorded in the manifest."""
+    return os.path.exists(save_path) and os.path.getsize(save_path) == manifest.get("size")
+
+
+def remote_unchanged(download_link: str, manifest: Dict[str, Any], timeout: float) -> bool:
+    """
+    Whether the remote file is still the one recorded in the manifest.
+
+    Sends a HEAD request with the stored validators; callers check their local
+    copy (e.g. `archive_matches`) first.
+
+    Parameters:
+    -----------
+    download_link (str): The resolved download URL.
+    manifest (Dict[str, Any]): The manifest of the last download.
+    timeout (float): Socket timeout in seconds.
+
+    Returns:
+    --------
+    bool: True if the download can be skipped.
+    """
+    if not manifest or manifest.get("download_url") != download_link:
+        return False
+    headers = validator_headers(manifest)
+    if not headers:
+        return False
+
+    request = urllib.request.Request(download_link, method="HEAD", headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            # Servers that ignore conditional headers still report their validators
+            etag = response.headers.get("ETag")
+            return etag is not None and etag == manifest.get("etag")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return True
+        PipelineTrack(f"Conditional check failed with HTTP {e.code}, downloading again.")
+        return False
+
+
 class ILoadFromDrive(ABC):
     """
     Abstract Base Class (ABC) for loading files from Google Drive.
     """
 
     @abstractmethod
-    def load(self, url: str, save_archive: str, name: str) -> None:
+    def load(self, url: str, save_archive: str, name: str, force: bool = False) -> bool:
         """
         Abstract method to be implemented for loading files from Google Drive.
 
@@ -22,28 +174,42 @@ class ILoadFromDrive(ABC):
         url (str): The Google Drive link for the file.
         save_archive (str): The directory path to save the downloaded file.
         name (str): The name to save the downloaded file as.
+        force (bool): Download even if the local copy looks current.
 
         Returns:
         --------
-        None
+        bool: True if a new file was downloaded, False if the existing one was kept.
         """
         pass
 
 
 class LoadFromDrive(ILoadFromDrive):
     """
-    Concrete class for downloading files from Google Drive.
+    Concrete class for downloading files from Google Drive or any HTTP(S) URL.
+
+    The download is skipped when the remote file has not changed since the last
+    run (according to its ETag/Last-Modified and the local size), and a dropped
+    transfer is resumed from the `.zip.part` file with a Range request.
     """
 
-    def load(self, url: str, save_archive: str, name: str) -> None:
+    def __init__(self, timeout: float = 60.0) -> None:
+        """
+        Parameters:
+        -----------
+        timeout (float): Socket timeout in seconds for each request.
+        """
+        self.timeout = timeout
+
+    def load(self, url: str, save_archive: str, name: str, force: bool = False) -> bool:
         """
         Downloads a file from Google Drive and saves it to the specified directory.
 
         Parameters:
         -----------
-        url (str): The Google Drive link for the file to be downloaded.
+        url (str): The Google Drive link or HTTP(S) URL of the file to be downloaded.
         save_archive (str): The path to the directory where the file should be saved.
         name (str): The name to use for the saved file (without extension).
+        force (bool): Download even if the manifest says the file is unchanged.
 
         Raises:
         -------
@@ -54,7 +220,7 @@ class LoadFromDrive(ILoadFromDrive):
 
         Returns:
         --------
-        None
+        bool: True if a new file was downloaded, False if the existing one is current.
         """
         # Parameter validation
         if not isinstance(url, str):
@@ -72,39 +238,137 @@ class LoadFromDrive(ILoadFromDrive):
             ErrorTrack(error_msg)
             raise FileNotFoundError(error_msg)
 
-        try:
-            # Extract the file ID from the Google Drive URL
-            try:
-                file_id = url.split('/d/')[1].split('/')[0]
-                download_link = f"https://drive.google.com/uc?id={file_id}"
-            except IndexError:
-                error_msg = f"Invalid Google Drive URL format: {url}"
-                ErrorTrack(error_msg)
-                raise ValueError(error_msg)
+        download_link = resolve_download_url(url)
 
+        try:
             # Prepare the full save path
             save_path = f"{save_archive}/{name}.zip"
+            part_path = f"{save_path}.part"
+            manifest_store = DownloadManifest(f"{save_archive}/{name}.manifest.json")
+            manifest = manifest_store.load()
+
+            # Skip the transfer when the remote file is unchanged
+            if not force and archive_matches(save_path, manifest) and remote_unchanged(download_link, manifest, self.timeout):
+                PipelineTrack(f"Remote file unchanged, keeping {save_path}")
+                return False
 
             # Log the download process
-            PipelineTrack(f"Starting download from Google Drive. File: {name}, Destination: {save_path}")
+            PipelineTrack(f"Starting download. File: {name}, Source: {download_link}, Destination: {save_path}")
 
-            # Download the file using gdown
-            gdown.download(download_link, str(save_path), quiet=False)
+            response = self._open(download_link, part_path, manifest)
+            with response:
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                # Remember the validators of a partial file, so a resume only
+                # continues it while the remote file is still the same
+                manifest["partial"] = validators
+                manifest_store.save(manifest)
+                size, sha256 = self._write_body(response, part_path)
+
+            os.replace(part_path, save_path)
+            manifest = {
+                "url": url,
+                "download_url": download_link,
+                "size": size,
+                "sha256": sha256,
+                "etag": validators["etag"],
+                "last_modified": validators["last_modified"],
+                "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            manifest_store.save(manifest)
 
             # Log successful download
-            PipelineTrack(f"File downloaded successfully: {save_path}")
+            PipelineTrack(f"File downloaded successfully: {save_path} ({size} bytes, sha256={sha256})")
+            return True
 
         except Exception as e:
             error_msg = f"An error occurred while downloading the file: {str(e)}"
             ErrorTrack(error_msg)
             raise Exception(error_msg) from e
 
+    def _open(self, download_link: str, part_path: str, manifest: Dict[str, Any]):
+        """Start the transfer, resuming `part_path` with a Range request when possible."""
+        headers = {}
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        partial = manifest.get("partial") or {}
+        if_range = partial.get("etag") or partial.get("last_modified")
+        if offset and if_range:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = if_range
+
+        try:
+            response = urllib.request.urlopen(urllib.request.Request(download_link, headers=headers), timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 416:
+                raise
+            # The range no longer fits the remote file: start over
+            PipelineTrack(f"Cannot resume {part_path} (HTTP 416), restarting the download.")
+            os.remove(part_path)
+            return urllib.request.urlopen(download_link, timeout=self.timeout)
+
+        if "text/html" in (response.headers.get("Content-Type") or ""):
+            response.close()
+            error_msg = f"The server returned an HTML page instead of the file (check sharing settings or quota): {download_link}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+
+        if response.status == 206:
+            PipelineTrack(f"Resuming download of {part_path} at byte {offset}")
+        elif offset:
+            # The server sent the whole file: the remote changed or ranges are unsupported
+            PipelineTrack(f"Server did not resume the transfer, discarding {offset} partial bytes.")
+            os.remove(part_path)
+        return response
+
+    def _write_body(self, response, part_path: str):
+        """Append the response body to `part_path`; returns the final size and SHA-256."""
+        digest = hashlib.sha256()
+        if response.status == 206 and os.path.exists(part_path):
+            with open(part_path, 'rb') as f:
+                for block in iter(lambda: f.read(DOWNLOAD_BLOCK_SIZE), b""):
+                    digest.update(block)
+
+        expected = None
+        content_range = response.headers.get("Content-Range")
+        if content_range and "/" in content_range and not content_range.endswith("/*"):
+            expected = int(content_range.rsplit("/", 1)[1])
+        elif response.headers.get("Content-Length") and response.status == 200:
+            expected = int(response.headers["Content-Length"])
+
+        with open(part_path, 'ab' if response.status == 206 else 'wb') as f:
+            for block in iter(lambda: response.read(DOWNLOAD_BLOCK_SIZE), b""):
+                f.write(block)
+                digest.update(block)
+            size = f.tell()
+
+        if expected is not None and size != expected:
+            error_msg = f"Incomplete download: got {size} of {expected} bytes. Run again to resume."
+            ErrorTrack(error_msg)
+            raise IOError(error_msg)
+        return size, digest.hexdigest()
+
 
 if __name__ == "__main__":
-    save_archive="/workspaces/Data-Wharehouse-ETL/database/archive"
-    PipelineTrack("Strating Donwliading DataBast From google Drive")
-    loader = LoadFromDrive().load(url="https://drive.google.com/file/d/139OEjxiFwxJtFQWaixF0fG4JSQyGp6EP/view?usp=sharing",
-                                  save_archive=save_archive,
-                                  name="database_v1")
-    from utils.common_tools import get_size
-    PipelineTrack(F"Comblited Download Database from google Drive. Note:Size={get_size(f"{save_archive}/database_v1.zip")}, You cna find the database in {save_archive}")
+    if "--local" in sys.argv:
+        # Demo against a local HTTP server instead of Google Drive
+        import tempfile
+        from utils.local_http_server import serve_directory
+
+        with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as save_archive:
+            with open(os.path.join(source_dir, "database.zip"), "wb") as f:
+                f.write(os.urandom(8 * 1024 * 1024))
+            server, base_url = serve_directory(source_dir)
+            loader = LoadFromDrive()
+            print("first run downloaded:", loader.load(f"{base_url}/database.zip", save_archive, "database"))
+            print("second run downloaded:", loader.load(f"{base_url}/database.zip", save_archive, "database"))
+            server.shutdown()
+    else:
+        save_archive="/workspaces/Data-Wharehouse-ETL/database/archive"
+        PipelineTrack("Strating Donwliading DataBast From google Drive")
+        loader = LoadFromDrive().load(url="https://drive.google.com/file/d/139OEjxiFwxJtFQWaixF0fG4JSQyGp6EP/view?usp=sharing",
+                                      save_archive=save_archive,
+                                      name="database_v1")
+        from utils.common_tools import get_size
+        PipelineTrack(F"Comblited Download Database from google Drive. Note:Size={get_size(f'{save_archive}/database_v1.zip')}, You cna find the database in {save_archive}")
@@ -0,0 +1,636 @@
+import sqlite3, sys, os
+import time
+import numpy as np
+import pandas as pd
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from utils.datetime_tools import DATETIME_FORMATS, TIMESTAMP_FORMAT
+from databaseOperations.sqlite_connection import SQLiteConnectionProfile, WAREHOUSE_PROFILE
+from databaseOperations.warehouse_rollups import (clear_rollups, create_rollup_tables, flat_rollup_source,
+                                                  read_rollup, rebuild_rollups, refresh_rollups)
+from databaseOperations.warehouse_partitions import WarehousePartitions, partition_months
+
+# Rows bound per `executemany` call; bounds the Python objects built at a time.
+DEFAULT_BATCH_ROWS = 100_000
+
+# Warehouse tables written by the pipeline.
+TRAIN_STATUS_TABLE = "train_status"
+DELAY_SUMMARY_TABLE = "delay_summary"
+
+# Indexes per table, as column tuples. Built after the rows when a table is loaded empty.
+# The row indexes end with delay_minutes, so per-train, per-period and per-station
+# delay queries are answered from the index alone (covering indexes).
+DEFAULT_INDEXES = {
+    TRAIN_STATUS_TABLE: [("train_id", "timeStamp", "delay_minutes"), ("timeStamp", "delay_minutes"),
+                         ("originStation", "delay_minutes")],
+    DELAY_SUMMARY_TABLE: [("train_id",)],
+}
+
+# Natural key per table for merge loads: a row with the key of a stored row replaces it.
+# A train reports at most once per timestamp.
+MERGE_KEYS = {
+    TRAIN_STATUS_TABLE: ("train_id", "timeStamp"),
+    DELAY_SUMMARY_TABLE: ("train_id",),
+}
+
+
+def sql_type(dtype) -> str:
+    """
+    SQLite column type for a pandas dtype.
+
+    Parameters:
+    -----------
+    dtype: The pandas dtype.
+
+    Returns:
+    --------
+    str: INTEGER, REAL or TEXT (datetimes are stored as ISO 8601 text).
+    """
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def sql_values(values: pd.Series, formats: Optional[Dict[str, str]] = None) -> list:
+    """
+    A column as a list of Python values that `sqlite3` can bind, missing values as None.
+
+    Categorical and datetime columns are converted once per distinct value and
+    mapped back through integer codes. Datetimes become the text format of the
+    source table for the column's name ('YYYY-MM-DD' for `date`), and
+    'YYYY-MM-DD HH:MM:SS' for any other column. The format never depends on
+    the values, so a batch of midnight timestamps is written like any other
+    and still matches the stored merge keys.
+
+    Parameters:
+    -----------
+    values (pd.Series): The column.
+    formats (Optional[Dict[str, str]]): Column -> datetime format. Defaults to `DATETIME_FORMATS`.
+
+    Returns:
+    --------
+    list: One value per row.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), pd.Series(values.cat.categories)
+    elif pd.api.types.is_datetime64_any_dtype(values):
+        codes, uniques = pd.factorize(values)
+        format = (formats or DATETIME_FORMATS).get(values.name, TIMESTAMP_FORMAT)
+        uniques = pd.Series(pd.DatetimeIndex(uniques).strftime(format))
+    elif pd.api.types.is_float_dtype(values) and not pd.api.types.is_extension_array_dtype(values):
+        # SQLite stores NaN as NULL
+        return values.to_numpy().tolist()
+    elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_extension_array_dtype(values):
+        return values.to_numpy().tolist()
+    else:
+        return values.astype(object).where(values.notna(), None).tolist()
+    # Append None so the missing-value code -1 looks it up
+    lookup = np.append(np.asarray(sql_values(uniques, formats), dtype=object), None)
+    return lookup[codes].tolist()
+
+
+def qualified(schema: str, name: str) -> str:
+    """Quoted `schema.name` (schema: "main", "temp" or an attached partition)."""
+    return f'"{schema}"."{name}"'
+
+
+def index_name(table: str, columns: Sequence[str], unique: bool = False) -> str:
+    """Name of the (unique) index on `columns` of `table`."""
+    return f"{'uq' if unique else 'idx'}_{table}_{'_'.join(columns)}"
+
+
+class ILoadData(ABC):
+    """
+    Abstract Base Class (ABC) for loading transformed data into a warehouse.
+    """
+
+    # Loaders that merge rows on a natural key set `merge`. After a merge load,
+    # `merged_rows` holds the positions (in the loaded frame) of the rows it wrote
+    # and `replaced_rows` those of them whose key was already stored; both are
+    # None after any other load.
+    merge = False
+    merged_rows = None
+    replaced_rows = None
+
+    @abstractmethod
+    def connect(self, db_path: str) -> None:
+        """
+        Open (and create if needed) the warehouse database.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the warehouse database file.
+
+        Returns:
+        --------
+        None
+        """
+        pass
+
+    @abstractmethod
+    def load(self, df: pd.DataFrame, table: str, replace: bool = False) -> int:
+        """
+        Write the rows of `df` to `table`.
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): The rows.
+        table (str): The target table, created from the frame's columns if missing.
+        replace (bool): Replace the table's rows instead of appending.
+
+        Returns:
+        --------
+        int: Rows written.
+        """
+        pass
+
+    @abstractmethod
+    def delay_summary(self) -> pd.DataFrame:
+        """
+        Average delay per train over the stored train status rows.
+
+        Returns:
+        --------
+        pd.DataFrame: Columns (train_id, avg_delay_minutes), sorted by train_id.
+        """
+        pass
+
+    @abstractmethod
+    def close_connection(self) -> None:
+        """
+        Close the warehouse connection.
+
+        Returns:
+        --------
+        None
+        """
+        pass
+
+
+class SQLiteWarehouseLoader(ILoadData):
+    """
+    Bulk loader for the SQLite warehouse.
+
+    Every `load` is one transaction: the rows are bound column by column into
+    Python lists (no per-row DataFrame access) and inserted with `executemany`
+    in batches of `batch_rows`. The connection uses WAL with synchronous=NORMAL,
+    so a commit appends to the log without waiting for an fsync of the database
+    file. Indexes are not maintained row by row while an empty table is loaded;
+    they are built once the rows are in, which is a single sorted pass. Loads
+    into a table that already has rows keep its indexes in place.
+
+    With `merge=True`, loads into a table with a natural key (`merge_keys`) are
+    idempotent: the table gets a unique index on the key, the rows are bulk
+    inserted into a temporary staging table, and one
+    `INSERT ... SELECT ... ON CONFLICT DO UPDATE` merges them. Rows already
+    stored with the same values are left untouched, so loading an overlapping
+    or repeated batch adds no duplicates and writes only what changed.
+    `merged_rows` and `replaced_rows` then tell the caller which rows those
+    were, and `delay_summary` summarizes the deduplicated rows.
+
+    With `rollups=True`, the rollup tables of `warehouse_rollups` are kept up to
+    date with the row table in the same transaction: appended rows are added
+    to them, merged rows replace the contribution of the rows they change, and
+    a replaced (or first) load rebuilds them.
+
+    With `partitions`, the train status rows are stored in one SQLite file per
+    month (see `warehouse_partitions`): every load attaches the months its rows
+    fall in and merges or appends into each of them, one transaction per month.
+    """
+
+    # Table the train status rows are stored in
+    ROW_TABLE = TRAIN_STATUS_TABLE
+    # Row table -> its timestamp column, which decides the monthly partition
+    PARTITION_COLUMNS = {TRAIN_STATUS_TABLE: "timeStamp"}
+
+    def __init__(self, profile: SQLiteConnectionProfile = WAREHOUSE_PROFILE,
+                 batch_rows: int = DEFAULT_BATCH_ROWS,
+                 indexes: Optional[Dict[str, List[Tuple[str, ...]]]] = None,
+                 merge: bool = False, merge_keys: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 rollups: bool = False, partitions: Optional[WarehousePartitions] = None) -> None:
+        """
+        Parameters:
+        -----------
+        profile (SQLiteConnectionProfile): How the warehouse connection is opened and tuned.
+        batch_rows (int): Rows per `executemany` call.
+        indexes (Optional[Dict[str, List[Tuple[str, ...]]]]): Table -> indexed column tuples.
+                                                              Defaults to `DEFAULT_INDEXES`.
+        merge (bool): Merge rows on their natural key instead of appending them.
+        merge_keys (Optional[Dict[str, Tuple[str, ...]]]): Table -> natural key columns.
+                                                           Defaults to `MERGE_KEYS`; tables
+                                                           without a key are appended to.
+        rollups (bool): Maintain the rollup tables of the train status rows.
+        partitions (Optional[WarehousePartitions]): Store the train status rows in monthly
+                                                    partition files.
+        """
+        self.profile = profile
+        self.batch_rows = batch_rows
+        self.indexes = DEFAULT_INDEXES if indexes is None else indexes
+        self.merge = merge
+        self.merge_keys = MERGE_KEYS if merge_keys is None else merge_keys
+        self.rollups = rollups
+        self.partitions = partitions
+        self.merged_rows = None
+        self.replaced_rows = None
+        self.db_path = None
+        self.connection = None
+
+    def connect(self, db_path: str) -> None:
+        """
+        Open (and create if needed) the warehouse database.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the warehouse database file.
+
+        Raises:
+        -------
+        TypeError: If the database path is not a string.
+        sqlite3.Error: For any SQLite-specific connection errors.
+
+        Returns:
+        --------
+        None
+        """
+        if not isinstance(db_path, str):
+            error_msg = f"The database path must be a string. Provided type: {type(db_path)}"
+            ErrorTrack(error_msg)
+            raise TypeError(error_msg)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self.db_path = db_path
+            self.connection = self.profile.open(db_path)
+            # Transactions are started and committed explicitly by `load`
+            self.connection.isolation_level = None
+            if self.partitions is not None:
+                self.partitions.create_catalog(self.connection)
+            PipelineTrack(f"Connected to warehouse: {db_path}")
+        except sqlite3.Error as e:
+            error_msg = f"Error connecting to warehouse: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg)
+
+    def load(self, df: pd.DataFrame, table: str, replace: bool = False) -> int:
+        """
+        Write the rows of `df` to `table` in one transaction.
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): The rows; the index is not written.
+        table (str): The target table, created from the frame's columns if missing.
+        replace (bool): Replace the table (and its columns) instead of appending or merging.
+
+        Raises:
+        -------
+        RuntimeError: If `connect` was not called.
+        sqlite3.Error: If the load fails (or, when merging, the stored rows have
+                       duplicate keys); the table is then left as it was.
+
+        Returns:
+        --------
+        int: Rows written (when merging: rows inserted or changed).
+        """
+        if self.connection is None:
+            error_msg = "connect must be called before loading data."
+            ErrorTrack(error_msg)
+            raise RuntimeError(error_msg)
+
+        start = time.perf_counter()
+        partitioned = self.partitions is not None and table in self.PARTITION_COLUMNS
+        # Positional index: merges report the rows they wrote by their index labels
+        df = df.set_axis(pd.RangeIndex(len(df)))
+        merging = bool(self.merge and self.merge_keys.get(table))
+        self.merged_rows, self.replaced_rows = ([], []) if merging else (None, None)
+        try:
+            if partitioned:
+                written = self._load_partitioned(df, table, replace)
+            else:
+                written = self._load_table(df, table, replace)
+        except sqlite3.Error as e:
+            if self.connection.in_transaction:
+                self.connection.execute("ROLLBACK")
+            error_msg = f"Error loading {len(df)} rows into {table}: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg)
+
+        if merging:
+            self.merged_rows = np.sort(np.asarray(self.merged_rows, dtype="int64"))
+            self.replaced_rows = np.sort(np.asarray(self.replaced_rows, dtype="int64"))
+        seconds = time.perf_counter() - start
+        merged = f" (merged: {written} inserted or changed)" if merging else ""
+        PipelineTrack(f"Loaded {len(df)} rows into {table}{merged} in {seconds:.2f}s "
+                      f"({len(df) / max(seconds, 1e-9):,.0f} rows/s)")
+        return written
+
+    def _load_table(self, df: pd.DataFrame, table: str, replace: bool, schema: str = "main",
+                    rebuild_empty_rollups: bool = True) -> int:
+        """
+        Write the rows of `df` to `schema.table` in one transaction.
+
+        With `rebuild_empty_rollups`, loading into an empty table rebuilds the
+        rollups from it; partitions pass False, since the rollups also cover
+        the other months.
+        """
+        target = qualified(schema, table)
+        self.connection.execute("BEGIN IMMEDIATE")
+        if replace:
+            self.connection.execute(f'DROP TABLE IF EXISTS {target}')
+        self._create_table(table, df, schema)
+        empty = self.connection.execute(f'SELECT 1 FROM {target} LIMIT 1').fetchone() is None
+        if empty:
+            self._drop_indexes(table, schema)
+        source = self._rollup_source(table, schema) if self.rollups else None
+        if source is not None:
+            create_rollup_tables(self.connection)
+        rebuild = source is not None and empty and rebuild_empty_rollups
+
+        key = self.merge_keys.get(table) if self.merge else None
+        if key:
+            written = self._merge_rows(table, df, key, source if not rebuild else None, schema)
+        else:
+            first_rowid = self.connection.execute(f'SELECT IFNULL(MAX(rowid), 0) + 1 FROM {target}').fetchone()[0]
+            self._insert_rows(table, df, schema)
+            written = len(df)
+            if source is not None and not rebuild:
+                refresh_rollups(self.connection, source, f'SELECT * FROM {target} WHERE rowid >= {first_rowid}')
+        if rebuild:
+            rebuild_rollups(self.connection, source, f'SELECT * FROM {target}')
+
+        self._create_indexes(table, schema)
+        self.connection.execute("COMMIT")
+        return written
+
+    def _load_partitioned(self, df: pd.DataFrame, table: str, replace: bool) -> int:
+        """
+        Split the rows of `df` by month and load each month into its partition.
+
+        Each month is its own transaction, so a failure leaves the months
+        loaded before it in place; re-running a merge load completes the rest.
+        """
+        if replace:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.partitions.drop(self.connection, table)
+            if self.rollups:
+                create_rollup_tables(self.connection)
+                clear_rollups(self.connection)
+            self.connection.execute("COMMIT")
+
+        months = partition_months(df[self.PARTITION_COLUMNS[table]])
+        codes, uniques = pd.factorize(months, sort=True)
+        written = 0
+        for position, month in enumerate(uniques):
+            rows = df.iloc[np.flatnonzero(codes == position)]
+            schema = self.partitions.attach(self.connection, table, month)
+            try:
+                written += self._load_table(rows, table, replace=False, schema=schema, rebuild_empty_rollups=False)
+                self.partitions.update_row_count(self.connection, table, month, schema)
+            finally:
+                if self.connection.in_transaction:
+                    self.connection.execute("ROLLBACK")
+                self.partitions.detach(self.connection, schema)
+        PipelineTrack(f"Loaded {len(df)} rows into {len(uniques)} monthly partitions of {table}")
+        return written
+
+    def delay_summary(self) -> pd.DataFrame:
+        """
+        Average delay per train over the stored train status rows.
+
+        With `merge`, the warehouse holds every key once however often
+        overlapping runs loaded it, so this is the summary of the deduplicated
+        rows. It is read from `rollup_train_hour` when rollups are maintained;
+        otherwise the rows are grouped, one monthly partition at a time.
+
+        Raises:
+        -------
+        RuntimeError: If `connect` was not called.
+        ValueError: If the rows must be grouped and a partition is archived.
+
+        Returns:
+        --------
+        pd.DataFrame: Columns (train_id, avg_delay_minutes), sorted by train_id.
+        """
+        if self.connection is None:
+            error_msg = "connect must be called before reading the delay summary."
+            ErrorTrack(error_msg)
+            raise RuntimeError(error_msg)
+
+        if self.rollups:
+            create_rollup_tables(self.connection)
+            totals = read_rollup(self.connection, "rollup_train_hour", ("train_id",))
+        elif self.partitions is not None:
+            partials = []
+            for month, _, _ in self.partitions.months(self.connection, self.ROW_TABLE):
+                schema = self.partitions.attach(self.connection, self.ROW_TABLE, month)
+                try:
+                    partials.append(self._delay_totals(schema))
+                finally:
+                    self.partitions.detach(self.connection, schema)
+            totals = pd.concat(partials).groupby("train_id", as_index=False).sum() if partials \
+                else self._delay_totals("main")
+        else:
+            totals = self._delay_totals("main")
+
+        count = totals["delay_count"].where(totals["delay_count"] > 0)
+        summary = pd.DataFrame({"train_id": totals["train_id"], "avg_delay_minutes": totals["delay_sum"] / count})
+        return summary.sort_values("train_id", ignore_index=True)
+
+    def _delay_totals(self, schema: str) -> pd.DataFrame:
+        """Delay count and sum per train of the rows in `schema` (none if the row table is missing there)."""
+        columns = self._columns(self.ROW_TABLE, schema)
+        if not columns:
+            return pd.DataFrame({"train_id": pd.Series(dtype="int64"), "delay_count": pd.Series(dtype="int64"),
+                                 "delay_sum": pd.Series(dtype="float64")})
+        source = self._rollup_source(self.ROW_TABLE, schema).format(
+            rows=f"SELECT * FROM {qualified(schema, self.ROW_TABLE)}")
+        return pd.read_sql_query(f"SELECT train_id, COUNT(delay_minutes) AS delay_count, "
+                                 f"TOTAL(delay_minutes) AS delay_sum FROM ({source}) "
+                                 f"WHERE train_id IS NOT NULL GROUP BY train_id", self.connection)
+
+    def close_connection(self) -> None:
+        """
+        Close the warehouse connection.
+
+        Returns:
+        --------
+        None
+        """
+        try:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+                PipelineTrack("Warehouse connection closed.")
+        except sqlite3.Error as e:
+            error_msg = f"Error closing the warehouse connection: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg)
+
+    def _insert_rows(self, table: str, df: pd.DataFrame, schema: str = "main") -> None:
+        """Insert the rows of `df` into `schema.table` in batches of `batch_rows`."""
+        insert = self._insert_sql(table, df.columns, schema)
+        for batch_start in range(0, len(df), self.batch_rows):
+            batch = df.iloc[batch_start:batch_start + self.batch_rows]
+            self.connection.executemany(insert, zip(*(sql_values(batch[column]) for column in batch.columns)))
+
+    def _merge_rows(self, table: str, df: pd.DataFrame, key: Tuple[str, ...],
+                    rollup_source: Optional[str] = None, schema: str = "main") -> int:
+        """
+        Stage the rows of `df` in a temporary table and merge them into `schema.table` on `key`.
+
+        Returns the number of rows inserted or changed. Within one batch, the
+        last row of a key wins, as if the rows were merged one after another.
+        The index labels of the rows written are added to `merged_rows` (and to
+        `replaced_rows` if their key was stored before).
+        With a `rollup_source`, the stored rows of the keys that change are
+        subtracted from the rollups and the merged rows added.
+        """
+        missing = [column for column in key if column not in df.columns]
+        if missing:
+            raise sqlite3.Error(f"Merge key columns {missing} are not in the rows")
+        target = qualified(schema, table)
+        names = ", ".join(f'"{column}"' for column in key)
+        self.connection.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {qualified(schema, index_name(table, key, unique=True))} '
+                                f'ON "{table}" ({names})')
+
+        # Within the batch, the last row of a key wins. NULL keys never conflict, so those rows are all kept.
+        df = df[~(df.duplicated(list(key), keep="last") & df[list(key)].notna().all(axis=1))]
+        stage = f"stage_{table}"
+        self.connection.execute(f'DROP TABLE IF EXISTS temp."{stage}"')
+        self._create_table(stage, df, "temp")
+        self._insert_rows(stage, df, "temp")
+
+        columns = ", ".join(f'"{column}"' for column in df.columns)
+        values = [column for column in df.columns if column not in key]
+        if values:
+            updates = ", ".join(f'"{column}" = excluded."{column}"' for column in values)
+            changed = " OR ".join(f'"{column}" IS NOT excluded."{column}"' for column in values)
+            on_conflict = f"DO UPDATE SET {updates} WHERE {changed}"
+        else:
+            on_conflict = "DO NOTHING"
+        # Staged rows that are not stored as they are, and whether their key is stored (with other values).
+        # Keys compare with "=" as in the unique index: a row with a NULL key is always a new row.
+        same_key = " AND ".join(f't."{column}" = c."{column}"' for column in key)
+        same_row = " AND ".join([same_key] + [f't."{column}" IS c."{column}"' for column in df.columns
+                                              if column not in key])
+        staged_keys = ", ".join(f'c."{column}"' for column in key)
+        self.connection.execute('DROP TABLE IF EXISTS temp.merge_keys')
+        self.connection.execute(
+            f'CREATE TEMP TABLE merge_keys AS SELECT {staged_keys}, c.rowid AS staged_row, '
+            f'EXISTS (SELECT 1 FROM {target} t WHERE {same_key}) AS stored FROM temp."{stage}" c '
+            f'WHERE NOT EXISTS (SELECT 1 FROM {target} t WHERE {same_row})')
+        if rollup_source is not None:
+            self.connection.execute('DROP TABLE IF EXISTS temp.merge_removed')
+            self.connection.execute(f'CREATE TEMP TABLE merge_removed AS SELECT t.* FROM {target} t '
+                                    f'JOIN temp.merge_keys c ON {same_key}')
+
+        last_rowid = self.connection.execute(f"SELECT IFNULL(MAX(rowid), 0) FROM {target}").fetchone()[0]
+        before = self.connection.total_changes
+        # "WHERE true" keeps SQLite from reading ON CONFLICT as a join constraint
+        self.connection.execute(
+            f'INSERT INTO {target} ({columns}) SELECT {columns} FROM temp."{stage}" WHERE true '
+            f'ORDER BY rowid ON CONFLICT ({names}) {on_conflict}')
+        written = self.connection.total_changes - before
+        self.connection.execute(f'DROP TABLE temp."{stage}"')
+
+        if rollup_source is not None:
+            if written:
+                null_key = " OR ".join(f'"{column}" IS NULL' for column in key)
+                refresh_rollups(self.connection, rollup_source,
+                                f'SELECT t.* FROM {target} t JOIN temp.merge_keys c ON {same_key} '
+                                f'UNION ALL SELECT * FROM {target} WHERE rowid > {last_rowid} AND ({null_key})',
+                                'SELECT * FROM temp.merge_removed')
+            self.connection.execute('DROP TABLE temp.merge_removed')
+        # Staging rowids count the rows of `df` from 1
+        merged = np.array(self.connection.execute('SELECT staged_row - 1, stored FROM temp.merge_keys').fetchall(),
+                          dtype="int64").reshape(-1, 2)
+        labels = df.index.to_numpy()[merged[:, 0]]
+        self.merged_rows.extend(labels)
+        self.replaced_rows.extend(labels[merged[:, 1] == 1])
+        self.connection.execute('DROP TABLE temp.merge_keys')
+        return written
+
+    def _rollup_source(self, table: str, schema: str = "main") -> Optional[str]:
+        """Rollup source of the rows of `table` (see `warehouse_rollups`), None if it has no rollups."""
+        if table != TRAIN_STATUS_TABLE:
+            return None
+        return flat_rollup_source(self._columns(table, schema))
+
+    def _columns(self, table: str, schema: str = "main") -> List[str]:
+        return [row[1] for row in self.connection.execute(f'PRAGMA "{schema}".table_info("{table}")')]
+
+    def _create_table(self, table: str, df: pd.DataFrame, schema: str = "main") -> None:
+        """Create `schema.table` with a column per frame column, if it does not exist."""
+        columns = ", ".join(f'"{column}" {sql_type(dtype)}' for column, dtype in df.dtypes.items())
+        self.connection.execute(f'CREATE TABLE IF NOT EXISTS {qualified(schema, table)} ({columns})')
+
+    def _insert_sql(self, table: str, columns: Sequence[str], schema: str = "main") -> str:
+        names = ", ".join(f'"{column}"' for column in columns)
+        return f'INSERT INTO {qualified(schema, table)} ({names}) VALUES ({", ".join("?" for _ in columns)})'
+
+    def _drop_indexes(self, table: str, schema: str = "main") -> None:
+        for columns in self.indexes.get(table, []):
+            self.connection.execute(f'DROP INDEX IF EXISTS {qualified(schema, index_name(table, columns))}')
+
+    def _create_indexes(self, table: str, schema: str = "main") -> None:
+        existing = set(self._columns(table, schema))
+        for columns in self.indexes.get(table, []):
+            if set(columns) <= existing:
+                names = ", ".join(f'"{column}"' for column in columns)
+                self.connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS {qualified(schema, index_name(table, columns))} ON "{table}" ({names})')
+
+
+def benchmark(rows: int = 1_000_000, batch_rows: int = DEFAULT_BATCH_ROWS) -> Tuple[float, float]:
+    """
+    Compare `DataFrame.to_sql` with the warehouse loader on transformed synthetic rows.
+
+    Parameters:
+    -----------
+    rows (int): Rows in the synthetic frame (before the 'On Time' filter).
+    batch_rows (int): Rows per `executemany` call.
+
+    Returns:
+    --------
+    Tuple[float, float]: Seconds taken by `to_sql` and by the loader.
+    """
+    import tempfile
+    from utils.synthetic_data import make_otp_frame
+    from databaseOperations.transform_database import TransformData
+
+    df = TransformData().transform_rows(make_otp_frame(rows))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        baseline_path = os.path.join(tmp_dir, "to_sql.sqlite")
+        connection = sqlite3.connect(baseline_path)
+        start = time.perf_counter()
+        df.to_sql(TRAIN_STATUS_TABLE, connection, index=False)
+        for columns in DEFAULT_INDEXES[TRAIN_STATUS_TABLE]:
+            connection.execute(f"CREATE INDEX {index_name(TRAIN_STATUS_TABLE, columns)} "
+                               f"ON {TRAIN_STATUS_TABLE} ({', '.join(columns)})")
+        connection.commit()
+        to_sql_seconds = time.perf_counter() - start
+        connection.close()
+
+        loader = SQLiteWarehouseLoader(batch_rows=batch_rows)
+        loader.connect(os.path.join(tmp_dir, "warehouse.sqlite"))
+        start = time.perf_counter()
+        loader.load(df, TRAIN_STATUS_TABLE, replace=True)
+        loader_seconds = time.perf_counter() - start
+        loaded = loader.connection.execute(f"SELECT COUNT(*) FROM {TRAIN_STATUS_TABLE}").fetchone()[0]
+        loader.close_connection()
+
+    assert loaded == len(df)
+    print(f"to_sql:  {to_sql_seconds:.2f}s ({len(df) / to_sql_seconds:,.0f} rows/s)")
+    print(f"loader:  {loader_seconds:.2f}s ({len(df) / loader_seconds:,.0f} rows/s)")
+    print(f"speedup: {to_sql_seconds / loader_seconds:.1f}x")
+    return to_sql_seconds, loader_seconds
+
+
+if __name__ == "__main__":
+    # Benchmark: python src/databaseOperations/load_data_to_sqlite.py [rows]
+    benchmark(rows=int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
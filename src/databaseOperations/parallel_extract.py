@@ -0,0 +1,299 @@
+import sqlite3, sys, os
+import pandas as pd
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from utils.sql_tools import SelectQuery
+from databaseOperations.extract_database import IDatabaseExtractor, DEFAULT_CHUNK_ROWS, apply_schema, concat_frames
+from databaseOperations.sqlite_connection import SQLiteConnectionProfile, SQLiteConnectionPool
+
+# Profile used when none is given: a plain read-only connection.
+READ_ONLY_PROFILE = SQLiteConnectionProfile(read_only=True)
+
+# Per-process connection pools, so a worker reuses its connection across partitions.
+_worker_pools = {}
+
+
+def _read_partition(db_path: str, profile: SQLiteConnectionProfile, query: str,
+                    dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Read one partition in a worker process over its own read-only connection.
+
+    Parameters:
+    -----------
+    db_path (str): Path to the SQLite database file.
+    profile (SQLiteConnectionProfile): How the worker opens its connection.
+    query (str): The partition query.
+    dtypes (Dict[str, str]): Column types applied in the worker (see `apply_schema`).
+
+    Returns:
+    --------
+    pd.DataFrame: The partition rows.
+    """
+    key = (profile.uri(db_path), tuple(profile.pragmas()))
+    pool = _worker_pools.get(key)
+    if pool is None:
+        pool = _worker_pools[key] = SQLiteConnectionPool(profile, max_idle=1)
+    with pool.connection(db_path) as connection:
+        df = pd.read_sql_query(query, connection)
+    return apply_schema(df, dtypes) if dtypes else df
+
+
+class ParallelSQLiteExtractor(IDatabaseExtractor):
+    """
+    IDatabaseExtractor that splits a query into rowid ranges and reads them concurrently.
+
+    Each range is read by a worker process over its own read-only connection, so
+    the SQLite decoding and DataFrame construction run on several cores. Ranges
+    are on the table's rowid, which SQLite answers with a b-tree seek, so every
+    worker only touches its own slice of the table. Partitions come back in rowid
+    order, so the result matches `SQLiteExtractor` for the same query. Column
+    types are applied in the workers, so typed partitions are also cheaper to
+    send back to the parent process.
+    """
+
+    def __init__(self, workers: Optional[int] = None, partitions_per_worker: int = 4,
+                 profile: Optional[SQLiteConnectionProfile] = None,
+                 dtypes: Optional[Dict[str, str]] = None) -> None:
+        """
+        Parameters:
+        -----------
+        workers (Optional[int]): Worker processes (default: all cores).
+        partitions_per_worker (int): Rowid ranges per worker for `execute_query`.
+        profile (Optional[SQLiteConnectionProfile]): How every connection is opened.
+                                                     Defaults to a plain read-only connection.
+        dtypes (Optional[Dict[str, str]]): Column types applied to every partition
+                                           (see `apply_schema`).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.partitions_per_worker = partitions_per_worker
+        self.profile = profile or READ_ONLY_PROFILE
+        self.dtypes = dtypes or {}
+        self.db_path = None
+        self.connection = None
+        self.executor = None
+
+    def connect(self, db_path: str) -> None:
+        """
+        Open a read-only control connection and start the worker pool.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the SQLite database file.
+
+        Raises:
+        -------
+        TypeError: If the database path is not a string.
+        FileNotFoundError: If the database file does not exist.
+        sqlite3.Error: For any SQLite-specific connection errors.
+
+        Returns:
+        --------
+        None
+        """
+        if not isinstance(db_path, str):
+            error_msg = f"The database path must be a string. Provided type: {type(db_path)}"
+            ErrorTrack(error_msg)
+            raise TypeError(error_msg)
+
+        if not Path(db_path).exists():
+            error_msg = f"The database file does not exist: {db_path}"
+            ErrorTrack(error_msg)
+            raise FileNotFoundError(error_msg)
+        try:
+            self.db_path = db_path
+            self.connection = self.profile.open(db_path)
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            PipelineTrack(f"Connected to database: {db_path} with {self.workers} extraction workers")
+        except sqlite3.Error as e:
+            error_msg = f"Error connecting to database: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg)
+
+    def plan_partitions(self, query: str, rows_per_partition: Optional[int] = None) -> List[str]:
+        """
+        Split a query into rowid-range queries.
+
+        Parameters:
+        -----------
+        query (str): A simple single-table SELECT, e.g. "SELECT * FROM otp".
+        rows_per_partition (Optional[int]): Width of each rowid range. By default the
+                                            table is split into `workers * partitions_per_worker`
+                                            ranges.
+
+        Raises:
+        -------
+        ValueError: If the query cannot be partitioned.
+
+        Returns:
+        --------
+        List[str]: One query per rowid range, in rowid order.
+        """
+        select = SelectQuery.parse(query)
+        bounds_query = SelectQuery("MIN(rowid), MAX(rowid)", select.table, select.where).to_sql()
+        low, high = self.connection.execute(bounds_query).fetchone()
+        if low is None:
+            return [query]
+
+        if rows_per_partition is None:
+            partitions = self.workers * self.partitions_per_worker
+            rows_per_partition = max(1, -(-(high - low + 1) // partitions))
+
+        return [
+            select.with_predicate(f"rowid BETWEEN {start} AND {min(start + rows_per_partition - 1, high)}").to_sql()
+            for start in range(low, high + 1, rows_per_partition)
+        ]
+
+    def execute_query(self, query: str) -> pd.DataFrame:
+        """
+        Execute a query across the worker pool and return the concatenated result.
+
+        Parameters:
+        -----------
+        query (str): SQL query to execute.
+
+        Raises:
+        -------
+        ValueError: If the query cannot be partitioned.
+        sqlite3.Error: If an error occurs during query execution.
+        Exception: For any other unforeseen errors.
+
+        Returns:
+        --------
+        pd.DataFrame: Results of the query as a pandas DataFrame.
+        """
+        partitions = list(self._iter_partitions(self.plan_partitions(query)))
+        df = concat_frames(partitions)
+        PipelineTrack(f"Parallel query executed successfully. Rows fetched: {len(df)} from {len(partitions)} partitions")
+        return df
+
+    def iter_query(self, query: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Execute a query across the worker pool and yield the partitions in order.
+
+        Each partition covers `chunk_rows` rowids, so it never holds more than
+        `chunk_rows` rows. At most two partitions per worker are in flight at once.
+
+        Parameters:
+        -----------
+        query (str): SQL query to execute.
+        chunk_rows (int): Maximum number of rows per yielded DataFrame.
+
+        Returns:
+        --------
+        Iterator[pd.DataFrame]: The partitions, in rowid order.
+        """
+        if not isinstance(chunk_rows, int) or chunk_rows <= 0:
+            error_msg = f"chunk_rows must be a positive integer. Provided: {chunk_rows}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+
+        offset = 0
+        for partition in self._iter_partitions(self.plan_partitions(query, rows_per_partition=chunk_rows)):
+            partition.index = pd.RangeIndex(offset, offset + len(partition))
+            offset += len(partition)
+            yield partition
+        PipelineTrack(f"Parallel query streamed successfully. Rows fetched: {offset}")
+
+    def close_connection(self) -> None:
+        """
+        Close the control connection and shut down the worker pool.
+
+        Returns:
+        --------
+        None
+        """
+        try:
+            if self.executor:
+                self.executor.shutdown()
+                self.executor = None
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+                PipelineTrack("Database connection closed.")
+        except sqlite3.Error as e:
+            error_msg = f"Error closing the database connection: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg)
+
+    def _iter_partitions(self, queries: List[str]) -> Iterator[pd.DataFrame]:
+        """Run the partition queries on the pool, yielding results in submission order."""
+        if self.executor is None:
+            error_msg = "connect must be called before executing queries."
+            ErrorTrack(error_msg)
+            raise RuntimeError(error_msg)
+
+        PipelineTrack(f"Executing {len(queries)} partition queries on {self.workers} workers")
+        pending = deque()
+        queries = iter(queries)
+        try:
+            for partition_query in queries:
+                pending.append(self.executor.submit(_read_partition, self.db_path, self.profile, partition_query, self.dtypes))
+                if len(pending) >= 2 * self.workers:
+                    break
+            while pending:
+                df = pending.popleft().result()
+                next_query = next(queries, None)
+                if next_query is not None:
+                    pending.append(self.executor.submit(_read_partition, self.db_path, self.profile, next_query, self.dtypes))
+                yield df
+        except sqlite3.Error as e:
+            error_msg = f"Error executing query: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def benchmark(rows: int = 2_000_000, workers: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Compare single-connection and parallel extraction on a synthetic otp database.
+
+    Parameters:
+    -----------
+    rows (int): Rows in the synthetic table.
+    workers (Optional[int]): Worker processes for the parallel path (default: all cores).
+
+    Returns:
+    --------
+    Tuple[float, float]: Seconds taken by the single-connection and the parallel path.
+    """
+    import tempfile, time
+    from databaseOperations.extract_database import SQLiteExtractor
+    from utils.synthetic_data import make_otp_database
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = make_otp_database(os.path.join(tmp_dir, "otp.sqlite"), rows)
+
+        serial = SQLiteExtractor()
+        serial.connect(db_path)
+        start = time.perf_counter()
+        serial_rows = len(serial.execute_query("SELECT * FROM otp"))
+        serial_seconds = time.perf_counter() - start
+        serial.close_connection()
+
+        parallel = ParallelSQLiteExtractor(workers=workers)
+        parallel.connect(db_path)
+        start = time.perf_counter()
+        parallel_rows = len(parallel.execute_query("SELECT * FROM otp"))
+        parallel_seconds = time.perf_counter() - start
+        parallel.close_connection()
+
+    assert serial_rows == parallel_rows == rows
+    print(f"single connection: {serial_seconds:.2f}s ({rows / serial_seconds:,.0f} rows/s)")
+    print(f"{parallel.workers} workers:        {parallel_seconds:.2f}s ({rows / parallel_seconds:,.0f} rows/s)")
+    print(f"speedup: {serial_seconds / parallel_seconds:.1f}x")
+    return serial_seconds, parallel_seconds
+
+
+if __name__ == "__main__":
+    # Benchmark: python src/databaseOperations/parallel_extract.py [rows] [workers]
+    benchmark(rows=int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000,
+              workers=int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,130 @@
+import os, sys, zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import PipelineTrack
+from databaseOperations.unzip_database import UnzipFile, COPY_BUFFER_SIZE, extract_member
+
+
+def _extract_member_worker(zip_path: str, member_name: str, destination: str, buffer_size: int) -> float:
+    """
+    Extract one member over the worker's own handle on the archive.
+
+    Parameters:
+    -----------
+    zip_path (str): Path to the archive.
+    member_name (str): The member to extract.
+    destination (str): The extracted file path.
+    buffer_size (int): Bytes copied per read/write.
+
+    Returns:
+    --------
+    float: Seconds the extraction took.
+    """
+    # A ZipFile shares one file position between its readers, so workers never share one
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return extract_member(zip_ref, zip_ref.getinfo(member_name), destination, buffer_size)
+
+
+class ParallelUnzipFile(UnzipFile):
+    """
+    UnzipFile that extracts independent members concurrently.
+
+    Member selection, the path-traversal guard and the skip-if-unchanged manifest
+    are those of `UnzipFile`; only the extraction itself is spread over a pool.
+    Every worker opens its own `ZipFile`, inflates its member into a `.part` file
+    and lets `zipfile` verify the CRC-32 before the file is moved into place.
+    zlib releases the GIL while inflating, so threads already overlap the work;
+    processes also take the Python-level copy loop off the main interpreter.
+    The largest members are started first so one big shard does not finish last
+    on its own.
+    """
+
+    def __init__(self, workers: Optional[int] = None, use_processes: bool = False,
+                 buffer_size: int = COPY_BUFFER_SIZE) -> None:
+        """
+        Parameters:
+        -----------
+        workers (Optional[int]): Concurrent extractions (default: all cores).
+        use_processes (bool): Use worker processes instead of threads.
+        buffer_size (int): Bytes copied per read/write while extracting.
+        """
+        super().__init__(buffer_size=buffer_size)
+        self.workers = workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+
+    def _extract_members(self, zip_path: str, zip_ref: zipfile.ZipFile,
+                         pending: List[Tuple[zipfile.ZipInfo, str]]) -> Iterator[Tuple[zipfile.ZipInfo, str]]:
+        """Extract the pending members on the pool, yielding each as soon as it is in place."""
+        if len(pending) <= 1 or self.workers == 1:
+            yield from super()._extract_members(zip_path, zip_ref, pending)
+            return
+
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        PipelineTrack(f"Extracting {len(pending)} members on {self.workers} "
+                      f"{'processes' if self.use_processes else 'threads'}")
+        ordered = sorted(pending, key=lambda item: item[0].file_size, reverse=True)
+        with executor_class(max_workers=min(self.workers, len(pending))) as executor:
+            futures = {
+                executor.submit(_extract_member_worker, zip_path, info.filename, destination, self.buffer_size): (info, destination)
+                for info, destination in ordered
+            }
+            try:
+                for future in as_completed(futures):
+                    future.result()
+                    yield futures[future]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+
+def benchmark(members: int = 8, member_mb: int = 32, workers: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Compare sequential and parallel extraction of a synthetic multi-member archive.
+
+    Parameters:
+    -----------
+    members (int): Members in the archive.
+    member_mb (int): Size of every member in MiB.
+    workers (Optional[int]): Concurrent extractions (default: all cores).
+
+    Returns:
+    --------
+    Tuple[float, float]: Seconds taken by the sequential and the parallel extraction.
+    """
+    import tempfile, time
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zip_path = os.path.join(tmp_dir, "shards.zip")
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for number in range(members):
+                with zf.open(f"shard_{number}.sqlite", "w", force_zip64=True) as member:
+                    for _ in range(member_mb):
+                        member.write(os.urandom(256 * 1024) + bytes(768 * 1024))
+
+        timings = []
+        for unzipper in (UnzipFile(), ParallelUnzipFile(workers=workers)):
+            extract_to = os.path.join(tmp_dir, type(unzipper).__name__)
+            os.makedirs(extract_to)
+            start = time.perf_counter()
+            written = unzipper.unzip(zip_path, extract_to)
+            timings.append(time.perf_counter() - start)
+            assert len(written) == members
+
+    total_mb = members * member_mb
+    sequential_seconds, parallel_seconds = timings
+    print(f"sequential:  {sequential_seconds:.2f}s ({total_mb / sequential_seconds:.0f} MiB/s)")
+    print(f"{ParallelUnzipFile(workers=workers).workers} workers:   {parallel_seconds:.2f}s ({total_mb / parallel_seconds:.0f} MiB/s)")
+    print(f"speedup: {sequential_seconds / parallel_seconds:.1f}x")
+    return sequential_seconds, parallel_seconds
+
+
+if __name__ == "__main__":
+    # Benchmark: python src/databaseOperations/parallel_unzip.py [members] [member_mb] [workers]
+    benchmark(members=int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+              member_mb=int(sys.argv[2]) if len(sys.argv) > 2 else 32,
+              workers=int(sys.argv[3]) if len(sys.argv) > 3 else None)
@@ -0,0 +1,213 @@
+import sys, os
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from utils.sql_tools import SelectQuery
+from databaseOperations.sqlite_connection import SQLiteConnectionProfile
+from databaseOperations.transform_database import COLUMN_RENAMES, DAY_NAMES, TRANSFORM_SPEC
+
+# Transform steps the planner can express in SQL; "parse_datetimes" stays in pandas.
+PUSHDOWN_STEPS = ("filter_on_time", "delay_minutes", "day_of_week", "rename", "project")
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def delay_minutes_sql(column: str = "status") -> str:
+    """
+    SQL equivalent of `parse_delay_minutes`: the first run of digits in `column`, as a number.
+
+    The common '12 min' form starts with the digits and is a plain CAST. Otherwise
+    the CAST starts at the first digit, found as the smallest `instr` position of
+    '0'..'9'. Values without digits give NULL.
+
+    Parameters:
+    -----------
+    column (str): The status column.
+
+    Returns:
+    --------
+    str: The SQL expression.
+    """
+    positions = ", ".join(f"CASE instr({column}, '{digit}') WHEN 0 THEN 2147483647 ELSE instr({column}, '{digit}') END"
+                          for digit in range(10))
+    return (f"CASE WHEN {column} GLOB '[0-9]*' THEN CAST({column} AS INTEGER) "
+            f"WHEN {column} GLOB '*[0-9]*' THEN CAST(substr({column}, min({positions})) AS INTEGER) END")
+
+
+def day_of_week_sql(column: str = "date") -> str:
+    """
+    SQL equivalent of `day_of_week`: the weekday name of a 'YYYY-MM-DD' date.
+
+    Parameters:
+    -----------
+    column (str): The date column.
+
+    Returns:
+    --------
+    str: The SQL expression (NULL for values SQLite cannot read as a date).
+    """
+    # strftime('%w') counts from Sunday = 0; DAY_NAMES starts on Monday
+    cases = " ".join(f"WHEN '{(number + 1) % 7}' THEN '{name}'" for number, name in enumerate(DAY_NAMES))
+    return f"CASE strftime('%w', {column}) {cases} END"
+
+
+def table_columns(db_path: str, table: str) -> List[str]:
+    """
+    Column names of `table`, in table order.
+
+    Parameters:
+    -----------
+    db_path (str): Path to the SQLite database file.
+    table (str): The table name.
+
+    Returns:
+    --------
+    List[str]: The column names.
+    """
+    connection = SQLiteConnectionProfile(read_only=True).open(db_path)
+    try:
+        return [row[1] for row in connection.execute(f"PRAGMA table_info({table})")]
+    finally:
+        connection.close()
+
+
+class PushdownPlan:
+    """
+    The extraction query with some transform steps folded into it.
+
+    `query` replaces the configured query, `pushed_steps` are passed to
+    `TransformData(skip_steps=...)`, and `dtypes` replaces the extractor's column
+    types (renamed along with the columns, plus the computed columns).
+    """
+
+    def __init__(self, query: str, pushed_steps: List[str], dtypes: Dict[str, str]) -> None:
+        self.query = query
+        self.pushed_steps = pushed_steps
+        self.dtypes = dtypes
+
+    def __repr__(self) -> str:
+        return f"PushdownPlan(pushed_steps={self.pushed_steps}, query={self.query!r})"
+
+
+class PushdownPlanner:
+    """
+    Rewrites the extraction query so SQLite does the transform steps it can.
+
+    Filtering out 'On Time' rows (most of the table) in the WHERE clause means
+    those rows are never decoded, sent to pandas or typed. Renames, the computed
+    `delay_minutes`/`day_of_week` columns and the column projection are done in
+    the SELECT list, so no pandas pass is needed for them either. Every SQL
+    expression matches its pandas counterpart in `TransformData.transform_rows`,
+    which then only runs the steps that were not pushed down.
+
+    Whatever steps are pushed, only the source columns the output columns and
+    the remaining pandas steps need are selected.
+
+    Only simple `SELECT <columns> FROM <table> [WHERE ...]` queries over plain
+    column names are rewritten; anything else is run as is, with every step left
+    to pandas.
+    """
+
+    def __init__(self, steps: Iterable[str] = PUSHDOWN_STEPS) -> None:
+        """
+        Parameters:
+        -----------
+        steps (Iterable[str]): The steps that may be pushed down.
+
+        Raises:
+        -------
+        ValueError: If a step cannot be pushed down.
+        """
+        self.steps = list(steps)
+        unsupported = set(self.steps) - set(PUSHDOWN_STEPS)
+        if unsupported:
+            error_msg = f"These steps cannot be pushed down to SQL: {sorted(unsupported)}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+
+    def plan(self, query: str, db_path: str, dtypes: Optional[Dict[str, str]] = None,
+             output_columns: Optional[Iterable[str]] = None, keep_columns: Iterable[str] = ()) -> PushdownPlan:
+        """
+        Fold the supported transform steps into `query`.
+
+        Parameters:
+        -----------
+        query (str): The configured extraction query, e.g. "SELECT * FROM otp".
+        db_path (str): The source database, used to expand `SELECT *`.
+        dtypes (Optional[Dict[str, str]]): The extractor's column types (see `apply_schema`).
+        output_columns (Optional[Iterable[str]]): Final columns to keep (None = all, no column is pruned).
+        keep_columns (Iterable[str]): Columns to select even if no step needs them, e.g. the watermark.
+
+        Returns:
+        --------
+        PushdownPlan: The rewritten query, the pushed steps and the matching column types.
+        """
+        dtypes = dict(dtypes or {})
+        try:
+            select = SelectQuery.parse(query)
+        except ValueError:
+            PipelineTrack("Query cannot be rewritten, running every transform step in pandas.")
+            return PushdownPlan(query, [], dtypes)
+
+        if select.columns.strip() == "*":
+            columns = table_columns(db_path, select.table)
+        else:
+            columns = [column.strip() for column in select.columns.split(",")]
+        if select.order_by or not columns or not all(IDENTIFIER.match(column) for column in columns):
+            PipelineTrack("Query selects expressions or is ordered, running every transform step in pandas.")
+            return PushdownPlan(query, [], dtypes)
+
+        # Steps whose results reach the output; the others are not computed at all
+        live_steps = set(TRANSFORM_SPEC.plan(output_columns).step_names)
+        pushed = []
+        where = list(select.where)
+        if "filter_on_time" in self.steps and "status" in columns:
+            # NULL != 'On Time' is NULL in SQL, but pandas keeps missing statuses
+            where.append("status IS NULL OR status != 'On Time'")
+            pushed.append("filter_on_time")
+
+        renames = COLUMN_RENAMES if "rename" in self.steps else {}
+        if renames:
+            pushed.append("rename")
+        # (final column name, SELECT expression)
+        outputs = [(renames.get(column, column),
+                    f"{column} AS {renames[column]}" if column in renames else column) for column in columns]
+
+        if "delay_minutes" in self.steps and "delay_minutes" in live_steps and "status" in columns:
+            outputs.append(("delay_minutes", f"{delay_minutes_sql('status')} AS delay_minutes"))
+            pushed.append("delay_minutes")
+            dtypes["delay_minutes"] = "float64"
+        if "day_of_week" in self.steps and "day_of_week" in live_steps and "date" in columns:
+            outputs.append(("day_of_week", f"{day_of_week_sql('date')} AS day_of_week"))
+            pushed.append("day_of_week")
+            dtypes["day_of_week"] = "category"
+
+        if output_columns is not None:
+            # Select only what the output and the pandas steps that were not pushed down read.
+            # Pushing "project" also skips the pandas projection when it has nothing left to drop.
+            needed = TRANSFORM_SPEC.plan(output_columns, skip_steps=pushed).input_columns | set(keep_columns)
+            outputs = [(name, expression) for name, expression in outputs if name in needed]
+            if "project" in self.steps and needed <= set(output_columns):
+                pushed.append("project")
+        if not pushed and len(outputs) == len(columns):
+            PipelineTrack("No transform step pushed down and every column is needed, running the query as is.")
+            return PushdownPlan(query, [], dtypes)
+
+        dtypes = {renames.get(column, column): dtype for column, dtype in dtypes.items()}
+        rewritten = SelectQuery(", ".join(expression for _, expression in outputs), select.table, where).to_sql()
+        plan = PushdownPlan(rewritten, pushed, dtypes)
+        PipelineTrack(f"Pushed transform steps {pushed} and the needed columns into the extraction query: {rewritten}")
+        return plan
+
+
+if __name__ == "__main__":
+    import tempfile
+    from utils.synthetic_data import make_otp_database
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = make_otp_database(os.path.join(tmp_dir, "otp.sqlite"), 1000)
+        print(PushdownPlanner().plan("SELECT * FROM otp", db_path).query)
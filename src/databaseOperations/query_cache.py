@@ -0,0 +1,429 @@
+import hashlib, json, sys, os
+import re
+import time
+import pandas as pd
+from typing import Any, Dict, Iterator, Optional
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from databaseOperations.extract_database import IDatabaseExtractor, DEFAULT_CHUNK_ROWS
+from databaseOperations.sqlite_connection import database_fingerprint
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; results are pickled without it
+    pa = pq = None
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalize insignificant differences in an SQL string (whitespace, trailing ';').
+
+    Parameters:
+    -----------
+    query (str): The SQL query.
+
+    Returns:
+    --------
+    str: The normalized query.
+    """
+    return re.sub(r"\s+", " ", query).strip().rstrip(";").strip()
+
+
+class QueryResultCache:
+    """
+    On-disk cache of query results, evicted least-recently-used first by total size.
+
+    Each entry is a single file named after its key. Results are stored as
+    Parquet when pyarrow is installed (columnar, keeps categorical, nullable
+    integer and datetime columns) and pickled otherwise. The file's mtime marks
+    its last use, so eviction needs no separate index.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3) -> None:
+        """
+        Parameters:
+        -----------
+        cache_dir (str): Directory holding the cached results; created if missing.
+        max_bytes (int): Total size the cache is evicted down to after every write.
+        """
+        if not isinstance(cache_dir, str):
+            error_msg = f"The cache directory must be a string. Provided type: {type(cache_dir)}"
+            ErrorTrack(error_msg)
+            raise TypeError(error_msg)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = "parquet" if pq is not None else "pkl"
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, db_path: str, query: str, dtypes: Optional[Dict[str, str]] = None) -> str:
+        """
+        Cache key for a query against the current contents of a database file.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the SQLite database file.
+        query (str): The SQL query.
+        dtypes (Optional[Dict[str, str]]): Column types applied to the result.
+
+        Returns:
+        --------
+        str: Hex digest identifying the result.
+        """
+        _, size, mtime_ns, change_counter = database_fingerprint(db_path)
+        material = json.dumps([normalize_sql(query), size, mtime_ns, change_counter, dtypes or {}], sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """Whether a result is stored under `key`."""
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Load a cached result and mark it as recently used.
+
+        Parameters:
+        -----------
+        key (str): The cache key.
+
+        Returns:
+        --------
+        Optional[pd.DataFrame]: The result, or None on a miss.
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.record_miss()
+            return None
+
+        start = time.perf_counter()
+        df = pd.read_parquet(path) if self.extension == "parquet" else pd.read_pickle(path)
+        os.utime(path)
+        self.hits += 1
+        PipelineTrack(f"Query cache hit: {len(df)} rows in {(time.perf_counter() - start) * 1000:.1f} ms ({self._stats_text()})")
+        return df
+
+    def iter_get(self, key: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """
+        Stream a cached result in chunks of at most `chunk_rows` rows.
+
+        Parameters:
+        -----------
+        key (str): The cache key; the entry must exist.
+        chunk_rows (int): Maximum number of rows per yielded DataFrame.
+
+        Returns:
+        --------
+        Iterator[pd.DataFrame]: The cached result, chunk by chunk.
+        """
+        path = self._path(key)
+        os.utime(path)
+        self.hits += 1
+        PipelineTrack(f"Query cache hit, streaming from {path} ({self._stats_text()})")
+        offset = 0
+        if self.extension == "parquet":
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+                chunk = batch.to_pandas()
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                yield chunk
+        else:
+            df = pd.read_pickle(path)
+            for start in range(0, len(df), chunk_rows):
+                yield df.iloc[start:start + chunk_rows]
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """
+        Store a result, then evict old entries past the size limit.
+
+        Parameters:
+        -----------
+        key (str): The cache key.
+        df (pd.DataFrame): The query result.
+
+        Returns:
+        --------
+        None
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        if self.extension == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.reset_index(drop=True).to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        PipelineTrack(f"Cached query result: {len(df)} rows, {os.path.getsize(path) / 1024 ** 2:.1f} MB")
+        self.evict()
+
+    def put_chunks(self, key: str, chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Store a streamed result while passing its chunks on.
+
+        The entry only becomes visible once every chunk has been written, so an
+        interrupted stream leaves no partial result behind.
+
+        Parameters:
+        -----------
+        key (str): The cache key.
+        chunks (Iterator[pd.DataFrame]): The query result, chunk by chunk.
+
+        Returns:
+        --------
+        Iterator[pd.DataFrame]: The same chunks, in order.
+        """
+        if self.extension != "parquet":
+            # Pickle cannot be appended to, so the chunks are buffered until the end
+            frames = []
+            for chunk in chunks:
+                frames.append(chunk)
+                yield chunk
+            if frames:
+                self.put(key, pd.concat(frames))
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    # Categorical codes get a fixed width, so chunks with more
+                    # categories than the first one still fit the file schema
+                    schema = pa.schema(
+                        [pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+                         if pa.types.is_dictionary(field.type) else field for field in table.schema],
+                        metadata=table.schema.metadata,
+                    )
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                writer.write_table(table.cast(writer.schema))
+                yield chunk
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if writer is not None:
+            writer.close()
+            os.replace(tmp_path, path)
+            PipelineTrack(f"Cached streamed query result: {os.path.getsize(path) / 1024 ** 2:.1f} MB")
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove least-recently-used entries until the cache fits in `max_bytes`.
+
+        Returns:
+        --------
+        None
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(f".{self.extension}"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            self.evictions += 1
+            PipelineTrack(f"Evicted cached query result {name} ({size / 1024 ** 2:.1f} MB)")
+
+    def record_miss(self) -> None:
+        """Count and log a lookup that found no cached result."""
+        self.misses += 1
+        PipelineTrack(f"Query cache miss ({self._stats_text()})")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters of this cache instance and the current size on disk.
+
+        Returns:
+        --------
+        Dict[str, Any]: hits, misses, evictions, hit_rate and size_bytes.
+        """
+        lookups = self.hits + self.misses
+        size = sum(os.path.getsize(os.path.join(self.cache_dir, name))
+                   for name in os.listdir(self.cache_dir) if name.endswith(f".{self.extension}"))
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size_bytes": size,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{self.extension}")
+
+    def _stats_text(self) -> str:
+        return f"hits={self.hits}, misses={self.misses}, evictions={self.evictions}"
+
+
+class CachingExtractor(IDatabaseExtractor):
+    """
+    IDatabaseExtractor that answers repeated queries from a QueryResultCache.
+
+    The wrapped extractor only connects on a cache miss, so a run against an
+    unchanged database never opens the database or starts extraction workers.
+    Wrap it in IncrementalExtractor (not the other way round), so the cached
+    query includes the high-water mark.
+    """
+
+    def __init__(self, extractor: IDatabaseExtractor, cache: QueryResultCache) -> None:
+        self.extractor = extractor
+        self.cache = cache
+        self.db_path = None
+        self.connected = False
+
+    def connect(self, db_path: str) -> None:
+        """
+        Remember the database; the wrapped extractor connects on the first miss.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the SQLite database file.
+
+        Raises:
+        -------
+        TypeError: If the database path is not a string.
+        FileNotFoundError: If the database file does not exist.
+
+        Returns:
+        --------
+        None
+        """
+        if not isinstance(db_path, str):
+            error_msg = f"The database path must be a string. Provided type: {type(db_path)}"
+            ErrorTrack(error_msg)
+            raise TypeError(error_msg)
+
+        if not os.path.exists(db_path):
+            error_msg = f"The database file does not exist: {db_path}"
+            ErrorTrack(error_msg)
+            raise FileNotFoundError(error_msg)
+        self.db_path = db_path
+
+    def is_cached(self, query: str) -> bool:
+        """
+        Whether the result of `query` against the current database is cached.
+
+        Parameters:
+        -----------
+        query (str): SQL query.
+
+        Returns:
+        --------
+        bool: True if the next `execute_query`/`iter_query` call is a hit.
+        """
+        return self.cache.contains(self.key(query))
+
+    def key(self, query: str) -> str:
+        """
+        Cache key of the result of `query` against the current database.
+
+        Parameters:
+        -----------
+        query (str): SQL query.
+
+        Raises:
+        -------
+        RuntimeError: If `connect` was not called.
+
+        Returns:
+        --------
+        str: The key (see `QueryResultCache.key`).
+        """
+        if self.db_path is None:
+            error_msg = "connect must be called before executing queries."
+            ErrorTrack(error_msg)
+            raise RuntimeError(error_msg)
+        return self.cache.key(self.db_path, query, getattr(self.extractor, "dtypes", None))
+
+    def execute_query(self, query: str) -> pd.DataFrame:
+        """
+        Return the cached result of `query`, running it on a miss.
+
+        Parameters:
+        -----------
+        query (str): SQL query to execute.
+
+        Returns:
+        --------
+        pd.DataFrame: Results of the query as a pandas DataFrame.
+        """
+        key = self.key(query)
+        df = self.cache.get(key)
+        if df is None:
+            self._connect_wrapped()
+            df = self.extractor.execute_query(query)
+            self.cache.put(key, df)
+        return df
+
+    def iter_query(self, query: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Stream the cached result of `query`, running and caching it on a miss.
+
+        Parameters:
+        -----------
+        query (str): SQL query to execute.
+        chunk_rows (int): Maximum number of rows per yielded DataFrame.
+
+        Returns:
+        --------
+        Iterator[pd.DataFrame]: Chunks of the query result, in order.
+        """
+        key = self.key(query)
+        if self.cache.contains(key):
+            yield from self.cache.iter_get(key, chunk_rows)
+            return
+
+        self.cache.record_miss()
+        self._connect_wrapped()
+        yield from self.cache.put_chunks(key, self.extractor.iter_query(query, chunk_rows=chunk_rows))
+
+    def close_connection(self) -> None:
+        """
+        Close the wrapped extractor's connection, if it was opened.
+
+        Returns:
+        --------
+        None
+        """
+        if self.connected:
+            self.extractor.close_connection()
+            self.connected = False
+
+    def _connect_wrapped(self) -> None:
+        if not self.connected:
+            self.extractor.connect(self.db_path)
+            self.connected = True
+
+
+if __name__ == "__main__":
+    from databaseOperations.extract_database import SQLiteExtractor
+
+    database_path = "/workspaces/Data-Wharehouse-ETL/database/sql/database.sqlite"
+    cache_dir = "/workspaces/Data-Wharehouse-ETL/database/query_cache"
+
+    extractor = CachingExtractor(SQLiteExtractor(), QueryResultCache(cache_dir))
+    try:
+        extractor.connect(database_path)
+        for _ in range(2):
+            start = time.perf_counter()
+            rows = len(extractor.execute_query("SELECT * FROM otp"))
+            print(f"{rows} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(extractor.cache.stats())
+        extractor.close_connection()
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,321 @@
+import sys, os
+import base64
+import hashlib
+import urllib.error
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from databaseOperations.ingest_from_drive import (ILoadFromDrive, LoadFromDrive, DownloadManifest, DOWNLOAD_BLOCK_SIZE,
+                                                  resolve_download_url, archive_matches, remote_unchanged)
+
+# Default width of one byte range.
+DEFAULT_SEGMENT_SIZE = 16 * 1024 * 1024
+
+
+def plan_segments(size: int, segment_size: int) -> List[Tuple[int, int]]:
+    """
+    Split `size` bytes into inclusive (start, end) byte ranges.
+
+    Parameters:
+    -----------
+    size (int): Total size of the file.
+    segment_size (int): Width of each range; the last one may be shorter.
+
+    Returns:
+    --------
+    List[Tuple[int, int]]: The ranges, in file order.
+    """
+    return [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+
+
+def advertised_digests(headers) -> Dict[str, str]:
+    """
+    Checksums the server publishes for the whole file, as hex digests.
+
+    Understands `Repr-Digest`/`Digest` (sha-256, md5) and Google's
+    `x-goog-hash` (md5).
+
+    Parameters:
+    -----------
+    headers: Response headers.
+
+    Returns:
+    --------
+    Dict[str, str]: Algorithm name ("sha256", "md5") to hex digest.
+    """
+    digests = {}
+    for header in ("Repr-Digest", "Digest", "x-goog-hash"):
+        for item in (headers.get(header) or "").split(","):
+            algorithm, _, value = item.strip().partition("=")
+            algorithm = algorithm.lower().replace("-", "")
+            if algorithm not in ("sha256", "md5") or not value:
+                continue
+            try:
+                digests.setdefault(algorithm, base64.b64decode(value.strip(":")).hex())
+            except ValueError:
+                continue
+    return digests
+
+
+class SegmentedLoadFromDrive(ILoadFromDrive):
+    """
+    ILoadFromDrive that fetches byte ranges of the file concurrently.
+
+    A single HTTP stream is bound by the per-connection throughput of the server
+    (Google Drive throttles each connection well below the link speed), so the
+    file is split into segments that a thread pool downloads over separate
+    connections. Every worker writes its segment at its offset in a file
+    preallocated to the final size, and a segment that breaks off is resumed from
+    where it stopped. Every segment request carries the validator seen when the
+    download started (`If-Range`), so a file that changes mid-download is
+    detected instead of being stitched together from two versions.
+
+    The finished file is checked against its expected size and against the
+    checksum the server advertises, if any; its SHA-256 is stored in the same
+    manifest as `LoadFromDrive` writes, so both backends skip an unchanged file.
+    Servers that do not support ranges, or do not report the size, are
+    downloaded over a single stream by `LoadFromDrive`.
+    """
+
+    def __init__(self, workers: int = 8, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 timeout: float = 60.0, retries: int = 3) -> None:
+        """
+        Parameters:
+        -----------
+        workers (int): Concurrent connections.
+        segment_size (int): Bytes per range request.
+        timeout (float): Socket timeout in seconds for each request.
+        retries (int): Attempts per segment before the download fails.
+        """
+        if workers < 1 or segment_size < 1:
+            error_msg = f"workers and segment_size must be positive. Provided: {workers}, {segment_size}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+        self.workers = workers
+        self.segment_size = segment_size
+        self.timeout = timeout
+        self.retries = retries
+
+    def load(self, url: str, save_archive: str, name: str, force: bool = False) -> bool:
+        """
+        Downloads a file in parallel segments and saves it to the specified directory.
+
+        Parameters:
+        -----------
+        url (str): The Google Drive link or HTTP(S) URL of the file to be downloaded.
+        save_archive (str): The path to the directory where the file should be saved.
+        name (str): The name to use for the saved file (without extension).
+        force (bool): Download even if the manifest says the file is unchanged.
+
+        Raises:
+        -------
+        TypeError: If any parameter is not a string.
+        FileNotFoundError: If the save directory does not exist.
+        ValueError: If the URL is not supported.
+        Exception: For any other unforeseen errors during the download process.
+
+        Returns:
+        --------
+        bool: True if a new file was downloaded, False if the existing one is current.
+        """
+        if not isinstance(url, str):
+            error_msg = f"The URL must be a string. Provided type: {type(url)}"
+            ErrorTrack(error_msg)
+            raise TypeError(error_msg)
+
+        if not isinstance(name, str):
+            error_msg = f"The file name must be a string. Provided type: {type(name)}"
+            ErrorTrack(error_msg)
+            raise TypeError(error_msg)
+
+        if not os.path.exists(save_archive):
+            error_msg = f"The specified save directory does not exist: {save_archive}"
+            ErrorTrack(error_msg)
+            raise FileNotFoundError(error_msg)
+
+        download_link = resolve_download_url(url)
+        save_path = f"{save_archive}/{name}.zip"
+        part_path = f"{save_path}.part"
+        manifest_store = DownloadManifest(f"{save_archive}/{name}.manifest.json")
+
+        try:
+            manifest = manifest_store.load()
+            if not force and archive_matches(save_path, manifest) and remote_unchanged(download_link, manifest, self.timeout):
+                PipelineTrack(f"Remote file unchanged, keeping {save_path}")
+                return False
+
+            probe = self._probe(download_link)
+            if probe is None:
+                PipelineTrack("Server does not support byte ranges, falling back to a single stream.")
+                return LoadFromDrive(timeout=self.timeout).load(url, save_archive, name, force=True)
+
+            size = probe["size"]
+            segments = plan_segments(size, self.segment_size)
+            PipelineTrack(f"Starting segmented download. File: {name}, Source: {download_link}, "
+                          f"Size: {size} bytes in {len(segments)} segments over {self.workers} connections")
+
+            self._preallocate(part_path, size)
+            if_range = probe["etag"] or probe["last_modified"]
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # list() re-raises the first failed segment
+                list(executor.map(lambda segment: self._fetch_segment(download_link, part_path, segment, if_range),
+                                  segments))
+
+            sha256 = self._verify(part_path, size, probe["digests"])
+            os.replace(part_path, save_path)
+            manifest_store.save({
+                "url": url,
+                "download_url": download_link,
+                "size": size,
+                "sha256": sha256,
+                "etag": probe["etag"],
+                "last_modified": probe["last_modified"],
+                "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+            })
+            PipelineTrack(f"File downloaded successfully: {save_path} ({size} bytes, sha256={sha256})")
+            return True
+
+        except Exception as e:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            error_msg = f"An error occurred while downloading the file: {str(e)}"
+            ErrorTrack(error_msg)
+            raise Exception(error_msg) from e
+
+    def _probe(self, download_link: str) -> Optional[Dict[str, Any]]:
+        """Ask for the first byte; returns size, validators and digests, or None without range support."""
+        request = urllib.request.Request(download_link, headers={"Range": "bytes=0-0"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if "text/html" in (response.headers.get("Content-Type") or ""):
+                error_msg = f"The server returned an HTML page instead of the file (check sharing settings or quota): {download_link}"
+                ErrorTrack(error_msg)
+                raise ValueError(error_msg)
+
+            content_range = response.headers.get("Content-Range") or ""
+            if response.status != 206 or "/" not in content_range or content_range.endswith("/*"):
+                return None
+            return {
+                "size": int(content_range.rsplit("/", 1)[1]),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "digests": advertised_digests(response.headers),
+            }
+
+    @staticmethod
+    def _preallocate(part_path: str, size: int) -> None:
+        """Create `part_path` at its final size, so every worker can write at its own offset."""
+        with open(part_path, 'wb') as f:
+            if hasattr(os, "posix_fallocate") and size:
+                os.posix_fallocate(f.fileno(), 0, size)
+            else:
+                f.truncate(size)
+
+    def _fetch_segment(self, download_link: str, part_path: str, segment: Tuple[int, int],
+                       if_range: Optional[str]) -> None:
+        """Download one byte range into its place in `part_path`, resuming it on a broken connection."""
+        position, end = segment
+        attempt = 0
+        with open(part_path, 'r+b') as f:
+            while position <= end:
+                headers = {"Range": f"bytes={position}-{end}"}
+                if if_range:
+                    headers["If-Range"] = if_range
+                try:
+                    request = urllib.request.Request(download_link, headers=headers)
+                    with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                        if response.status != 206:
+                            raise ValueError(f"The remote file changed during the download (HTTP {response.status}).")
+                        f.seek(position)
+                        for block in iter(lambda: response.read(min(DOWNLOAD_BLOCK_SIZE, end - position + 1)), b""):
+                            f.write(block)
+                            position += len(block)
+                    if position <= end:
+                        raise IOError(f"Connection closed at byte {position} of segment {segment}")
+                except (urllib.error.URLError, IOError) as e:
+                    attempt += 1
+                    if attempt >= self.retries:
+                        raise
+                    PipelineTrack(f"Retrying segment {segment} from byte {position} ({attempt}/{self.retries}): {e}")
+
+    @staticmethod
+    def _verify(part_path: str, size: int, digests: Dict[str, str]) -> str:
+        """Check the assembled file's size and advertised checksums; returns its SHA-256."""
+        actual_size = os.path.getsize(part_path)
+        if actual_size != size:
+            error_msg = f"Incomplete download: got {actual_size} of {size} bytes."
+            ErrorTrack(error_msg)
+            raise IOError(error_msg)
+
+        sha256, md5 = hashlib.sha256(), hashlib.md5()
+        with open(part_path, 'rb') as f:
+            for block in iter(lambda: f.read(DOWNLOAD_BLOCK_SIZE), b""):
+                sha256.update(block)
+                if "md5" in digests:
+                    md5.update(block)
+
+        actual = {"sha256": sha256.hexdigest(), "md5": md5.hexdigest()}
+        for algorithm, expected in digests.items():
+            if actual[algorithm] != expected:
+                error_msg = f"Checksum mismatch: {algorithm} is {actual[algorithm]}, the server advertised {expected}."
+                ErrorTrack(error_msg)
+                raise IOError(error_msg)
+        return actual["sha256"]
+
+
+def benchmark(size_mb: int = 64, workers: int = 8, segment_mb: int = 4,
+              latency: float = 0.05, bandwidth_mb: float = 16.0) -> Tuple[float, float]:
+    """
+    Compare the single-stream and the segmented downloader against a throttled local server.
+
+    Parameters:
+    -----------
+    size_mb (int): Size of the served file in MiB.
+    workers (int): Connections used by the segmented downloader.
+    segment_mb (int): Segment size in MiB.
+    latency (float): Seconds the server waits before answering each request.
+    bandwidth_mb (float): MiB per second the server sends on each connection.
+
+    Returns:
+    --------
+    Tuple[float, float]: Seconds taken by the single-stream and the segmented download.
+    """
+    import tempfile, time
+    from utils.local_http_server import serve_directory
+
+    with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as save_archive:
+        with open(os.path.join(source_dir, "database.zip"), "wb") as f:
+            f.write(os.urandom(size_mb * 1024 * 1024))
+        server, base_url = serve_directory(source_dir, latency=latency, bandwidth=int(bandwidth_mb * 1024 * 1024))
+        url = f"{base_url}/database.zip"
+        try:
+            start = time.perf_counter()
+            LoadFromDrive().load(url, save_archive, "single", force=True)
+            single_seconds = time.perf_counter() - start
+
+            segmented = SegmentedLoadFromDrive(workers=workers, segment_size=segment_mb * 1024 * 1024)
+            start = time.perf_counter()
+            segmented.load(url, save_archive, "segmented", force=True)
+            segmented_seconds = time.perf_counter() - start
+
+            manifests = [DownloadManifest(f"{save_archive}/{name}.manifest.json").load() for name in ("single", "segmented")]
+        finally:
+            server.shutdown()
+
+    assert manifests[0]["sha256"] == manifests[1]["sha256"]
+    print(f"single stream:  {single_seconds:.2f}s ({size_mb / single_seconds:.1f} MiB/s)")
+    print(f"{workers} segments:     {segmented_seconds:.2f}s ({size_mb / segmented_seconds:.1f} MiB/s)")
+    print(f"speedup: {single_seconds / segmented_seconds:.1f}x")
+    return single_seconds, segmented_seconds
+
+
+if __name__ == "__main__":
+    # Benchmark: python src/databaseOperations/segmented_download.py [size_mb] [workers] [segment_mb]
+    benchmark(size_mb=int(sys.argv[1]) if len(sys.argv) > 1 else 64,
+              workers=int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+              segment_mb=int(sys.argv[3]) if len(sys.argv) > 3 else 4)
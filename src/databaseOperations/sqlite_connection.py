@@ -0,0 +1,305 @@
+import sqlite3, sys, os
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+
+
+def database_fingerprint(db_path: str) -> Tuple[int, int, int, int]:
+    """
+    Cheap identity of a SQLite database file's contents.
+
+    Combines the inode, size and modification time with the file change counter
+    stored in the database header (bytes 24-27), which SQLite bumps on every
+    committed write. Reading it costs one 100-byte read.
+
+    Parameters:
+    -----------
+    db_path (str): Path to the SQLite database file.
+
+    Returns:
+    --------
+    Tuple[int, int, int, int]: (inode, size, mtime_ns, change_counter).
+    """
+    stat = os.stat(db_path)
+    with open(db_path, 'rb') as f:
+        header = f.read(100)
+    change_counter = int.from_bytes(header[24:28], 'big') if len(header) >= 28 else 0
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns, change_counter
+
+
+class SQLiteConnectionProfile:
+    """
+    How connections to a SQLite database are opened and tuned.
+
+    The default profile opens a plain read-write connection, like
+    `sqlite3.connect(db_path)`. The read-optimized profile is meant for the
+    extracted source database, which the pipeline never writes to.
+    """
+
+    def __init__(self, read_only: bool = False, immutable: bool = False, mmap_size: int = 0,
+                 cache_size_kib: Optional[int] = None, query_only: bool = False,
+                 temp_store_memory: bool = False, create: bool = False,
+                 journal_mode: Optional[str] = None, synchronous: Optional[str] = None) -> None:
+        """
+        Parameters:
+        -----------
+        read_only (bool): Open the file with `mode=ro`.
+        immutable (bool): Open with `immutable=1`: SQLite skips all locking and
+                          change detection. Only safe while nothing writes the file.
+        mmap_size (int): Bytes of the file to memory-map (`PRAGMA mmap_size`, 0 = off).
+        cache_size_kib (Optional[int]): Page cache size in KiB (`PRAGMA cache_size`).
+        query_only (bool): Reject any write statement (`PRAGMA query_only`).
+        temp_store_memory (bool): Keep temporary tables and indices in memory.
+        create (bool): Create the database file if it does not exist (`mode=rwc`).
+        journal_mode (Optional[str]): `PRAGMA journal_mode`, e.g. "WAL".
+        synchronous (Optional[str]): `PRAGMA synchronous`, e.g. "NORMAL".
+        """
+        self.read_only = read_only
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.query_only = query_only
+        self.temp_store_memory = temp_store_memory
+        self.create = create
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "SQLiteConnectionProfile":
+        """
+        Build a profile from the `sqlite_profile` section of the configuration.
+
+        Parameters:
+        -----------
+        config (Optional[Dict[str, Any]]): Profile settings; missing keys keep their default.
+
+        Raises:
+        -------
+        ValueError: If the configuration contains an unknown setting.
+
+        Returns:
+        --------
+        SQLiteConnectionProfile: The profile.
+        """
+        config = dict(config or {})
+        unknown = set(config) - {"read_only", "immutable", "mmap_size", "cache_size_kib",
+                                 "query_only", "temp_store_memory", "create", "journal_mode",
+                                 "synchronous"}
+        if unknown:
+            error_msg = f"Unknown SQLite profile settings: {sorted(unknown)}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+        return cls(**config)
+
+    def uri(self, db_path: str) -> str:
+        """
+        SQLite URI that opens `db_path` with this profile's open flags.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the SQLite database file.
+
+        Returns:
+        --------
+        str: The URI, to be passed to `sqlite3.connect(..., uri=True)`.
+        """
+        params = [f"mode={'ro' if self.read_only else 'rwc' if self.create else 'rw'}"]
+        if self.immutable:
+            params.append("immutable=1")
+        return f"{Path(db_path).resolve().as_uri()}?{'&'.join(params)}"
+
+    def pragmas(self) -> List[str]:
+        """
+        PRAGMA statements run on every new connection.
+
+        Returns:
+        --------
+        List[str]: The statements.
+        """
+        pragmas = []
+        if self.mmap_size:
+            pragmas.append(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        if self.cache_size_kib:
+            # Negative values are a size in KiB rather than a page count
+            pragmas.append(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")
+        if self.query_only:
+            pragmas.append("PRAGMA query_only = ON")
+        if self.temp_store_memory:
+            pragmas.append("PRAGMA temp_store = MEMORY")
+        if self.journal_mode:
+            pragmas.append(f"PRAGMA journal_mode = {self.journal_mode}")
+        if self.synchronous:
+            pragmas.append(f"PRAGMA synchronous = {self.synchronous}")
+        return pragmas
+
+    def open(self, db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+        """
+        Open and tune a connection to `db_path`.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the SQLite database file.
+        check_same_thread (bool): Passed to `sqlite3.connect`.
+
+        Returns:
+        --------
+        sqlite3.Connection: The connection.
+        """
+        connection = sqlite3.connect(self.uri(db_path), uri=True, check_same_thread=check_same_thread)
+        for pragma in self.pragmas():
+            connection.execute(pragma)
+        return connection
+
+
+# Plain connection, equivalent to `sqlite3.connect(db_path)`.
+DEFAULT_PROFILE = SQLiteConnectionProfile()
+
+# For the extracted source database, which is only ever read.
+READ_OPTIMIZED_PROFILE = SQLiteConnectionProfile(
+    read_only=True,
+    immutable=True,
+    mmap_size=1024 ** 3,
+    cache_size_kib=256 * 1024,
+    query_only=True,
+    temp_store_memory=True,
+)
+
+
+# For the warehouse the pipeline loads into: created on first use, WAL so readers
+# never block the loader, and synchronous=NORMAL, which only fsyncs at checkpoints
+# (a power loss can lose the last commits but never corrupts the database).
+WAREHOUSE_PROFILE = SQLiteConnectionProfile(
+    create=True,
+    journal_mode="WAL",
+    synchronous="NORMAL",
+    cache_size_kib=64 * 1024,
+    temp_store_memory=True,
+)
+
+
+class SQLiteConnectionPool:
+    """
+    Keeps opened connections around so later stages and runs can reuse them.
+
+    Idle connections are remembered per database path together with the file's
+    fingerprint. When the file has been replaced or modified since (e.g. a fresh
+    archive was unzipped over it), the stale connections are closed instead of
+    reused, which keeps `immutable` connections safe across runs.
+    """
+
+    def __init__(self, profile: SQLiteConnectionProfile = DEFAULT_PROFILE, max_idle: int = 4) -> None:
+        self.profile = profile
+        self.max_idle = max_idle
+        self._idle: Dict[str, List[Tuple[Tuple[int, int, int, int], sqlite3.Connection]]] = {}
+        self._acquired: Dict[int, Tuple[int, int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, db_path: str) -> sqlite3.Connection:
+        """
+        Take an idle connection to `db_path`, or open a new one.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the SQLite database file.
+
+        Returns:
+        --------
+        sqlite3.Connection: A connection for the caller's exclusive use until `release`.
+        """
+        key = os.path.abspath(db_path)
+        fingerprint = database_fingerprint(db_path)
+        with self._lock:
+            idle = self._idle.get(key, [])
+            stale = [connection for idle_fingerprint, connection in idle if idle_fingerprint != fingerprint]
+            idle[:] = [(idle_fingerprint, connection) for idle_fingerprint, connection in idle
+                       if idle_fingerprint == fingerprint]
+            connection = idle.pop()[1] if idle else None
+
+        for stale_connection in stale:
+            stale_connection.close()
+        if stale:
+            PipelineTrack(f"Closed {len(stale)} pooled connections to {db_path}: the database file changed.")
+
+        if connection is None:
+            connection = self.profile.open(db_path, check_same_thread=False)
+            PipelineTrack(f"Opened new pooled connection to {db_path}")
+        with self._lock:
+            self._acquired[id(connection)] = fingerprint
+        return connection
+
+    def release(self, db_path: str, connection: sqlite3.Connection) -> None:
+        """
+        Return a connection to the pool, closing it if the pool is full.
+
+        Parameters:
+        -----------
+        db_path (str): The path the connection was acquired for.
+        connection (sqlite3.Connection): The connection.
+
+        Returns:
+        --------
+        None
+        """
+        key = os.path.abspath(db_path)
+        with self._lock:
+            # Keep the fingerprint seen at acquire time, so a file that changed while
+            # the connection was in use is detected by the next `acquire`
+            fingerprint = self._acquired.pop(id(connection), None)
+            idle = self._idle.setdefault(key, [])
+            if fingerprint is not None and len(idle) < self.max_idle:
+                idle.append((fingerprint, connection))
+                return
+        connection.close()
+
+    @contextmanager
+    def connection(self, db_path: str) -> Iterator[sqlite3.Connection]:
+        """
+        Context manager that acquires a connection and releases it afterwards.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the SQLite database file.
+
+        Returns:
+        --------
+        Iterator[sqlite3.Connection]: The connection.
+        """
+        connection = self.acquire(db_path)
+        try:
+            yield connection
+        finally:
+            self.release(db_path, connection)
+
+    def close_all(self) -> None:
+        """
+        Close every idle connection.
+
+        Returns:
+        --------
+        None
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for _, connection in connections:
+                connection.close()
+        PipelineTrack("Closed all pooled database connections.")
+
+
+if __name__ == "__main__":
+    database_path = "/workspaces/Data-Wharehouse-ETL/database/sql/database.sqlite"
+
+    pool = SQLiteConnectionPool(READ_OPTIMIZED_PROFILE)
+    try:
+        for _ in range(3):
+            with pool.connection(database_path) as connection:
+                print(connection.execute("SELECT COUNT(*) FROM otp").fetchone())
+        pool.close_all()
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,479 @@
+import sqlite3, sys, os
+import time
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from utils.datetime_tools import DATE_FORMAT, DATETIME_FORMATS, parse_datetimes
+from databaseOperations.sqlite_connection import SQLiteConnectionProfile, WAREHOUSE_PROFILE
+from databaseOperations.load_data_to_sqlite import (SQLiteWarehouseLoader, sql_type, sql_values,
+                                                    DEFAULT_BATCH_ROWS, DEFAULT_INDEXES, MERGE_KEYS,
+                                                    TRAIN_STATUS_TABLE)
+from databaseOperations.warehouse_rollups import SOURCE_COLUMNS
+from databaseOperations.warehouse_partitions import WarehousePartitions
+
+FACT_TABLE = "fact_delay"
+
+# Fact indexes, built after the rows when the fact table is loaded empty. They end
+# with delay_minutes, so delay queries per train, period or station are index-only.
+STAR_INDEXES = {
+    **DEFAULT_INDEXES,
+    FACT_TABLE: [("train_key", "event_time", "delay_minutes"), ("date_key", "hour_key", "delay_minutes"),
+                 ("origin_station_key", "delay_minutes")],
+}
+
+# Natural key of a fact row for merge loads: the train and the second of its report.
+STAR_MERGE_KEYS = {
+    **MERGE_KEYS,
+    FACT_TABLE: ("train_key", "event_time"),
+}
+
+# Time-of-day bands of the hour dimension, as (first hour, name).
+HOUR_PERIODS = [(0, "night"), (6, "morning_peak"), (10, "midday"), (16, "evening_peak"), (20, "evening")]
+
+
+def _as_text(uniques: pd.Index) -> pd.Index:
+    """Natural keys as text; integer train numbers and their string form give the same key."""
+    return pd.Index(uniques.astype(str), dtype=object)
+
+
+def _as_date_text(uniques: pd.Index) -> pd.Index:
+    """Dates (datetime64 or 'YYYY-MM-DD...' strings) as 'YYYY-MM-DD'."""
+    if pd.api.types.is_datetime64_any_dtype(uniques):
+        return pd.Index(pd.DatetimeIndex(uniques).strftime(DATE_FORMAT), dtype=object)
+    return pd.Index(pd.Series(uniques.astype(str)).str.slice(0, 10).to_numpy(), dtype=object)
+
+
+def _as_hour(uniques: pd.Index) -> pd.Index:
+    return pd.Index(uniques.astype("int64"))
+
+
+def _date_attributes(dates: pd.Index) -> Dict[str, pd.Series]:
+    parsed = pd.to_datetime(pd.Series(dates), format=DATE_FORMAT)
+    return {
+        "year": parsed.dt.year, "month": parsed.dt.month, "day": parsed.dt.day,
+        "day_of_week": parsed.dt.day_name(), "is_weekend": parsed.dt.dayofweek >= 5,
+    }
+
+
+def _hour_attributes(hours: pd.Index) -> Dict[str, pd.Series]:
+    starts, names = zip(*HOUR_PERIODS)
+    periods = np.asarray(names, dtype=object)[np.searchsorted(starts, hours.to_numpy(), side="right") - 1]
+    return {"period": pd.Series(periods)}
+
+
+class Dimension:
+    """
+    One dimension table: an INTEGER surrogate key, a unique natural key and
+    attributes derived from the natural key.
+    """
+
+    def __init__(self, table: str, key: str, natural: str,
+                 normalize: Callable[[pd.Index], pd.Index],
+                 attributes: Optional[Callable[[pd.Index], Dict[str, pd.Series]]] = None) -> None:
+        """
+        Parameters:
+        -----------
+        table (str): The dimension table.
+        key (str): The surrogate key column.
+        natural (str): The natural key column.
+        normalize (Callable): Distinct source values -> distinct natural keys, in the
+                              same order (the same key for equal values of any dtype).
+        attributes (Optional[Callable]): Natural keys -> attribute columns of the new members.
+        """
+        self.table = table
+        self.key = key
+        self.natural = natural
+        self.normalize = normalize
+        self.attributes = attributes
+
+    def members(self, keys: np.ndarray, naturals: pd.Index) -> pd.DataFrame:
+        """The rows of new members, ready for `insert`."""
+        members = pd.DataFrame({self.key: keys, self.natural: naturals.to_numpy()})
+        if self.attributes is not None:
+            for column, values in self.attributes(naturals).items():
+                members[column] = values.to_numpy()
+        return members
+
+
+DIMENSIONS = {
+    "station": Dimension("dim_station", "station_key", "station_name", _as_text),
+    "train": Dimension("dim_train", "train_key", "train_id", _as_text),
+    "date": Dimension("dim_date", "date_key", "date", _as_date_text, _date_attributes),
+    "hour": Dimension("dim_hour", "hour_key", "hour", _as_hour, _hour_attributes),
+}
+
+# Fact foreign key -> (dimension, column of the transformed rows).
+# The hour key is looked up from the hour of `timeStamp`.
+FACT_KEYS = {
+    "train_key": ("train", "train_id"),
+    "origin_station_key": ("station", "originStation"),
+    "next_station_key": ("station", "nextStation"),
+    "date_key": ("date", "date"),
+    "hour_key": ("hour", "timeStamp"),
+}
+
+
+def star_rollup_source(columns: Iterable[str]) -> str:
+    """
+    Rollup source over fact rows: the dimension attributes of `SOURCE_COLUMNS` joined back in.
+
+    Parameters:
+    -----------
+    columns (Iterable[str]): Columns of the fact table; rollup columns without their
+                             key are NULL.
+
+    Returns:
+    --------
+    str: SELECT over a `{rows}` placeholder (a SELECT of fact rows).
+    """
+    columns = set(columns)
+    joins = {
+        "train_key": ("t", "dim_train", "train_id", "train_id"),
+        "origin_station_key": ("o", "dim_station", "station_name", "originStation"),
+        "next_station_key": ("n", "dim_station", "station_name", "nextStation"),
+        "date_key": ("d", "dim_date", "day_of_week", "day_of_week"),
+        "hour_key": ("h", "dim_hour", "hour", "hour"),
+    }
+    expressions = dict.fromkeys(SOURCE_COLUMNS, "NULL")
+    clauses = []
+    for fact_key, (alias, table, attribute, column) in joins.items():
+        if fact_key in columns:
+            dimension_key = DIMENSIONS[FACT_KEYS[fact_key][0]].key
+            clauses.append(f'LEFT JOIN "{table}" {alias} ON {alias}."{dimension_key}" = f."{fact_key}"')
+            expressions[column] = f'{alias}."{attribute}"'
+    for column in ("direction", "delay_minutes"):
+        if column in columns:
+            expressions[column] = f'f."{column}"'
+    if "event_time" in columns:
+        expressions["time_bucket"] = "strftime('%Y-%m-%d %H:00', f.event_time, 'unixepoch')"
+    selected = ", ".join(f"{expressions[column]} AS {column}" for column in SOURCE_COLUMNS)
+    return f"SELECT {selected} FROM ({{rows}}) f {' '.join(clauses)}"
+
+
+class DimensionCache:
+    """
+    In-memory natural key -> surrogate key map of one dimension.
+
+    The map is read from the table once per connection. Lookups take the
+    distinct values of a column and return their keys as an array, so the keys
+    of all rows come from one integer take instead of a query per row. Keys of
+    new members are assigned here (max key + 1, ...) and inserted in one batch.
+    """
+
+    def __init__(self, dimension: Dimension) -> None:
+        """
+        Parameters:
+        -----------
+        dimension (Dimension): The dimension the cache maps.
+        """
+        self.dimension = dimension
+        self.naturals = pd.Index([], dtype=object)
+        self.keys = np.empty(0, dtype=np.int64)
+
+    def load(self, connection: sqlite3.Connection) -> None:
+        """
+        Read the members of the dimension table.
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The warehouse connection.
+
+        Returns:
+        --------
+        None
+        """
+        dimension = self.dimension
+        rows = connection.execute(f'SELECT "{dimension.key}", "{dimension.natural}" FROM "{dimension.table}"').fetchall()
+        keys, naturals = zip(*rows) if rows else ((), ())
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.naturals = dimension.normalize(pd.Index(list(naturals), dtype=object)) if rows else pd.Index([], dtype=object)
+
+    def lookup(self, naturals: pd.Index) -> np.ndarray:
+        """
+        Surrogate keys of natural keys.
+
+        Parameters:
+        -----------
+        naturals (pd.Index): Normalized natural keys.
+
+        Returns:
+        --------
+        np.ndarray: int64 keys, -1 for keys not in the dimension yet.
+        """
+        positions = self.naturals.get_indexer(naturals)
+        return np.where(positions >= 0, self.keys[positions] if len(self.keys) else -1, -1)
+
+    def add_missing(self, connection: sqlite3.Connection, naturals: pd.Index) -> int:
+        """
+        Insert the natural keys that are not members yet, in one `executemany`.
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The warehouse connection, inside the load transaction.
+        naturals (pd.Index): Normalized natural keys.
+
+        Returns:
+        --------
+        int: Members added.
+        """
+        new = naturals[self.naturals.get_indexer(naturals) < 0].unique()
+        if not len(new):
+            return 0
+        first = int(self.keys.max()) + 1 if len(self.keys) else 1
+        keys = np.arange(first, first + len(new), dtype=np.int64)
+        members = self.dimension.members(keys, new)
+        names = ", ".join(f'"{column}"' for column in members.columns)
+        connection.executemany(
+            f'INSERT INTO "{self.dimension.table}" ({names}) VALUES ({", ".join("?" for _ in members.columns)})',
+            zip(*(sql_values(members[column]) for column in members.columns)))
+        self.naturals = self.naturals.append(new)
+        self.keys = np.concatenate([self.keys, keys])
+        return len(new)
+
+    def create_table(self, connection: sqlite3.Connection) -> None:
+        """Create the dimension table if it does not exist."""
+        dimension = self.dimension
+        sample = dimension.members(np.empty(0, dtype=np.int64), dimension.normalize(pd.Index([], dtype=object)))
+        attributes = "".join(f', "{column}" {sql_type(dtype)}' for column, dtype in sample.dtypes.items()
+                             if column not in (dimension.key, dimension.natural))
+        natural_type = "INTEGER" if dimension.normalize is _as_hour else "TEXT"
+        connection.execute(f'CREATE TABLE IF NOT EXISTS "{dimension.table}" ('
+                           f'"{dimension.key}" INTEGER PRIMARY KEY, '
+                           f'"{dimension.natural}" {natural_type} NOT NULL UNIQUE{attributes})')
+
+
+def fact_frame(df: pd.DataFrame, caches: Dict[str, DimensionCache],
+               connection: sqlite3.Connection) -> pd.DataFrame:
+    """
+    Turn transformed rows into fact rows: dimension columns become surrogate keys.
+
+    Every source column is factorized, only its distinct values are normalized
+    and looked up (new ones are added to the dimension), and the keys are mapped
+    back to the rows through the codes.
+
+    Parameters:
+    -----------
+    df (pd.DataFrame): Transformed rows (see `FACT_KEYS` for the columns used).
+    caches (Dict[str, DimensionCache]): Dimension name -> loaded cache.
+    connection (sqlite3.Connection): The warehouse connection, inside the load transaction.
+
+    Returns:
+    --------
+    pd.DataFrame: The fact rows (keys, direction, event_time, delay_minutes).
+    """
+    timestamps = parse_datetimes(df["timeStamp"], DATETIME_FORMATS["timeStamp"]) if "timeStamp" in df.columns else None
+    sources = {
+        "train_id": df.get("train_id"),
+        "originStation": df.get("originStation"),
+        "nextStation": df.get("nextStation"),
+        "date": df["date"] if "date" in df.columns else (timestamps.dt.normalize() if timestamps is not None else None),
+        "timeStamp": timestamps.dt.hour if timestamps is not None else None,
+    }
+
+    fact = {}
+    for fact_key, (dimension_name, column) in FACT_KEYS.items():
+        values = sources[column]
+        if values is None:
+            continue
+        codes, uniques = pd.factorize(values)
+        cache = caches[dimension_name]
+        naturals = cache.dimension.normalize(pd.Index(uniques))
+        cache.add_missing(connection, naturals)
+        # Missing values (code -1) pick the appended -1 and have no member
+        keys = np.append(cache.lookup(naturals), -1)[codes]
+        fact[fact_key] = _with_missing(keys, codes < 0)
+    if "direction" in df.columns:
+        fact["direction"] = df["direction"].to_numpy()
+    if timestamps is not None:
+        # Seconds since the epoch: 8 bytes at most instead of a 19-character text
+        seconds = timestamps.to_numpy().astype("datetime64[s]").astype("int64")
+        fact["event_time"] = _with_missing(seconds, timestamps.isna().to_numpy())
+    fact["delay_minutes"] = df["delay_minutes"].to_numpy()
+    return pd.DataFrame(fact)
+
+
+def _with_missing(values: np.ndarray, missing: np.ndarray):
+    """int64 values, as a nullable Int64 array (NULL in SQL) only if some are missing."""
+    if not missing.any():
+        return values
+    values = pd.array(values, dtype="Int64")
+    values[missing] = pd.NA
+    return values
+
+
+class StarSchemaLoader(SQLiteWarehouseLoader):
+    """
+    Warehouse loader that stores the transformed rows as a star schema.
+
+    Rows loaded into `train_status` go to the `fact_delay` table instead, with
+    the train, the two stations, the date and the hour of the timestamp
+    replaced by INTEGER surrogate keys into `dim_train`, `dim_station`,
+    `dim_date` and `dim_hour`. Keys come from an in-memory `DimensionCache` per
+    dimension; only values never seen before cost a (batched) insert. Fact rows
+    are then a handful of small integers and the delay, so the table is a
+    fraction of the size of the text rows and group-bys compare integers.
+    Any other table is loaded as it is. With `partitions`, fact rows are split
+    into monthly partition files on `event_time`; the dimensions stay in the
+    main warehouse file.
+    """
+
+    ROW_TABLE = FACT_TABLE
+    PARTITION_COLUMNS = {FACT_TABLE: "event_time"}
+
+    def __init__(self, profile: SQLiteConnectionProfile = WAREHOUSE_PROFILE,
+                 batch_rows: int = DEFAULT_BATCH_ROWS,
+                 indexes: Optional[Dict[str, List[Tuple[str, ...]]]] = None,
+                 merge: bool = False, merge_keys: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 rollups: bool = False, partitions: Optional[WarehousePartitions] = None) -> None:
+        """
+        Parameters:
+        -----------
+        profile (SQLiteConnectionProfile): How the warehouse connection is opened and tuned.
+        batch_rows (int): Rows per `executemany` call.
+        indexes (Optional[Dict[str, List[Tuple[str, ...]]]]): Table -> indexed column tuples.
+                                                              Defaults to `STAR_INDEXES`.
+        merge (bool): Merge fact rows on (train_key, event_time) instead of appending them.
+        merge_keys (Optional[Dict[str, Tuple[str, ...]]]): Defaults to `STAR_MERGE_KEYS`.
+        rollups (bool): Maintain the rollup tables of the fact rows.
+        partitions (Optional[WarehousePartitions]): Store the fact rows in monthly partition files.
+        """
+        super().__init__(profile=profile, batch_rows=batch_rows,
+                         indexes=STAR_INDEXES if indexes is None else indexes,
+                         merge=merge, merge_keys=STAR_MERGE_KEYS if merge_keys is None else merge_keys,
+                         rollups=rollups, partitions=partitions)
+        self.caches = {name: DimensionCache(dimension) for name, dimension in DIMENSIONS.items()}
+
+    def connect(self, db_path: str) -> None:
+        """
+        Open the warehouse, create the dimension tables and load their key caches.
+
+        Parameters:
+        -----------
+        db_path (str): Path to the warehouse database file.
+
+        Returns:
+        --------
+        None
+        """
+        super().connect(db_path)
+        try:
+            for cache in self.caches.values():
+                cache.create_table(self.connection)
+                cache.load(self.connection)
+        except sqlite3.Error as e:
+            error_msg = f"Error reading the warehouse dimensions: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg)
+
+    def load(self, df: pd.DataFrame, table: str, replace: bool = False) -> int:
+        """
+        Write the rows of `df`; `train_status` rows become `fact_delay` rows.
+
+        New dimension members are committed before the facts, so the caches
+        always match the dimension tables, even if the fact load fails.
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): The rows; the index is not written.
+        table (str): The target table.
+        replace (bool): Replace the fact (or other) table. Dimensions are kept,
+                        so surrogate keys stay stable across runs.
+
+        Raises:
+        -------
+        RuntimeError: If `connect` was not called.
+        sqlite3.Error: If the load fails.
+
+        Returns:
+        --------
+        int: Rows written.
+        """
+        if table != TRAIN_STATUS_TABLE:
+            return super().load(df, table, replace=replace)
+        if self.connection is None:
+            error_msg = "connect must be called before loading data."
+            ErrorTrack(error_msg)
+            raise RuntimeError(error_msg)
+
+        start = time.perf_counter()
+        sizes = {name: len(cache.keys) for name, cache in self.caches.items()}
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+            fact = fact_frame(df, self.caches, self.connection)
+            self.connection.execute("COMMIT")
+        except Exception as e:
+            if self.connection.in_transaction:
+                self.connection.execute("ROLLBACK")
+            # The rolled back members are not in the table: read the caches again
+            for cache in self.caches.values():
+                cache.load(self.connection)
+            error_msg = f"Error adding dimension members for {len(df)} rows: {str(e)}"
+            ErrorTrack(error_msg)
+            raise sqlite3.Error(error_msg) from e
+        added = {name: len(cache.keys) - sizes[name] for name, cache in self.caches.items() if len(cache.keys) > sizes[name]}
+        PipelineTrack(f"Looked up dimension keys in {time.perf_counter() - start:.2f}s (new members: {added or 'none'})")
+        return super().load(fact, FACT_TABLE, replace=replace)
+
+    def _rollup_source(self, table: str, schema: str = "main") -> Optional[str]:
+        """Rollup source of the fact rows, None for other tables."""
+        if table != FACT_TABLE:
+            return None
+        return star_rollup_source(self._columns(table, schema))
+
+
+def benchmark(rows: int = 1_000_000) -> Dict[str, Tuple[float, int, float]]:
+    """
+    Load the same transformed rows flat and as a star schema; compare time, file size and a query.
+
+    Parameters:
+    -----------
+    rows (int): Rows in the synthetic frame (before the 'On Time' filter).
+
+    Returns:
+    --------
+    Dict[str, Tuple[float, int, float]]: Model -> (load seconds, file bytes, query seconds).
+    """
+    import tempfile
+    from utils.synthetic_data import make_otp_frame
+    from databaseOperations.transform_database import TransformData
+
+    df = TransformData().transform_rows(make_otp_frame(rows))
+    queries = {
+        "flat": f"SELECT originStation, day_of_week, AVG(delay_minutes) FROM {TRAIN_STATUS_TABLE} "
+                f"GROUP BY originStation, day_of_week",
+        "star": f"SELECT s.station_name, d.day_of_week, AVG(f.delay_minutes) FROM {FACT_TABLE} f "
+                f"JOIN dim_station s ON s.station_key = f.origin_station_key "
+                f"JOIN dim_date d ON d.date_key = f.date_key GROUP BY s.station_name, d.day_of_week",
+    }
+    results = {}
+    reference = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for model, loader in (("flat", SQLiteWarehouseLoader()), ("star", StarSchemaLoader())):
+            db_path = os.path.join(tmp_dir, f"{model}.sqlite")
+            loader.connect(db_path)
+            start = time.perf_counter()
+            loader.load(df, TRAIN_STATUS_TABLE, replace=True)
+            load_seconds = time.perf_counter() - start
+            loader.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            start = time.perf_counter()
+            answer = sorted(loader.connection.execute(queries[model]).fetchall())
+            query_seconds = time.perf_counter() - start
+            loader.close_connection()
+            results[model] = (load_seconds, os.path.getsize(db_path), query_seconds)
+            if reference is not None:
+                assert [row[:2] for row in answer] == [row[:2] for row in reference]
+                assert np.allclose([row[2] for row in answer], [row[2] for row in reference])
+            reference = answer
+            print(f"{model}: load {load_seconds:.2f}s, {results[model][1] / 2**20:.1f} MiB, "
+                  f"query {query_seconds:.2f}s")
+    return results
+
+
+if __name__ == "__main__":
+    # Benchmark: python src/databaseOperations/star_schema.py [rows]
+    benchmark(rows=int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,417 @@
+import sys, os
+import struct
+import hashlib
+import zipfile
+import zlib
+import urllib.request
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Optional
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from databaseOperations.ingest_from_drive import (DownloadManifest, DOWNLOAD_BLOCK_SIZE, resolve_download_url,
+                                                  archive_matches, remote_unchanged)
+from databaseOperations.unzip_database import safe_member_path
+
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+# Records that follow the last member: central directory, zip64 end records, end of central directory
+TRAILER_SIGNATURES = (b"PK\x01\x02", b"PK\x06\x06", b"PK\x06\x07", b"PK\x05\x06")
+
+# Local file header after the signature: version, flags, method, time, date, crc, sizes, name/extra lengths
+LOCAL_HEADER = struct.Struct("<HHHHHIIIHH")
+ZIP64_EXTRA_ID = 0x0001
+ZIP64_MARKER = 0xFFFFFFFF
+FLAG_ENCRYPTED = 0x01
+FLAG_DATA_DESCRIPTOR = 0x08
+
+
+class _ByteStream:
+    """
+    Forward-only reader over a network stream with push-back.
+
+    Every byte read from the source is hashed and, optionally, copied to the
+    archive file, so the archive is kept without reading it back from disk.
+    """
+
+    def __init__(self, source: BinaryIO, archive: Optional[BinaryIO] = None) -> None:
+        self.source = source
+        self.archive = archive
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self._pushed_back = b""
+
+    def read(self, n: int) -> bytes:
+        """Up to `n` bytes; an empty result means the stream ended."""
+        if self._pushed_back:
+            data, self._pushed_back = self._pushed_back[:n], self._pushed_back[n:]
+            return data
+        data = self.source.read(n)
+        if data:
+            self.digest.update(data)
+            self.size += len(data)
+            if self.archive is not None:
+                self.archive.write(data)
+        return data
+
+    def read_exact(self, n: int) -> bytes:
+        """Exactly `n` bytes, or `zipfile.BadZipFile` if the stream ends first."""
+        parts, remaining = [], n
+        while remaining:
+            data = self.read(remaining)
+            if not data:
+                raise zipfile.BadZipFile(f"Archive stream ended {remaining} bytes early")
+            parts.append(data)
+            remaining -= len(data)
+        return b"".join(parts)
+
+    def unread(self, data: bytes) -> None:
+        """Push bytes back, e.g. what the inflater read past the end of a member."""
+        self._pushed_back = data + self._pushed_back
+
+    def drain(self) -> None:
+        """Read the rest of the source (the central directory), so the hash and archive copy are complete."""
+        self._pushed_back = b""
+        while self.read(DOWNLOAD_BLOCK_SIZE):
+            pass
+
+
+class StreamingZipExtractor:
+    """
+    Extracts a zip archive from a forward-only byte stream.
+
+    The central directory sits at the end of a zip file, so `zipfile` needs the
+    whole archive on disk first. This reader walks the local file headers in
+    stream order instead: every member is inflated while its bytes arrive and
+    its CRC-32 is checked against the header or the trailing data descriptor
+    before the output file is moved into place. Stored and deflated members,
+    data descriptors and zip64 sizes are supported.
+    """
+
+    def __init__(self, extract_to: str, members: Optional[Iterable[str]] = None) -> None:
+        """
+        Parameters:
+        -----------
+        extract_to (str): Directory the members are written to.
+        members (Optional[Iterable[str]]): Names (or base names) of the members to
+                                           write; the others are read past. None = all.
+        """
+        self.extract_to = extract_to
+        self.members = set(members) if members is not None else None
+
+    def wanted(self, member_name: str) -> bool:
+        """Whether a member passes the member filter."""
+        return self.members is None or member_name in self.members or os.path.basename(member_name) in self.members
+
+    def extract(self, stream: _ByteStream) -> Dict[str, Dict[str, Any]]:
+        """
+        Extract every wanted member of the archive in `stream`.
+
+        Parameters:
+        -----------
+        stream (_ByteStream): The archive bytes.
+
+        Raises:
+        -------
+        zipfile.BadZipFile: If the stream is not a zip archive, is truncated or fails a CRC check.
+        NotImplementedError: For encrypted members or compression methods other than stored/deflate.
+
+        Returns:
+        --------
+        Dict[str, Dict[str, Any]]: Member name to its extracted path, size and CRC.
+        """
+        extracted = {}
+        while True:
+            signature = stream.read_exact(4)
+            if signature in TRAILER_SIGNATURES:
+                break
+            if signature != LOCAL_HEADER_SIGNATURE:
+                raise zipfile.BadZipFile(f"Unexpected record signature {signature!r} in archive stream")
+
+            member = self._read_header(stream)
+            destination = None
+            if self.wanted(member["name"]) and not member["name"].endswith("/"):
+                destination = safe_member_path(self.extract_to, member["name"])
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+
+            part_path = f"{destination}.part" if destination else None
+            output = open(part_path, 'wb') if part_path else None
+            try:
+                crc, size = self._copy_data(stream, member, output)
+            finally:
+                if output:
+                    output.close()
+
+            if member["flags"] & FLAG_DATA_DESCRIPTOR:
+                member.update(self._read_data_descriptor(stream, member["zip64"]))
+            if crc != member["crc"] or size != member["file_size"]:
+                if part_path:
+                    os.remove(part_path)
+                raise zipfile.BadZipFile(f"Bad CRC-32 or size for {member['name']}")
+
+            if part_path:
+                os.replace(part_path, destination)
+                extracted[member["name"]] = {"path": destination, "size": size, "crc": crc}
+                PipelineTrack(f"Extracted {member['name']} ({size} bytes) to {destination}")
+        return extracted
+
+    @staticmethod
+    def _read_header(stream: _ByteStream) -> Dict[str, Any]:
+        """Parse a local file header; the signature has already been read."""
+        (_, flags, method, _, _, crc, compress_size, file_size,
+         name_length, extra_length) = LOCAL_HEADER.unpack(stream.read_exact(LOCAL_HEADER.size))
+        raw_name = stream.read_exact(name_length)
+        extra = stream.read_exact(extra_length)
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+
+        if flags & FLAG_ENCRYPTED:
+            raise NotImplementedError(f"Encrypted archive members are not supported: {name}")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise NotImplementedError(f"Compression method {method} is not supported for streaming: {name}")
+
+        # The zip64 extra field holds the sizes that do not fit the header, in this order
+        zip64 = False
+        offset = 0
+        while offset + 4 <= len(extra):
+            header_id, data_size = struct.unpack_from("<HH", extra, offset)
+            if header_id == ZIP64_EXTRA_ID:
+                zip64 = True
+                data = extra[offset + 4:offset + 4 + data_size]
+                position = 0
+                if file_size == ZIP64_MARKER and position + 8 <= len(data):
+                    file_size = struct.unpack_from("<Q", data, position)[0]
+                    position += 8
+                if compress_size == ZIP64_MARKER and position + 8 <= len(data):
+                    compress_size = struct.unpack_from("<Q", data, position)[0]
+            offset += 4 + data_size
+
+        if flags & FLAG_DATA_DESCRIPTOR:
+            if method == zipfile.ZIP_STORED and name.endswith("/"):
+                # Directory entries carry no data
+                compress_size = 0
+            elif method == zipfile.ZIP_STORED:
+                raise NotImplementedError(f"Stored members with a data descriptor cannot be streamed: {name}")
+            else:
+                compress_size = None
+        return {"name": name, "flags": flags, "method": method, "crc": crc,
+                "compress_size": compress_size, "file_size": file_size, "zip64": zip64}
+
+    @staticmethod
+    def _copy_data(stream: _ByteStream, member: Dict[str, Any], output: Optional[BinaryIO]):
+        """Inflate (or copy) the member data to `output`; returns the CRC-32 and size of the output."""
+        crc, size = 0, 0
+        remaining = member["compress_size"]
+
+        if member["method"] == zipfile.ZIP_STORED:
+            while remaining:
+                block = stream.read_exact(min(DOWNLOAD_BLOCK_SIZE, remaining))
+                remaining -= len(block)
+                crc, size = zlib.crc32(block, crc), size + len(block)
+                if output:
+                    output.write(block)
+            return crc, size
+
+        inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        while not inflater.eof:
+            # Without a known size (data descriptor) the deflate stream marks its own end
+            if remaining == 0:
+                raise zipfile.BadZipFile(f"Deflate stream of {member['name']} is longer than its compressed size")
+            block = stream.read(DOWNLOAD_BLOCK_SIZE if remaining is None else min(DOWNLOAD_BLOCK_SIZE, remaining))
+            if not block:
+                raise zipfile.BadZipFile(f"Archive stream ended inside {member['name']}")
+            if remaining is not None:
+                remaining -= len(block)
+            data = inflater.decompress(block)
+            crc, size = zlib.crc32(data, crc), size + len(data)
+            if output:
+                output.write(data)
+        if inflater.unused_data:
+            stream.unread(inflater.unused_data)
+        return crc, size
+
+    @staticmethod
+    def _read_data_descriptor(stream: _ByteStream, zip64: bool) -> Dict[str, int]:
+        """Read the CRC and sizes that follow a member written with a data descriptor."""
+        first = stream.read_exact(4)
+        crc_bytes = stream.read_exact(4) if first == DATA_DESCRIPTOR_SIGNATURE else first
+        size_format = "<QQ" if zip64 else "<II"
+        compress_size, file_size = struct.unpack(size_format, stream.read_exact(struct.calcsize(size_format)))
+        return {"crc": struct.unpack("<I", crc_bytes)[0], "compress_size": compress_size, "file_size": file_size}
+
+
+class StreamIngest:
+    """
+    Downloads an archive and extracts it in the same pass.
+
+    The download, the decompression and the write of the extracted members
+    overlap, so the ingest takes about as long as the transfer alone, and the
+    archive is never read back from disk. The archive itself is optionally kept
+    (written as the bytes arrive) for the regular download/unzip path and for
+    auditing. The manifest is the one `LoadFromDrive` writes, extended with the
+    extracted members, so an unchanged remote file is skipped either way. A
+    broken transfer is not resumed: the next run starts it again.
+    """
+
+    def __init__(self, timeout: float = 60.0) -> None:
+        """
+        Parameters:
+        -----------
+        timeout (float): Socket timeout in seconds.
+        """
+        self.timeout = timeout
+
+    def ingest(self, url: str, save_archive: str, name: str, extract_to: str, keep_archive: bool = True,
+               members: Optional[Iterable[str]] = None, force: bool = False) -> bool:
+        """
+        Download the archive at `url` and extract it to `extract_to` while it arrives.
+
+        Parameters:
+        -----------
+        url (str): The Google Drive link or HTTP(S) URL of the archive.
+        save_archive (str): Directory of the archive copy and the manifest.
+        name (str): The archive name (without extension).
+        extract_to (str): Directory the members are extracted to.
+        keep_archive (bool): Also write the archive to `{save_archive}/{name}.zip`.
+        members (Optional[Iterable[str]]): Only extract these members (names or base names).
+        force (bool): Download even if the manifest says the file is unchanged.
+
+        Raises:
+        -------
+        FileNotFoundError: If a directory does not exist.
+        ValueError: If the URL is not supported or the server returns an HTML page.
+        Exception: For any other errors during the download or extraction.
+
+        Returns:
+        --------
+        bool: True if a new archive was ingested, False if the extracted files are current.
+        """
+        for directory in (save_archive, extract_to):
+            if not os.path.isdir(directory):
+                error_msg = f"The specified directory does not exist: {directory}"
+                ErrorTrack(error_msg)
+                raise FileNotFoundError(error_msg)
+
+        download_link = resolve_download_url(url)
+        save_path = f"{save_archive}/{name}.zip"
+        part_path = f"{save_path}.part"
+        manifest_store = DownloadManifest(f"{save_archive}/{name}.manifest.json")
+
+        try:
+            manifest = manifest_store.load()
+            if not force and self._outputs_current(manifest, save_path, keep_archive) \
+                    and remote_unchanged(download_link, manifest, self.timeout):
+                PipelineTrack(f"Remote file unchanged, keeping the files extracted to {extract_to}")
+                return False
+
+            PipelineTrack(f"Starting streamed ingest. File: {name}, Source: {download_link}, Destination: {extract_to}")
+            response = urllib.request.urlopen(download_link, timeout=self.timeout)
+            with response:
+                if "text/html" in (response.headers.get("Content-Type") or ""):
+                    error_msg = f"The server returned an HTML page instead of the file (check sharing settings or quota): {download_link}"
+                    ErrorTrack(error_msg)
+                    raise ValueError(error_msg)
+
+                archive = open(part_path, 'wb') if keep_archive else None
+                try:
+                    stream = _ByteStream(response, archive)
+                    extracted = StreamingZipExtractor(extract_to, members).extract(stream)
+                    stream.drain()
+                finally:
+                    if archive:
+                        archive.close()
+
+                expected = response.headers.get("Content-Length")
+                if expected is not None and stream.size != int(expected):
+                    raise IOError(f"Incomplete download: got {stream.size} of {expected} bytes.")
+                validators = {"etag": response.headers.get("ETag"),
+                              "last_modified": response.headers.get("Last-Modified")}
+
+            if keep_archive:
+                os.replace(part_path, save_path)
+            manifest_store.save({
+                "url": url,
+                "download_url": download_link,
+                "size": stream.size,
+                "sha256": stream.digest.hexdigest(),
+                "etag": validators["etag"],
+                "last_modified": validators["last_modified"],
+                "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+                "members": extracted,
+            })
+            PipelineTrack(f"Streamed ingest finished: {stream.size} archive bytes, {len(extracted)} members extracted to {extract_to}")
+            return True
+
+        except Exception as e:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            error_msg = f"An error occurred during the streamed ingest: {str(e)}"
+            ErrorTrack(error_msg)
+            raise Exception(error_msg) from e
+
+    @staticmethod
+    def _outputs_current(manifest: Dict[str, Any], save_path: str, keep_archive: bool) -> bool:
+        """Whether the extracted members (and the archive, if kept) still match the manifest."""
+        members = manifest.get("members")
+        if not members:
+            return False
+        if keep_archive and not archive_matches(save_path, manifest):
+            return False
+        return all(os.path.exists(member["path"]) and os.path.getsize(member["path"]) == member["size"]
+                   for member in members.values())
+
+
+def benchmark(size_mb: int = 64, latency: float = 0.05, bandwidth_mb: float = 32.0) -> None:
+    """
+    Compare download-then-unzip with the streamed ingest against a throttled local server.
+
+    Parameters:
+    -----------
+    size_mb (int): Size of the synthetic database member in MiB.
+    latency (float): Seconds the server waits before answering each request.
+    bandwidth_mb (float): MiB per second the server sends on each connection.
+
+    Returns:
+    --------
+    None
+    """
+    import tempfile, time
+    from utils.local_http_server import serve_directory
+    from databaseOperations.ingest_from_drive import LoadFromDrive
+    from databaseOperations.unzip_database import UnzipFile
+
+    with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as work_dir:
+        # Half random, half repetitive, so the member compresses roughly like a database
+        with zipfile.ZipFile(os.path.join(source_dir, "database.zip"), "w", zipfile.ZIP_DEFLATED) as zf:
+            with zf.open("database.sqlite", "w", force_zip64=True) as member:
+                for _ in range(size_mb):
+                    member.write(os.urandom(512 * 1024) + bytes(512 * 1024))
+        server, base_url = serve_directory(source_dir, latency=latency, bandwidth=int(bandwidth_mb * 1024 * 1024))
+        url = f"{base_url}/database.zip"
+        directories = {key: os.path.join(work_dir, key) for key in ("archive", "sql", "stream_archive", "stream_sql")}
+        for directory in directories.values():
+            os.makedirs(directory)
+        try:
+            start = time.perf_counter()
+            LoadFromDrive().load(url, directories["archive"], "database", force=True)
+            UnzipFile().unzip(os.path.join(directories["archive"], "database.zip"), directories["sql"])
+            sequential_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            StreamIngest().ingest(url, directories["stream_archive"], "database", directories["stream_sql"],
+                                  keep_archive=False, force=True)
+            streamed_seconds = time.perf_counter() - start
+        finally:
+            server.shutdown()
+
+        assert os.path.getsize(os.path.join(directories["sql"], "database.sqlite")) == \
+            os.path.getsize(os.path.join(directories["stream_sql"], "database.sqlite"))
+    print(f"download then unzip: {sequential_seconds:.2f}s")
+    print(f"streamed ingest:     {streamed_seconds:.2f}s")
+    print(f"speedup: {sequential_seconds / streamed_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    # Benchmark: python src/databaseOperations/stream_ingest.py [size_mb]
+    benchmark(size_mb=int(sys.argv[1]) if len(sys.argv) > 1 else 64)
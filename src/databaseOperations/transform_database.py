@@ -1,11 +1,19 @@
 import sys, os
+import numpy as np
 import pandas as pd
+from typing import Iterable, Optional, Tuple
 from abc import ABC, abstractmethod
 
 # Define MAIN_DIR to point to the project root directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 sys.path.append(MAIN_DIR)
 from utils import ErrorTrack, PipelineTrack
+from utils.datetime_tools import parse_datetime_columns
+from utils.frame_io import IFrameFormat, CSVFormat
+from databaseOperations.delay_aggregate import DelayAggregate
+from databaseOperations.aggregate_store import AggregateStore
+from databaseOperations.load_data_to_sqlite import ILoadData, MERGE_KEYS, TRAIN_STATUS_TABLE, DELAY_SUMMARY_TABLE
+from databaseOperations.transform_spec import TransformSpec, TransformStep
 
 r"""
 Possible Transformations:
@@ -19,6 +27,116 @@ Aggregate Data: Group data by train_id and compute summary statistics like avera
 Drop Unnecessary Columns: Remove columns that don’t contribute to downstream processing.
 """
 
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+COLUMN_RENAMES = {'next_station': 'nextStation', 'origin': 'originStation'}
+# Columns the delay summary is computed from; a projection must keep them.
+SUMMARY_COLUMNS = ('train_id', 'delay_minutes')
+
+
+def _codes_and_uniques(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Integer codes into the distinct values (-1 for missing); reuses the codes of a categorical."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+
+def parse_delay_minutes(status: pd.Series) -> pd.Series:
+    """
+    Delay in minutes from status strings like '12 min' ('On Time' and missing give NaN).
+
+    `status` only has a few hundred distinct values, so the regex runs once per
+    distinct value and the results are mapped back to the rows through integer
+    codes, instead of running the regex on every row.
+
+    Parameters:
+    -----------
+    status (pd.Series): The status column (strings or categorical).
+
+    Returns:
+    --------
+    pd.Series: float delay per row, aligned with `status`.
+    """
+    codes, uniques = _codes_and_uniques(status)
+    parsed = pd.Series(uniques.astype(str)).str.extract(r'(\d+)', expand=False).astype(float).to_numpy()
+    # Append NaN so the missing-value code -1 looks it up
+    delays = np.append(parsed, np.nan)[codes]
+    return pd.Series(delays, index=status.index, name='delay_minutes')
+
+
+def day_of_week(dates: pd.Series) -> pd.Series:
+    """
+    Weekday name of every date, as a categorical with the days in calendar order.
+
+    The weekday is computed once per distinct date and mapped back to the rows
+    through integer codes.
+
+    Parameters:
+    -----------
+    dates (pd.Series): datetime64 values.
+
+    Returns:
+    --------
+    pd.Series: Categorical weekday names, aligned with `dates`.
+    """
+    codes, uniques = pd.factorize(dates)
+    weekdays = np.append(pd.DatetimeIndex(uniques).dayofweek.to_numpy(), -1)[codes]
+    return pd.Series(pd.Categorical.from_codes(weekdays, categories=DAY_NAMES),
+                     index=dates.index, name='day_of_week')
+
+def _filter_on_time(df: pd.DataFrame) -> pd.DataFrame:
+    """1. Remove rows with 'On Time' status."""
+    df = df[df['status'] != 'On Time']
+    PipelineTrack(f"Filtered 'On Time' rows. Remaining rows: {len(df)}")
+    return df
+
+
+def _parse_datetimes(df: pd.DataFrame) -> pd.DataFrame:
+    """2. Convert 'date' and 'timeStamp' to datetime."""
+    # Either may have been pruned or projected away, or already typed by the
+    # extractor's schema, in which case it is not parsed again
+    df = parse_datetime_columns(df)
+    PipelineTrack("Converted 'date' and 'timeStamp' to datetime format.")
+    return df
+
+
+def _add_delay_minutes(df: pd.DataFrame) -> pd.DataFrame:
+    """3a. Delay in minutes from statuses like '1 min'."""
+    df['delay_minutes'] = parse_delay_minutes(df['status'])
+    PipelineTrack("Added 'delay_minutes' column.")
+    return df
+
+
+def _add_day_of_week(df: pd.DataFrame) -> pd.DataFrame:
+    """3b. Weekday name of the date."""
+    df['day_of_week'] = day_of_week(df['date'])
+    PipelineTrack("Added 'day_of_week' column.")
+    return df
+
+
+def _rename_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """4. Rename columns for consistency."""
+    df = df.rename(columns=COLUMN_RENAMES)
+    PipelineTrack("Renamed columns for consistency.")
+    return df
+
+
+# Row-level steps, in the order they run, with the columns each reads and writes.
+# Steps that were already done by the extraction query (see `pushdown.py`) are
+# skipped, steps whose results nobody uses are not run, and columns are dropped
+# as soon as no later step or output column needs them (see `TransformSpec`).
+TRANSFORM_SPEC = TransformSpec([
+    TransformStep("filter_on_time", _filter_on_time, inputs=["status"], filters_rows=True),
+    TransformStep("parse_datetimes", _parse_datetimes, outputs=["date", "timeStamp"], columnwise=True),
+    TransformStep("delay_minutes", _add_delay_minutes, inputs=["status"], outputs=["delay_minutes"]),
+    TransformStep("day_of_week", _add_day_of_week, inputs=["date"], outputs=["day_of_week"]),
+    TransformStep("rename", _rename_columns, renames=COLUMN_RENAMES),
+    # 5. Keep only the output columns
+    TransformStep("project", selects_output=True),
+])
+TRANSFORM_STEPS = TRANSFORM_SPEC.names
+
 class ITransformData(ABC):
     """
     Abstract Base Class (ABC) for transforming data.
@@ -44,7 +162,47 @@ class TransformData(ITransformData):
     Concrete implementation of ITransformData for transforming ETL data.
     """
 
-    def transform(self, df: pd.DataFrame, df_wheresave: str) -> pd.DataFrame:
+    def __init__(self, skip_steps: Iterable[str] = (), output_columns: Optional[Iterable[str]] = None,
+                 aggregate_store: Optional[AggregateStore] = None, loader: Optional[ILoadData] = None,
+                 frame_format: Optional[IFrameFormat] = None) -> None:
+        """
+        Parameters:
+        -----------
+        skip_steps (Iterable[str]): Steps of `TRANSFORM_STEPS` that the extraction query
+                                    already applied (see `PushdownPlan.pushed_steps`).
+        output_columns (Optional[Iterable[str]]): Columns kept by the "project" step, by
+                                                  their final names. None = all columns.
+                                                  Other columns are dropped as soon as no
+                                                  later step needs them.
+        aggregate_store (Optional[AggregateStore]): Persistent delay aggregates. Appending
+                                                    runs then fold only their new rows into it
+                                                    instead of re-reading all of `df.csv`.
+        loader (Optional[ILoadData]): Connected warehouse loader. The transformed rows and
+                                      the delay summary are then also loaded into the
+                                      `train_status` and `delay_summary` tables. If it
+                                      merges, `df.csv` only gets the rows the merge wrote
+                                      and the delay summary is read from the warehouse,
+                                      so overlapping runs count every row once.
+        frame_format (Optional[IFrameFormat]): Format `df` and `delay_summary` are saved in
+                                               (default: CSV, `df.csv`).
+
+        Raises:
+        -------
+        ValueError: For unknown steps, or a projection without the summary columns.
+        """
+        self.skip_steps = set(skip_steps)
+        self.output_columns = list(output_columns) if output_columns is not None else None
+        if self.output_columns is not None and not set(SUMMARY_COLUMNS) <= set(self.output_columns):
+            error_msg = f"output_columns must include {list(SUMMARY_COLUMNS)} for the delay summary: {self.output_columns}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+        self.plan = TRANSFORM_SPEC.plan(self.output_columns, self.skip_steps)
+
+        self.aggregate_store = aggregate_store
+        self.loader = loader
+        self.frame_format = frame_format if frame_format is not None else CSVFormat()
+
+    def transform(self, df: pd.DataFrame, df_wheresave: str, append: bool = False) -> pd.DataFrame:
         """
         Transform the input DataFrame.
 
@@ -52,6 +210,8 @@ class TransformData(ITransformData):
         -----------
         df (pd.DataFrame): The input DataFrame.
         df_wheresave (str): The path for save dataframe after clearing
+        append (bool): Append to an existing `df.csv` (incremental runs) instead of
+                       overwriting it. The delay summary then covers every saved row.
 
         Returns:
         --------
@@ -61,50 +221,273 @@ class TransformData(ITransformData):
             # Log initial transformation start
             PipelineTrack("Starting data transformation.")
 
-            # 1. Remove rows with 'On Time' status
-            df = df[df['status'] != 'On Time']
-            PipelineTrack(f"Filtered 'On Time' rows. Remaining rows: {len(df)}")
-
-            # 2. Convert 'date' and 'timeStamp' to datetime
-            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
-            df['timeStamp'] = pd.to_datetime(df['timeStamp'])
-            PipelineTrack("Converted 'date' and 'timeStamp' to datetime format.")
-
-            # 3. Add new columns
-            # Example: Calculate delays (convert 'status' like '1 min' to integer delay)
-            df['delay_minutes'] = df['status'].str.extract(r'(\d+)').astype(float)
-            df['day_of_week'] = df['date'].dt.day_name()
-            PipelineTrack("Added 'delay_minutes' and 'day_of_week' columns.")
-
-            # 4. Rename columns for consistency
-            df.rename(columns={
-                'next_station': 'nextStation',
-                'origin': 'originStation'
-            }, inplace=True)
-            PipelineTrack("Renamed columns for consistency.")
-
-            # 5. Aggregate Data 
-            delay_summary = df.groupby('train_id')['delay_minutes'].mean().reset_index()
-            delay_summary.rename(columns={'delay_minutes': 'avg_delay_minutes'}, inplace=True)
-            PipelineTrack("Aggregated data to calculate average delays by train_id.")
+            # 1-5. Row-level transformations
+            df, aggregate = self.transform_rows_and_aggregate(df)
+
+            df_path = self.frame_format.path(df_wheresave, "df")
+            merging = self.loader is not None and self.loader.merge
+            if self.aggregate_store is not None:
+                self._begin_aggregates(df_wheresave, append, merging)
+            if merging:
+                self.loader.load(df, TRAIN_STATUS_TABLE, replace=not append)
+                self._save_merged_rows(df, df_path, append)
+                delay_summary = self.loader.delay_summary()
+                PipelineTrack("Read average delays by train_id from the merged warehouse rows.")
+            elif self.aggregate_store is not None:
+                self.aggregate_store.fold(df)
+                self.frame_format.write(df, df_path, append=append)
+                delay_summary = self.aggregate_store.delay_summary()
+                PipelineTrack("Finalized average delays by train_id from the stored aggregates.")
+            elif append:
+                self.frame_format.write(df, df_path, append=True)
+                delay_summary = self.summarize_saved_rows(df_wheresave)
+            else:
+                # 6. Aggregate Data 
+                delay_summary = aggregate.finalize()
+                PipelineTrack("Aggregated data to calculate average delays by train_id.")
+                self.frame_format.write(df, df_path)
 
             # Log transformation completion
             PipelineTrack("Data transformation completed successfully.")
 
-            df.to_csv(f"{df_wheresave}/df.csv")
-            delay_summary.to_csv(f"{df_wheresave}/delay_summary.csv")
+            self.frame_format.write(delay_summary, self.frame_format.path(df_wheresave, "delay_summary"))
             PipelineTrack(f"Successfully Save new version database like csv file in {df_wheresave}.")
+            if self.loader is not None:
+                if not merging:
+                    self.loader.load(df, TRAIN_STATUS_TABLE, replace=not append)
+                self.loader.load(delay_summary, DELAY_SUMMARY_TABLE, replace=True)
+            if self.aggregate_store is not None:
+                self.aggregate_store.commit()
 
             return df, delay_summary
 
         except Exception as e:
+            if self.aggregate_store is not None:
+                self.aggregate_store.rollback()
             error_msg = f"Error during data transformation: {str(e)}"
             ErrorTrack(error_msg)
             raise Exception(error_msg) from e
 
+    def transform_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply the row-level transformations of `TRANSFORM_SPEC` (filter, types, new
+        columns, renames, projection), except the steps in `skip_steps` and those
+        whose results are not in `output_columns`.
+
+        These steps only look at one row at a time, so they give the same result
+        whether they run on the full table or on any chunk of it.
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): The input DataFrame (full table or a chunk).
+
+        Returns:
+        --------
+        pd.DataFrame: The transformed rows.
+        """
+        return TRANSFORM_SPEC.run(df, self.plan)
+
+    def transform_rows_and_aggregate(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, DelayAggregate]:
+        """
+        Apply the row-level transformations and aggregate the delays of the result.
+
+        Both transform paths go through this method, so a subclass can run the
+        steps and the aggregation elsewhere (see `ParallelTransformData`).
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): The input DataFrame (full table or a chunk).
+
+        Returns:
+        --------
+        Tuple[pd.DataFrame, DelayAggregate]: The transformed rows and their delay statistics.
+        """
+        df = self.transform_rows(df)
+        return df, DelayAggregate.from_frame(df)
+
+    def transform_stream(self, chunks: Iterable[pd.DataFrame], df_wheresave: str, append: bool = False) -> pd.DataFrame:
+        """
+        Transform the data chunk by chunk, appending each transformed chunk to `df.csv`.
+
+        Only one chunk is held in memory at a time. The per-train average delay is
+        built from a `DelayAggregate` updated per chunk, so `delay_summary.csv`
+        matches the one produced by `transform` on the full table.
+
+        Parameters:
+        -----------
+        chunks (Iterable[pd.DataFrame]): The input DataFrame split into chunks.
+        df_wheresave (str): The path for save dataframe after clearing
+        append (bool): Append to an existing `df.csv` (incremental runs) instead of
+                       overwriting it. The delay summary then covers every saved row.
+
+        Returns:
+        --------
+        pd.DataFrame: The delay summary (train_id, avg_delay_minutes).
+        """
+        try:
+            PipelineTrack("Starting chunked data transformation.")
+            df_path = self.frame_format.path(df_wheresave, "df")
+            aggregate = DelayAggregate()
+            rows_written = 0
+            merging = self.loader is not None and self.loader.merge
+            if self.aggregate_store is not None:
+                self._begin_aggregates(df_wheresave, append, merging)
+
+            for chunk_number, chunk in enumerate(chunks):
+                chunk, chunk_aggregate = self.transform_rows_and_aggregate(chunk)
+
+                # The first chunk replaces the saved rows, unless appending
+                first = not append and chunk_number == 0
+                if merging:
+                    self.loader.load(chunk, TRAIN_STATUS_TABLE, replace=first)
+                    self._save_merged_rows(chunk, df_path, append=not first)
+                    rows_written += len(chunk)
+                    continue
+                self.frame_format.write(chunk, df_path, append=not first)
+                if self.loader is not None:
+                    self.loader.load(chunk, TRAIN_STATUS_TABLE, replace=first)
+                if self.aggregate_store is not None:
+                    self.aggregate_store.fold(chunk)
+                elif not append:
+                    aggregate = aggregate.merge(chunk_aggregate)
+                rows_written += len(chunk)
+
+            if merging:
+                delay_summary = self.loader.delay_summary()
+                PipelineTrack("Read average delays by train_id from the merged warehouse rows.")
+            elif self.aggregate_store is not None:
+                delay_summary = self.aggregate_store.delay_summary()
+                PipelineTrack("Finalized average delays by train_id from the stored aggregates.")
+            elif append:
+                delay_summary = self.summarize_saved_rows(df_wheresave)
+            else:
+                delay_summary = aggregate.finalize()
+                PipelineTrack("Aggregated data to calculate average delays by train_id.")
+
+            self.frame_format.write(delay_summary, self.frame_format.path(df_wheresave, "delay_summary"))
+            if self.loader is not None:
+                self.loader.load(delay_summary, DELAY_SUMMARY_TABLE, replace=True)
+            PipelineTrack(f"Chunked data transformation completed. Rows written: {rows_written} to {df_wheresave}.")
+            if self.aggregate_store is not None:
+                self.aggregate_store.commit()
+
+            return delay_summary
+
+        except Exception as e:
+            if self.aggregate_store is not None:
+                self.aggregate_store.rollback()
+            error_msg = f"Error during chunked data transformation: {str(e)}"
+            ErrorTrack(error_msg)
+            raise Exception(error_msg) from e
+
+    def summarize_saved_rows(self, df_wheresave: str, chunk_rows: int = 500_000) -> pd.DataFrame:
+        """
+        Compute the per-train average delay over every row saved in `df.csv`.
+
+        The file is streamed in chunks and only `train_id` and `delay_minutes` are
+        read, so memory stays bounded however long the history grows.
+
+        Parameters:
+        -----------
+        df_wheresave (str): The directory holding `df.csv`.
+        chunk_rows (int): Rows read from `df.csv` at a time.
+
+        Returns:
+        --------
+        pd.DataFrame: The delay summary (train_id, avg_delay_minutes).
+        """
+        df_path = self.frame_format.path(df_wheresave, "df")
+        aggregate = DelayAggregate()
+        if os.path.exists(df_path):
+            for chunk in self.frame_format.iter_read(df_path, ['train_id', 'delay_minutes'], chunk_rows):
+                aggregate.update(chunk)
+        PipelineTrack(f"Aggregated average delays by train_id over all rows saved in {df_path}.")
+        return aggregate.finalize()
+
+    def _save_merged_rows(self, df: pd.DataFrame, df_path: str, append: bool) -> None:
+        """
+        Save the rows the loader's last merge wrote, so `df.csv` holds every key once.
+
+        Rows already stored as they are are not saved again. Rows that replaced
+        a stored row first drop its earlier version from `df.csv`, which
+        rewrites the file; an unchanged overlap only costs the merge.
+        """
+        merged = df.iloc[self.loader.merged_rows]
+        replaced = df.iloc[self.loader.replaced_rows]
+        if append and len(replaced) and os.path.exists(df_path):
+            key = list(MERGE_KEYS[TRAIN_STATUS_TABLE])
+            saved = parse_datetime_columns(self.frame_format.read(df_path, list(df.columns)))
+            stale = pd.MultiIndex.from_frame(saved[key]).isin(pd.MultiIndex.from_frame(replaced[key]))
+            self.frame_format.write(saved[~stale], df_path)
+            PipelineTrack(f"Dropped {int(stale.sum())} replaced rows from {df_path}.")
+        self.frame_format.write(merged, df_path, append=append)
+        PipelineTrack(f"Saved {len(merged)} of {len(df)} merged rows to {df_path}.")
+
+    def _begin_aggregates(self, df_wheresave: str, append: bool, merging: bool = False) -> None:
+        """
+        Open the run's transaction on the aggregate store.
+
+        A full run replaces the stored aggregates. The first appending run against
+        an empty store seeds it once from the rows already saved in `df.csv`.
+        Merging runs take the delay summary from the warehouse and empty the
+        store, so a later appending run seeds it again instead of adding to
+        totals that are missing the merged rows.
+        """
+        store = self.aggregate_store
+        store.begin(replace=not append or merging)
+        df_path = self.frame_format.path(df_wheresave, "df")
+        if append and not merging and store.is_empty() and os.path.exists(df_path):
+            columns = self.frame_format.columns(df_path)
+            usecols = [column for column in ('train_id', 'delay_minutes', 'timeStamp') if column in columns]
+            for chunk in self.frame_format.iter_read(df_path, usecols, 500_000):
+                # CSV timestamps are text; columnar ones are already typed
+                store.fold(parse_datetime_columns(chunk))
+            PipelineTrack(f"Seeded the stored delay aggregates from {df_path}.")
+
+def benchmark(rows: int = 10_000_000) -> None:
+    """
+    Compare the per-row regex/`dt.day_name` path with the distinct-value lookups.
+
+    Parameters:
+    -----------
+    rows (int): Rows in the synthetic status/date columns.
+
+    Returns:
+    --------
+    None
+    """
+    import time
+    from utils.synthetic_data import STATUSES
+
+    rng = np.random.default_rng(0)
+    status = pd.Series(np.array(STATUSES, dtype=object)[rng.integers(0, len(STATUSES), rows)])
+    status_category = status.astype("category")
+    dates = pd.Series(pd.Timestamp("2016-03-23") + pd.to_timedelta(np.sort(rng.integers(0, 365, rows)), unit="D"))
+
+    timings = {}
+    for label, compute in [
+        ("regex delay_minutes", lambda: status.str.extract(r'(\d+)')[0].astype(float)),
+        ("lookup delay_minutes", lambda: parse_delay_minutes(status)),
+        ("lookup delay_minutes (category)", lambda: parse_delay_minutes(status_category)),
+        ("dt.day_name day_of_week", lambda: dates.dt.day_name()),
+        ("lookup day_of_week", lambda: day_of_week(dates)),
+    ]:
+        start = time.perf_counter()
+        compute()
+        timings[label] = time.perf_counter() - start
+        print(f"{label:34s} {timings[label]:6.2f}s")
+
+    print(f"delay_minutes speedup: {timings['regex delay_minutes'] / timings['lookup delay_minutes']:.0f}x "
+          f"({timings['regex delay_minutes'] / timings['lookup delay_minutes (category)']:.0f}x on a categorical column)")
+    print(f"day_of_week speedup:   {timings['dt.day_name day_of_week'] / timings['lookup day_of_week']:.0f}x")
+
 
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    # Micro-benchmark: python src/databaseOperations/transform_database.py --benchmark [rows]
+    arguments = [argument for argument in sys.argv[1:] if argument != "--benchmark"]
+    benchmark(rows=int(arguments[0]) if arguments else 10_000_000)
 
-if __name__ == "__main__":
+elif __name__ == "__main__":
     # Load data (simulate the earlier query result)
     data = {
         'train_id': [778, 598, 279, 476, 474],
@@ -0,0 +1,215 @@
+import sys, os
+import pandas as pd
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+
+
+class TransformStep:
+    """
+    One row-level transform step and the columns it reads and writes.
+
+    The kind of step decides how columns flow through it:
+    - a plain step reads `inputs` and adds or overwrites `outputs`;
+    - a `columnwise` step converts each of its `outputs` in place from the same
+      column, so it only needs the ones that are still used afterwards;
+    - a renaming step maps `renames` (old -> new name);
+    - a `filters_rows` step drops rows, so it always runs and needs its `inputs`;
+    - the `selects_output` step keeps only the output columns.
+    """
+
+    def __init__(self, name: str, apply: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                 inputs: Iterable[str] = (), outputs: Iterable[str] = (),
+                 renames: Optional[Dict[str, str]] = None, columnwise: bool = False,
+                 filters_rows: bool = False, selects_output: bool = False) -> None:
+        """
+        Parameters:
+        -----------
+        name (str): The step name, as used by `skip_steps` and `pushdown_steps`.
+        apply (Optional[Callable]): DataFrame -> DataFrame. Columns it reads may be missing
+                                    when they were pruned or never extracted.
+        inputs (Iterable[str]): Columns read.
+        outputs (Iterable[str]): Columns written.
+        renames (Optional[Dict[str, str]]): Old -> new column names.
+        columnwise (bool): Every output is converted in place from itself.
+        filters_rows (bool): The step removes rows.
+        selects_output (bool): The step keeps only the output columns.
+        """
+        self.name = name
+        self.apply = apply
+        self.inputs = frozenset(inputs)
+        self.outputs = frozenset(outputs)
+        self.renames = dict(renames or {})
+        self.columnwise = columnwise
+        self.filters_rows = filters_rows
+        self.selects_output = selects_output
+
+    def needs(self, live: FrozenSet[str]) -> Optional[FrozenSet[str]]:
+        """
+        Columns needed before the step when `live` is used after it.
+
+        Parameters:
+        -----------
+        live (FrozenSet[str]): Columns used after the step.
+
+        Returns:
+        --------
+        Optional[FrozenSet[str]]: The columns needed before it, or None if the step is dead.
+        """
+        if self.selects_output:
+            return live
+        if self.renames:
+            if not live & set(self.renames.values()):
+                return None
+            original = {new: old for old, new in self.renames.items()}
+            return frozenset(original.get(column, column) for column in live)
+        if self.filters_rows:
+            return live | self.inputs
+        if not live & self.outputs:
+            return None
+        if self.columnwise:
+            return live
+        return (live - self.outputs) | self.inputs
+
+    def __repr__(self) -> str:
+        return f"TransformStep({self.name!r})"
+
+
+class TransformPlan:
+    """
+    The steps a `TransformSpec` runs for given output columns, with the columns kept around them.
+
+    `input_columns` are the columns read from the source (None = all), and every
+    entry of `steps` is (step, columns kept after it), None meaning no pruning.
+    """
+
+    def __init__(self, steps: List[Tuple[TransformStep, Optional[FrozenSet[str]]]],
+                 input_columns: Optional[FrozenSet[str]]) -> None:
+        self.steps = steps
+        self.input_columns = input_columns
+
+    @property
+    def step_names(self) -> List[str]:
+        return [step.name for step, _ in self.steps]
+
+    def __repr__(self) -> str:
+        columns = sorted(self.input_columns) if self.input_columns is not None else "all"
+        return f"TransformPlan(steps={self.step_names}, input_columns={columns})"
+
+
+class TransformSpec:
+    """
+    Declarative list of row-level transform steps with column-level dependencies.
+
+    From the output columns, `plan` works backwards through the steps to find
+    the steps whose results are used, the columns each of them still needs, and
+    so the minimal set of columns to read from the source. `run` then drops
+    every column as soon as no later step or output uses it, so less data is
+    read, copied by the filter and written to `df.csv`.
+    """
+
+    def __init__(self, steps: Iterable[TransformStep]) -> None:
+        """
+        Parameters:
+        -----------
+        steps (Iterable[TransformStep]): The steps, in the order they run.
+
+        Raises:
+        -------
+        ValueError: If two steps have the same name.
+        """
+        self.steps = list(steps)
+        names = [step.name for step in self.steps]
+        if len(set(names)) != len(names):
+            error_msg = f"Transform step names must be unique: {names}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(step.name for step in self.steps)
+
+    def plan(self, output_columns: Optional[Iterable[str]] = None,
+             skip_steps: Iterable[str] = ()) -> TransformPlan:
+        """
+        Choose the steps to run and the columns to keep around each of them.
+
+        Parameters:
+        -----------
+        output_columns (Optional[Iterable[str]]): Final columns (None = keep all, no pruning).
+        skip_steps (Iterable[str]): Steps already applied elsewhere, e.g. in the extraction query.
+
+        Raises:
+        -------
+        ValueError: For unknown steps in `skip_steps`.
+
+        Returns:
+        --------
+        TransformPlan: The live steps, in order, and the columns to read.
+        """
+        skip_steps = set(skip_steps)
+        unknown = skip_steps - set(self.names)
+        if unknown:
+            error_msg = f"Unknown transform steps: {sorted(unknown)}. Known steps: {list(self.names)}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+
+        steps = [step for step in self.steps if step.name not in skip_steps]
+        if output_columns is None:
+            return TransformPlan([(step, None) for step in steps if not step.selects_output], None)
+
+        live = frozenset(output_columns)
+        planned = []
+        for step in reversed(steps):
+            needed = step.needs(live)
+            if needed is None:
+                continue
+            planned.append((step, live))
+            live = needed
+        planned.reverse()
+        return TransformPlan(planned, live)
+
+    def run(self, df: pd.DataFrame, plan: TransformPlan) -> pd.DataFrame:
+        """
+        Run the planned steps, dropping dead columns before the first step and after every step.
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): The source rows (full table or a chunk).
+        plan (TransformPlan): The plan from `plan`.
+
+        Returns:
+        --------
+        pd.DataFrame: The transformed rows.
+        """
+        df = prune_columns(df, plan.input_columns)
+        for step, keep in plan.steps:
+            if step.apply is not None:
+                df = step.apply(df)
+            df = prune_columns(df, keep)
+        return df
+
+
+def prune_columns(df: pd.DataFrame, keep: Optional[FrozenSet[str]]) -> pd.DataFrame:
+    """
+    Drop the columns of `df` that are not in `keep`, keeping the column order.
+
+    Parameters:
+    -----------
+    df (pd.DataFrame): The frame.
+    keep (Optional[FrozenSet[str]]): Columns to keep (None = all).
+
+    Returns:
+    --------
+    pd.DataFrame: `df` itself if nothing is dropped, else the kept columns.
+    """
+    if keep is None:
+        return df
+    kept = [column for column in df.columns if column in keep]
+    if len(kept) == len(df.columns):
+        return df
+    PipelineTrack(f"Dropped unused columns: {[column for column in df.columns if column not in keep]}")
+    return df[kept]
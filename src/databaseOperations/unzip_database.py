@@ -1,6 +1,10 @@
 import os, sys, zipfile
+import json
+import time
+import shutil
 from pathlib import Path
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Define MAIN_DIR to point to the project root directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
@@ -8,6 +12,172 @@ sys.path.append(MAIN_DIR)
 
 from utils import ErrorTrack, PipelineTrack
 
+# Bytes copied per read/write when extracting a member.
+COPY_BUFFER_SIZE = 16 * 1024 * 1024
+# Extraction manifest, kept in the extraction directory.
+EXTRACTION_MANIFEST = ".extract_manifest.json"
+
+def safe_member_path(extract_to: str, member_name: str) -> str:
+    """
+    Destination of an archive member, refusing names that escape `extract_to`.
+
+    Parameters:
+    -----------
+    extract_to (str): The extraction directory.
+    member_name (str): The member name as stored in the archive.
+
+    Raises:
+    -------
+    ValueError: If the name is absolute or climbs out of `extract_to` ("../").
+
+    Returns:
+    --------
+    str: The absolute destination path.
+    """
+    root = os.path.realpath(extract_to)
+    destination = os.path.realpath(os.path.join(root, member_name.replace("\\", "/")))
+    if os.path.isabs(member_name) or os.path.commonpath([root, destination]) != root:
+        error_msg = f"Refusing to extract outside {extract_to}: {member_name}"
+        ErrorTrack(error_msg)
+        raise ValueError(error_msg)
+    return destination
+
+
+class ExtractionManifest:
+    """
+    What was extracted last time: for every member its CRC-32, size and the
+    size and mtime of the file it was written to.
+
+    Stored as JSON in the extraction directory (`.extract_manifest.json`).
+    """
+
+    def __init__(self, manifest_path: str) -> None:
+        self.manifest_path = manifest_path
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Load the manifest.
+
+        Returns:
+        --------
+        Dict[str, Any]: Member name to its entry, or an empty dict if the file is missing or unreadable.
+        """
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            PipelineTrack(f"Ignoring unreadable extraction manifest: {self.manifest_path}")
+            return {}
+
+    def save(self, manifest: Dict[str, Any]) -> None:
+        """
+        Persist the manifest, replacing the file atomically.
+
+        Parameters:
+        -----------
+        manifest (Dict[str, Any]): The manifest to store.
+
+        Returns:
+        --------
+        None
+        """
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def member_current(entry: Optional[Dict[str, Any]], info: zipfile.ZipInfo, destination: str) -> bool:
+    """
+    Whether `destination` still holds exactly what `info` would extract.
+
+    Parameters:
+    -----------
+    entry (Optional[Dict[str, Any]]): The manifest entry of the last extraction.
+    info (zipfile.ZipInfo): The member in the current archive.
+    destination (str): Where the member is extracted to.
+
+    Returns:
+    --------
+    bool: True if the member can be skipped.
+    """
+    if not entry or entry.get("crc") != info.CRC or entry.get("size") != info.file_size:
+        return False
+    if entry.get("path") != destination or not os.path.exists(destination):
+        return False
+    stat = os.stat(destination)
+    return stat.st_size == info.file_size and stat.st_mtime_ns == entry.get("mtime_ns")
+
+
+def select_members(zip_ref: zipfile.ZipFile, members: Optional[Iterable[str]]) -> List[zipfile.ZipInfo]:
+    """
+    The archive members matching a member filter.
+
+    Parameters:
+    -----------
+    zip_ref (zipfile.ZipFile): The open archive.
+    members (Optional[Iterable[str]]): Names or base names to keep. None = all members.
+
+    Raises:
+    -------
+    KeyError: If a requested member is not in the archive.
+
+    Returns:
+    --------
+    List[zipfile.ZipInfo]: The matching members, in archive order.
+    """
+    infos = zip_ref.infolist()
+    if members is None:
+        return infos
+    wanted = set(members)
+    selected = [info for info in infos
+                if info.filename in wanted or os.path.basename(info.filename.rstrip("/")) in wanted]
+    found = {info.filename for info in selected} | {os.path.basename(info.filename.rstrip("/")) for info in selected}
+    missing = wanted - found
+    if missing:
+        error_msg = f"Members not found in {zip_ref.filename}: {sorted(missing)}. Archive contains: {zip_ref.namelist()}"
+        ErrorTrack(error_msg)
+        raise KeyError(error_msg)
+    return selected
+
+
+def extract_member(zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, destination: str,
+                   buffer_size: int = COPY_BUFFER_SIZE) -> float:
+    """
+    Copy one member to `destination` through a `.part` file.
+
+    `zipfile` checks the member's CRC-32 when the copy reaches its end, so a
+    corrupt member raises `zipfile.BadZipFile` before it replaces anything.
+
+    Parameters:
+    -----------
+    zip_ref (zipfile.ZipFile): The open archive.
+    info (zipfile.ZipInfo): The member.
+    destination (str): The extracted file path (see `safe_member_path`).
+    buffer_size (int): Bytes copied per read/write.
+
+    Returns:
+    --------
+    float: Seconds the extraction took.
+    """
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    part_path = f"{destination}.part"
+    try:
+        with zip_ref.open(info) as source, open(part_path, 'wb') as target:
+            shutil.copyfileobj(source, target, buffer_size)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    os.replace(part_path, destination)
+    seconds = time.perf_counter() - start
+    PipelineTrack(f"Extracted {info.filename} ({info.file_size / 1024 ** 2:.1f} MiB) to {destination} "
+                  f"in {seconds:.2f}s ({info.file_size / 1024 ** 2 / max(seconds, 1e-9):.1f} MiB/s)")
+    return seconds
+
 
 class IUnzipFile(ABC):
     """
@@ -15,7 +185,7 @@ class IUnzipFile(ABC):
     """
 
     @abstractmethod
-    def unzip(self, zip_path: str, extract_to: str) -> None:
+    def unzip(self, zip_path: str, extract_to: str, members: Optional[Iterable[str]] = None) -> List[str]:
         """
         Abstract method to unzip a file.
 
@@ -23,10 +193,11 @@ class IUnzipFile(ABC):
         -----------
         zip_path (str): The path to the zip file.
         extract_to (str): The directory where the contents should be extracted.
+        members (Optional[Iterable[str]]): Only extract these members (names or base names).
 
         Returns:
         --------
-        None
+        List[str]: The members that were written.
         """
         pass
 
@@ -34,9 +205,23 @@ class IUnzipFile(ABC):
 class UnzipFile(IUnzipFile):
     """
     Concrete implementation of IUnzipFile for unzipping files.
+
+    Members whose CRC-32 and size match the last extraction, and whose extracted
+    file has not been touched since, are skipped, so re-running on the same
+    archive does no extraction I/O. Members are written to a `.part` file with
+    large buffered copies and moved into place once `zipfile` has verified their
+    CRC, so an interrupted run never leaves a half-written database behind.
     """
 
-    def unzip(self, zip_path: str, extract_to: str) -> None:
+    def __init__(self, buffer_size: int = COPY_BUFFER_SIZE) -> None:
+        """
+        Parameters:
+        -----------
+        buffer_size (int): Bytes copied per read/write while extracting.
+        """
+        self.buffer_size = buffer_size
+
+    def unzip(self, zip_path: str, extract_to: str, members: Optional[Iterable[str]] = None) -> List[str]:
         """
         Unzips a file to the specified directory.
 
@@ -44,17 +229,20 @@ class UnzipFile(IUnzipFile):
         -----------
         zip_path (str): The path to the zip file to be extracted.
         extract_to (str): The directory where the contents should be extracted.
+        members (Optional[Iterable[str]]): Only extract these members, by name or base
+                                           name (e.g. ["database.sqlite"]). None = all.
 
         Raises:
         -------
         FileNotFoundError: If the zip file does not exist.
         NotADirectoryError: If the extract_to path is not a directory.
+        KeyError: If `members` matches nothing in the archive.
         zipfile.BadZipFile: If the file is not a valid zip file.
         Exception: For any other unforeseen errors during extraction.
 
         Returns:
         --------
-        None
+        List[str]: The members that were written; empty when everything was current.
         """
         # Validate parameters
         if not isinstance(zip_path, str):
@@ -80,21 +268,55 @@ class UnzipFile(IUnzipFile):
             raise NotADirectoryError(error_msg)
 
         try:
-            # Attempt to open and extract the zip file
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:                
-                # Extract all contents to the specified directory
-                zip_ref.extractall(path=extract_to)
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                infos = select_members(zip_ref, members)
+                manifest_store = ExtractionManifest(os.path.join(extract_to, EXTRACTION_MANIFEST))
+                manifest = manifest_store.load()
+
+                pending = []
+                for info in infos:
+                    destination = safe_member_path(extract_to, info.filename)
+                    if info.is_dir():
+                        os.makedirs(destination, exist_ok=True)
+                    elif member_current(manifest.get(info.filename), info, destination):
+                        PipelineTrack(f"Unchanged, not extracting: {info.filename}")
+                    else:
+                        pending.append((info, destination))
+
+                written = []
+                for info, destination in self._extract_members(zip_path, zip_ref, pending):
+                    manifest[info.filename] = {
+                        "crc": info.CRC,
+                        "size": info.file_size,
+                        "path": destination,
+                        "mtime_ns": os.stat(destination).st_mtime_ns,
+                    }
+                    manifest_store.save(manifest)
+                    written.append(info.filename)
 
-        except zipfile.BadZipFile:
-            error_msg = f"The file is not a valid zip file or is corrupted: {zip_path}"
+            PipelineTrack(f"Extracted {len(written)} of {len(infos)} members from {zip_path}")
+            return written
+
+        except zipfile.BadZipFile as e:
+            error_msg = f"The file is not a valid zip file or is corrupted: {zip_path} ({e})"
             ErrorTrack(error_msg)
             raise zipfile.BadZipFile(error_msg)
 
+        except KeyError:
+            raise
+
         except Exception as e:
             error_msg = f"An unexpected error occurred during extraction: {str(e)}"
             ErrorTrack(error_msg)
             raise Exception(error_msg) from e
 
+    def _extract_members(self, zip_path: str, zip_ref: zipfile.ZipFile,
+                         pending: List[Tuple[zipfile.ZipInfo, str]]) -> Iterator[Tuple[zipfile.ZipInfo, str]]:
+        """Extract the pending members one after another, yielding each once it is in place."""
+        for info, destination in pending:
+            extract_member(zip_ref, info, destination, self.buffer_size)
+            yield info, destination
+
 
 if __name__ == "__main__":
     zip_path="/workspaces/Data-Wharehouse-ETL/database/archive/database_v1.zip"
@@ -0,0 +1,420 @@
+import sqlite3, sys, os
+import gzip
+import shutil
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Tuple
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+from utils.datetime_tools import TIMESTAMP_FORMAT
+
+# Catalog of the partition files, kept in the main warehouse file.
+CATALOG_TABLE = "warehouse_partitions"
+
+# Partition of rows without a timestamp.
+UNDATED = "undated"
+
+# Partition columns stored as epoch seconds; others hold 'YYYY-MM-DD HH:MM:SS' text.
+EPOCH_COLUMNS = ("event_time",)
+
+# Partition states: attached by loads and queries, or compressed into the archive directory.
+LIVE, ARCHIVED = "live", "archived"
+
+
+def partition_months(values: pd.Series) -> np.ndarray:
+    """
+    Month ('YYYY_MM') of every row, from datetimes, epoch seconds or timestamp strings.
+
+    Parameters:
+    -----------
+    values (pd.Series): The partition column.
+
+    Returns:
+    --------
+    np.ndarray: Object array of months, `UNDATED` for missing values.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        values = pd.to_datetime(values, unit="s")
+    elif not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, format="ISO8601")
+    # Distinct months only: one strftime per month, not per row
+    codes, uniques = pd.factorize(values.dt.to_period("M"))
+    lookup = np.append(np.asarray(uniques.strftime("%Y_%m"), dtype=object), UNDATED)
+    return lookup[codes]
+
+
+def month_bounds(month: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """First instant of `month` and of the month after it."""
+    start = pd.Timestamp(f"{month.replace('_', '-')}-01")
+    return start, start + pd.offsets.MonthBegin(1)
+
+
+class WarehousePartitions:
+    """
+    Monthly partitions of the warehouse row table, one SQLite file per month.
+
+    The main warehouse file keeps the dimensions, summaries and rollups, plus a
+    catalog of the partition files (month, path, rows, state). A partition is
+    ATTACHed only while a load or a query needs it, so a month can be vacuumed,
+    backed up, archived or restored on its own, and a date-bounded query opens
+    only the files of the months it overlaps.
+    """
+
+    def __init__(self, partition_dir: str, archive_dir: Optional[str] = None) -> None:
+        """
+        Parameters:
+        -----------
+        partition_dir (str): Directory of the live partition files.
+        archive_dir (Optional[str]): Directory of archived (gzip-compressed) partitions.
+                                     Defaults to `<partition_dir>/archive`.
+        """
+        self.partition_dir = partition_dir
+        self.archive_dir = archive_dir or os.path.join(partition_dir, "archive")
+
+    def create_catalog(self, connection: sqlite3.Connection) -> None:
+        """
+        Create the partition catalog in the main warehouse file if it does not exist.
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The main warehouse connection.
+
+        Returns:
+        --------
+        None
+        """
+        connection.execute(f'CREATE TABLE IF NOT EXISTS "{CATALOG_TABLE}" ('
+                           f'table_name TEXT NOT NULL, month TEXT NOT NULL, path TEXT NOT NULL, '
+                           f'row_count INTEGER NOT NULL DEFAULT 0, state TEXT NOT NULL DEFAULT \'{LIVE}\', '
+                           f'PRIMARY KEY (table_name, month))')
+
+    def path(self, table: str, month: str) -> str:
+        """Path of the live partition file of `table` for `month`."""
+        return os.path.join(self.partition_dir, f"{table}_{month}.sqlite")
+
+    def attach(self, connection: sqlite3.Connection, table: str, month: str) -> str:
+        """
+        Attach the partition of `month` (created if new) and return its schema name.
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The main warehouse connection, outside a transaction.
+        table (str): The partitioned table.
+        month (str): The month, 'YYYY_MM' or `UNDATED`.
+
+        Raises:
+        -------
+        ValueError: If the partition is archived (see `restore`).
+
+        Returns:
+        --------
+        str: The schema name of the attached partition.
+        """
+        entry = connection.execute(f'SELECT state FROM "{CATALOG_TABLE}" WHERE table_name = ? AND month = ?',
+                                   (table, month)).fetchone()
+        if entry is not None and entry[0] == ARCHIVED:
+            error_msg = f"Partition {table} {month} is archived; restore it before loading or querying it."
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+        os.makedirs(self.partition_dir, exist_ok=True)
+        path = self.path(table, month)
+        schema = f"p_{month}"
+        connection.execute("ATTACH DATABASE ? AS ?", (path, schema))
+        connection.execute(f'PRAGMA "{schema}".journal_mode = WAL')
+        if entry is None:
+            connection.execute(f'INSERT INTO "{CATALOG_TABLE}" (table_name, month, path) VALUES (?, ?, ?)',
+                               (table, month, path))
+        return schema
+
+    def detach(self, connection: sqlite3.Connection, schema: str) -> None:
+        """Detach a partition attached by `attach`."""
+        connection.execute("DETACH DATABASE ?", (schema,))
+
+    def update_row_count(self, connection: sqlite3.Connection, table: str, month: str, schema: str) -> int:
+        """
+        Record the rows of an attached partition in the catalog.
+
+        Returns:
+        --------
+        int: The partition's rows.
+        """
+        rows = connection.execute(f'SELECT COUNT(*) FROM "{schema}"."{table}"').fetchone()[0]
+        connection.execute(f'UPDATE "{CATALOG_TABLE}" SET row_count = ? WHERE table_name = ? AND month = ?',
+                           (rows, table, month))
+        return rows
+
+    def months(self, connection: sqlite3.Connection, table: str, start: Optional[str] = None,
+               end: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """
+        Partitions of `table` that overlap [start, end).
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The main warehouse connection.
+        table (str): The partitioned table.
+        start (Optional[str]): First instant (inclusive), None = unbounded.
+        end (Optional[str]): Last instant (exclusive), None = unbounded.
+
+        Returns:
+        --------
+        List[Tuple[str, str, str]]: (month, path, state), ordered by month. Undated rows
+                                    are only part of unbounded ranges.
+        """
+        entries = connection.execute(f'SELECT month, path, state FROM "{CATALOG_TABLE}" '
+                                     f'WHERE table_name = ? ORDER BY month', (table,)).fetchall()
+        if start is None and end is None:
+            return entries
+        overlapping = []
+        for month, path, state in entries:
+            if month == UNDATED:
+                continue
+            first, after = month_bounds(month)
+            if (start is None or after > pd.Timestamp(start)) and (end is None or first < pd.Timestamp(end)):
+                overlapping.append((month, path, state))
+        return overlapping
+
+    def drop(self, connection: sqlite3.Connection, table: str) -> None:
+        """
+        Delete every live and archived partition file of `table` and its catalog entries.
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The main warehouse connection, outside a transaction.
+        table (str): The partitioned table.
+
+        Returns:
+        --------
+        None
+        """
+        for month, path, _ in self.months(connection, table):
+            for file_path in (path, f"{path}-wal", f"{path}-shm"):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+        connection.execute(f'DELETE FROM "{CATALOG_TABLE}" WHERE table_name = ?', (table,))
+        PipelineTrack(f"Dropped the partitions of {table}")
+
+    def compact(self, connection: sqlite3.Connection, table: str, month: str) -> int:
+        """
+        VACUUM one live partition file, without touching the rest of the warehouse.
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The main warehouse connection (for the catalog).
+        table (str): The partitioned table.
+        month (str): The month.
+
+        Returns:
+        --------
+        int: Bytes freed.
+        """
+        path = self._live_path(connection, table, month)
+        before = os.path.getsize(path)
+        partition = sqlite3.connect(path, isolation_level=None)
+        try:
+            partition.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            partition.execute("VACUUM")
+            partition.execute("PRAGMA optimize")
+        finally:
+            partition.close()
+        freed = before - os.path.getsize(path)
+        PipelineTrack(f"Compacted partition {table} {month}: {freed / 2**20:.1f} MiB freed")
+        return freed
+
+    def archive(self, connection: sqlite3.Connection, table: str, month: str) -> str:
+        """
+        Move one live partition into the archive directory as a compacted, gzip-compressed copy.
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The main warehouse connection, outside a transaction.
+        table (str): The partitioned table.
+        month (str): The month.
+
+        Returns:
+        --------
+        str: Path of the archive file.
+        """
+        path = self._live_path(connection, table, month)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archive_path = os.path.join(self.archive_dir, f"{os.path.basename(path)}.gz")
+        compacted = f"{archive_path}.tmp"
+        if os.path.exists(compacted):
+            os.remove(compacted)
+        partition = sqlite3.connect(path, isolation_level=None)
+        try:
+            partition.execute("VACUUM INTO ?", (compacted,))
+        finally:
+            partition.close()
+        with open(compacted, "rb") as source, gzip.open(archive_path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(compacted)
+        connection.execute(f'UPDATE "{CATALOG_TABLE}" SET path = ?, state = ? WHERE table_name = ? AND month = ?',
+                           (archive_path, ARCHIVED, table, month))
+        for file_path in (path, f"{path}-wal", f"{path}-shm"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        PipelineTrack(f"Archived partition {table} {month} to {archive_path}")
+        return archive_path
+
+    def restore(self, connection: sqlite3.Connection, table: str, month: str) -> str:
+        """
+        Bring an archived partition back into the live directory.
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The main warehouse connection, outside a transaction.
+        table (str): The partitioned table.
+        month (str): The month.
+
+        Raises:
+        -------
+        ValueError: If the partition is not archived.
+
+        Returns:
+        --------
+        str: Path of the live partition file.
+        """
+        entry = connection.execute(f'SELECT path, state FROM "{CATALOG_TABLE}" WHERE table_name = ? AND month = ?',
+                                   (table, month)).fetchone()
+        if entry is None or entry[1] != ARCHIVED:
+            error_msg = f"Partition {table} {month} is not archived."
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+        path = self.path(table, month)
+        os.makedirs(self.partition_dir, exist_ok=True)
+        with gzip.open(entry[0], "rb") as source, open(path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        connection.execute(f'UPDATE "{CATALOG_TABLE}" SET path = ?, state = ? WHERE table_name = ? AND month = ?',
+                           (path, LIVE, table, month))
+        os.remove(entry[0])
+        PipelineTrack(f"Restored partition {table} {month} to {path}")
+        return path
+
+    def archive_older_than(self, connection: sqlite3.Connection, table: str, keep_months: int) -> List[str]:
+        """
+        Archive the live partitions more than `keep_months` months older than the newest one.
+
+        Parameters:
+        -----------
+        connection (sqlite3.Connection): The main warehouse connection, outside a transaction.
+        table (str): The partitioned table.
+        keep_months (int): Live months to keep, counting the newest.
+
+        Returns:
+        --------
+        List[str]: The archived months.
+        """
+        live = [month for month, _, state in self.months(connection, table) if state == LIVE and month != UNDATED]
+        if len(live) <= keep_months:
+            return []
+        newest = pd.Period(live[-1].replace("_", "-"), freq="M")
+        archived = [month for month in live if (newest - pd.Period(month.replace("_", "-"), freq="M")).n >= keep_months]
+        for month in archived:
+            self.archive(connection, table, month)
+        return archived
+
+    def _live_path(self, connection: sqlite3.Connection, table: str, month: str) -> str:
+        entry = connection.execute(f'SELECT path, state FROM "{CATALOG_TABLE}" WHERE table_name = ? AND month = ?',
+                                   (table, month)).fetchone()
+        if entry is None or entry[1] != LIVE:
+            error_msg = f"No live partition {table} {month}."
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+        return entry[0]
+
+
+class PartitionedWarehouse:
+    """
+    Read-only query layer over a partitioned warehouse table.
+
+    A query names the rows of the table as `{rows}`. Only the partitions that
+    overlap the requested [start, end) range are attached, and `{rows}` becomes
+    the UNION ALL of their rows inside the range, so the cost of a date-bounded
+    query follows the range, not the whole history. Dimension and rollup
+    tables of the main file can be joined as usual.
+    """
+
+    def __init__(self, db_path: str, partitions: WarehousePartitions, table: str, partition_column: str) -> None:
+        """
+        Parameters:
+        -----------
+        db_path (str): Path to the main warehouse file.
+        partitions (WarehousePartitions): The partition directories.
+        table (str): The partitioned table, e.g. `train_status` or `fact_delay`.
+        partition_column (str): Its timestamp column (`timeStamp` text or `event_time` epoch seconds).
+        """
+        self.db_path = db_path
+        self.partitions = partitions
+        self.table = table
+        self.partition_column = partition_column
+
+    def query(self, sql: str, start: Optional[str] = None, end: Optional[str] = None,
+              parameters: Tuple = ()) -> pd.DataFrame:
+        """
+        Run `sql` over the rows in [start, end).
+
+        Parameters:
+        -----------
+        sql (str): The query, with `{rows}` where the table's rows are read.
+        start (Optional[str]): First instant (inclusive), None = unbounded.
+        end (Optional[str]): Last instant (exclusive), None = unbounded.
+        parameters (Tuple): Parameters of `sql`.
+
+        Raises:
+        -------
+        ValueError: If the range covers archived partitions or more partitions than
+                    SQLite can attach at once.
+
+        Returns:
+        --------
+        pd.DataFrame: The query result.
+        """
+        connection = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            months = self.partitions.months(connection, self.table, start, end)
+            archived = [month for month, _, state in months if state == ARCHIVED]
+            if archived:
+                error_msg = f"Partitions {archived} of {self.table} are archived; restore them to query {start}..{end}."
+                ErrorTrack(error_msg)
+                raise ValueError(error_msg)
+            limit = connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) if hasattr(connection, "getlimit") else 10
+            if len(months) > limit:
+                error_msg = (f"{start}..{end} covers {len(months)} partitions of {self.table}; at most {limit} "
+                             f"can be attached at once. Narrow the range or read the rollups.")
+                ErrorTrack(error_msg)
+                raise ValueError(error_msg)
+
+            selects = []
+            for month, path, _ in months:
+                schema = f"p_{month}"
+                connection.execute("ATTACH DATABASE ? AS ?", (f"file:{path}?mode=ro", schema))
+                selects.append(self._select(schema, month, start, end))
+            if not selects:
+                # No partition in range: an empty row set with no columns
+                selects.append("SELECT NULL WHERE 0")
+            rows = " UNION ALL ".join(selects)
+            PipelineTrack(f"Querying {len(months)} partitions of {self.table} for {start}..{end}")
+            return pd.read_sql_query(sql.format(rows=f"({rows})"), connection, params=parameters)
+        finally:
+            connection.close()
+
+    def _select(self, schema: str, month: str, start: Optional[str], end: Optional[str]) -> str:
+        """SELECT of one partition's rows, filtered only where the range cuts into the month."""
+        first, after = month_bounds(month) if month != UNDATED else (None, None)
+        conditions = []
+        column = f'"{self.partition_column}"'
+        if start is not None and (first is None or pd.Timestamp(start) > first):
+            conditions.append(f"{column} >= {self._bound(pd.Timestamp(start))}")
+        if end is not None and (after is None or pd.Timestamp(end) < after):
+            conditions.append(f"{column} < {self._bound(pd.Timestamp(end))}")
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f'SELECT * FROM "{schema}"."{self.table}"{where}'
+
+    def _bound(self, instant: pd.Timestamp) -> str:
+        """A range bound as an SQL literal in the stored format of the partition column."""
+        if self.partition_column in EPOCH_COLUMNS:
+            return str(int(instant.timestamp()))
+        return f"'{instant.strftime(TIMESTAMP_FORMAT)}'"
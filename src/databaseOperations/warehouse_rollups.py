@@ -0,0 +1,223 @@
+import sqlite3, sys, os
+import pandas as pd
+from typing import Dict, Iterable, Optional, Tuple
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+
+# Rollup table -> group columns. Every rollup stores the mergeable delay totals
+# (`ROLLUP_MEASURES`) of its groups, so the rows of a load are added to it (and
+# rows replaced by a merge load subtracted) without rescanning the warehouse.
+ROLLUPS = {
+    "rollup_train_hour": ("train_id", "hour"),
+    "rollup_origin_station": ("originStation",),
+    "rollup_next_station": ("nextStation",),
+    "rollup_weekday_hour": ("day_of_week", "hour"),
+    "rollup_direction_hour": ("direction", "time_bucket"),
+    # Delays are whole minutes, so counts per value keep the exact distribution
+    "rollup_weekday_delay": ("day_of_week", "delay_minutes"),
+}
+ROLLUP_MEASURES = ("row_count", "delay_count", "delay_sum", "delay_sumsq")
+
+# Rollup -> group column -> value stored for rows where it is missing, so those rows
+# still count: the per-train totals of `rollup_train_hour` then include rows without
+# a timestamp. Other rollups leave rows with a missing group value out.
+MISSING_GROUPS = {"rollup_train_hour": {"hour": -1}}
+
+# Column types of the group columns. NUMERIC stores '778' and 778 as the same train.
+GROUP_TYPES = {"train_id": "NUMERIC", "hour": "INTEGER", "delay_minutes": "REAL"}
+
+# Row-level columns a rollup source provides, see `flat_rollup_source`.
+SOURCE_COLUMNS = ("train_id", "originStation", "nextStation", "direction", "day_of_week",
+                  "hour", "time_bucket", "delay_minutes")
+
+DELTA_TABLE = "rollup_delta"
+
+
+def flat_rollup_source(columns: Iterable[str]) -> str:
+    """
+    Rollup source over rows with the columns of `train_status`.
+
+    Parameters:
+    -----------
+    columns (Iterable[str]): Columns of the row table; missing source columns are NULL
+                             (rollups grouped on them stay empty).
+
+    Returns:
+    --------
+    str: SELECT over a `{rows}` placeholder (a SELECT of row-table rows) that
+         returns `SOURCE_COLUMNS`.
+    """
+    columns = set(columns)
+    expressions = {column: f'"{column}"' if column in columns else "NULL"
+                   for column in ("train_id", "originStation", "nextStation", "direction",
+                                  "day_of_week", "delay_minutes")}
+    if "timeStamp" in columns:
+        expressions["hour"] = "CAST(strftime('%H', \"timeStamp\") AS INTEGER)"
+        expressions["time_bucket"] = "strftime('%Y-%m-%d %H:00', \"timeStamp\")"
+    else:
+        expressions["hour"] = expressions["time_bucket"] = "NULL"
+    selected = ", ".join(f"{expressions[column]} AS {column}" for column in SOURCE_COLUMNS)
+    return f"SELECT {selected} FROM ({{rows}})"
+
+
+def create_rollup_tables(connection: sqlite3.Connection) -> None:
+    """
+    Create the rollup tables if they do not exist.
+
+    They are WITHOUT ROWID tables clustered on their group columns, so the
+    primary key is a covering index for the upserts and for ordered reads.
+
+    Parameters:
+    -----------
+    connection (sqlite3.Connection): The warehouse connection.
+
+    Returns:
+    --------
+    None
+    """
+    measures = ", ".join(f"{measure} {'INTEGER' if measure.endswith('count') else 'REAL'} NOT NULL"
+                         for measure in ROLLUP_MEASURES)
+    for table, groups in ROLLUPS.items():
+        columns = ", ".join(f'"{column}" {GROUP_TYPES.get(column, "TEXT")} NOT NULL' for column in groups)
+        keys = ", ".join(f'"{column}"' for column in groups)
+        connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns}, {measures}, '
+                           f'PRIMARY KEY ({keys})) WITHOUT ROWID')
+
+
+def refresh_rollups(connection: sqlite3.Connection, source: str, added_rows: str,
+                    removed_rows: Optional[str] = None) -> int:
+    """
+    Add rows to the rollups and subtract removed ones, in the caller's transaction.
+
+    The source rows are read once into a temporary delta table (with +1 for
+    added and -1 for removed rows); every rollup then upserts its group totals
+    of the delta, and groups left without rows are deleted. The cost is in
+    proportion to the rows passed in, not to the warehouse.
+
+    Parameters:
+    -----------
+    connection (sqlite3.Connection): The warehouse connection, inside the load transaction.
+    source (str): Rollup source with a `{rows}` placeholder (`flat_rollup_source`, ...).
+    added_rows (str): SELECT of the row-table rows to add.
+    removed_rows (Optional[str]): SELECT of the row-table rows to subtract, as they were stored.
+
+    Returns:
+    --------
+    int: Delta rows applied.
+    """
+    columns = ", ".join(SOURCE_COLUMNS)
+    connection.execute(f'DROP TABLE IF EXISTS temp."{DELTA_TABLE}"')
+    connection.execute(f'CREATE TEMP TABLE "{DELTA_TABLE}" AS '
+                       f'SELECT {columns}, 1 AS sign FROM ({source.format(rows=added_rows)})')
+    if removed_rows is not None:
+        connection.execute(f'INSERT INTO temp."{DELTA_TABLE}" '
+                           f'SELECT {columns}, -1 FROM ({source.format(rows=removed_rows)})')
+    delta_rows = connection.execute(f'SELECT COUNT(*) FROM temp."{DELTA_TABLE}"').fetchone()[0]
+
+    for table, groups in ROLLUPS.items():
+        keys = ", ".join(groups)
+        missing = MISSING_GROUPS.get(table, {})
+        values = ", ".join(f"IFNULL({column}, {missing[column]})" if column in missing else column
+                           for column in groups)
+        not_null = " AND ".join(f"{column} IS NOT NULL" for column in groups if column not in missing) or "true"
+        updates = ", ".join(f"{measure} = {measure} + excluded.{measure}" for measure in ROLLUP_MEASURES)
+        connection.execute(
+            f'INSERT INTO "{table}" ({keys}, {", ".join(ROLLUP_MEASURES)}) '
+            f"SELECT {values}, SUM(sign), SUM(sign * (delay_minutes IS NOT NULL)), "
+            f"TOTAL(sign * delay_minutes), TOTAL(sign * delay_minutes * delay_minutes) "
+            f'FROM temp."{DELTA_TABLE}" WHERE {not_null} GROUP BY {values} '
+            f"ON CONFLICT ({keys}) DO UPDATE SET {updates}")
+        if removed_rows is not None:
+            connection.execute(f'DELETE FROM "{table}" WHERE row_count = 0')
+    connection.execute(f'DROP TABLE temp."{DELTA_TABLE}"')
+    return delta_rows
+
+
+def clear_rollups(connection: sqlite3.Connection) -> None:
+    """Delete the groups of every rollup, in the caller's transaction."""
+    for table in ROLLUPS:
+        connection.execute(f'DELETE FROM "{table}"')
+
+
+def rebuild_rollups(connection: sqlite3.Connection, source: str, rows: str) -> None:
+    """
+    Recompute the rollups from all rows, in the caller's transaction.
+
+    Parameters:
+    -----------
+    connection (sqlite3.Connection): The warehouse connection.
+    source (str): Rollup source with a `{rows}` placeholder.
+    rows (str): SELECT of every row-table row.
+
+    Returns:
+    --------
+    None
+    """
+    clear_rollups(connection)
+    refresh_rollups(connection, source, rows)
+
+
+def read_rollup(connection: sqlite3.Connection, table: str,
+                groups: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+    """
+    Read a rollup, optionally rolled up further to some of its group columns.
+
+    Parameters:
+    -----------
+    connection (sqlite3.Connection): A connection to the warehouse.
+    table (str): The rollup table (a key of `ROLLUPS`).
+    groups (Optional[Tuple[str, ...]]): Group columns to keep (default: all of them).
+
+    Raises:
+    -------
+    ValueError: For an unknown rollup or group column.
+
+    Returns:
+    --------
+    pd.DataFrame: The group columns, `ROLLUP_MEASURES` and the mean delay `avg_delay_minutes`,
+                  ordered by the group columns.
+    """
+    groups = ROLLUPS.get(table, ()) if groups is None else tuple(groups)
+    if table not in ROLLUPS or not set(groups) <= set(ROLLUPS[table]):
+        error_msg = f"Unknown rollup {table} or group columns {list(groups)}. Rollups: {ROLLUPS}"
+        ErrorTrack(error_msg)
+        raise ValueError(error_msg)
+    keys = ", ".join(f'"{column}"' for column in groups)
+    measures = ", ".join(f"SUM({measure}) AS {measure}" for measure in ROLLUP_MEASURES)
+    group_by = f" GROUP BY {keys} ORDER BY {keys}" if groups else ""
+    selected = f"{keys}, " if groups else ""
+    rollup = pd.read_sql_query(f'SELECT {selected}{measures} FROM "{table}"{group_by}', connection)
+    rollup["avg_delay_minutes"] = rollup["delay_sum"] / rollup["delay_count"].where(rollup["delay_count"] > 0)
+    return rollup
+
+
+def read_rollups(db_path: str, tables: Optional[Dict[str, Optional[Tuple[str, ...]]]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Read several rollups from a warehouse file through a read-only connection.
+
+    Parameters:
+    -----------
+    db_path (str): Path to the warehouse database.
+    tables (Optional[Dict[str, Optional[Tuple[str, ...]]]]): Rollup -> group columns
+                                                             (default: every rollup, all columns).
+
+    Returns:
+    --------
+    Dict[str, pd.DataFrame]: Rollup -> frame, see `read_rollup`.
+    """
+    try:
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        error_msg = f"Error opening the warehouse {db_path}: {str(e)}"
+        ErrorTrack(error_msg)
+        raise sqlite3.Error(error_msg)
+    try:
+        rollups = {table: read_rollup(connection, table, groups)
+                   for table, groups in (tables or dict.fromkeys(ROLLUPS)).items()}
+    finally:
+        connection.close()
+    PipelineTrack(f"Read {len(rollups)} rollups from {db_path}")
+    return rollups
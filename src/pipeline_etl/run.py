@@ -1,75 +1,377 @@
 import sys, os
 import pandas as pd
+from typing import Any, Dict, Iterable, Iterator, Optional
 # Define MAIN_DIR to point to the project root directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 sys.path.append(MAIN_DIR)
 
 from utils import ErrorTrack, PipelineTrack
 from databaseOperations.ingest_from_drive import LoadFromDrive
+from databaseOperations.segmented_download import SegmentedLoadFromDrive
+from databaseOperations.stream_ingest import StreamIngest
 from databaseOperations.unzip_database import UnzipFile
+from databaseOperations.parallel_unzip import ParallelUnzipFile
 from databaseOperations.extract_database import SQLiteExtractor
+from databaseOperations.sqlite_connection import SQLiteConnectionProfile, SQLiteConnectionPool
+from databaseOperations.parallel_extract import ParallelSQLiteExtractor
+from databaseOperations.incremental_extract import IncrementalExtractor, ExtractionStateFile
+from databaseOperations.query_cache import CachingExtractor, QueryResultCache
 from databaseOperations.transform_database import TransformData
+from databaseOperations.parallel_transform import ParallelTransformData
+from databaseOperations.aggregate_store import AggregateStore
+from databaseOperations.load_data_to_sqlite import SQLiteWarehouseLoader
+from databaseOperations.star_schema import StarSchemaLoader
+from databaseOperations.warehouse_partitions import WarehousePartitions
+from databaseOperations.pushdown import PushdownPlanner
 from analysis.load_from_csv import CSVLoader
+from utils.frame_io import IFrameFormat, frame_format, with_format
+from pipeline_etl.stage_cache import StageCache
 from analysis.understandDataset import DataSetAnalyzer
-from analysis.visualize_dataset import TrainVisualization
+from analysis.visualize_dataset import TrainVisualization, WarehouseTrainVisualization
 from config import *
 
-def etl_pipeline():
+# Connections to the source database outlive a single run, so scheduled runs
+# reuse them until the database file changes.
+SOURCE_PROFILE = SQLiteConnectionProfile.from_config(SQLITEPROFILE)
+SOURCE_POOL = SQLiteConnectionPool(SOURCE_PROFILE, max_idle=CONNECTIONPOOLSIZE)
+QUERY_CACHE = QueryResultCache(QUERYCACHEDIR, max_bytes=QUERYCACHEMAXMB * 1024 ** 2) if QUERYCACHEDIR else None
+# Format of the frames handed from stage to stage (csv_from_sql, df, delay_summary)
+FRAME_FORMAT = frame_format(INTERMEDIATEFORMAT)
+# Stages the stage store can skip. Download and unzip keep their own manifests
+# (remote ETag, member CRCs), so they are cheap on an unchanged dataset already.
+STAGES = ("transform", "analyze", "visualize")
+STAGE_CACHE = StageCache(STAGECACHEDIR, max_bytes=STAGECACHEMAXMB * 1024 ** 2) if STAGECACHEDIR else None
+# Settings and code each stage depends on. Steps 3-4 read most of the settings,
+# so any change to them (other than the stage store's own) runs them again.
+# The module lists must include every project module the stage imports.
+TRANSFORM_CONFIG = {key: value for key, value in configs["etl_config"].items()
+                    if key not in ("stage_cache_dir", "stage_cache_max_mb")}
+TRANSFORM_MODULES = ("databaseOperations.extract_database", "databaseOperations.parallel_extract",
+                     "databaseOperations.incremental_extract", "databaseOperations.query_cache",
+                     "databaseOperations.pushdown", "databaseOperations.sqlite_connection",
+                     "databaseOperations.transform_database", "databaseOperations.transform_spec",
+                     "databaseOperations.parallel_transform", "databaseOperations.delay_aggregate",
+                     "databaseOperations.aggregate_store", "databaseOperations.load_data_to_sqlite",
+                     "databaseOperations.star_schema", "databaseOperations.warehouse_rollups",
+                     "databaseOperations.warehouse_partitions", "utils.datetime_tools", "utils.frame_io",
+                     "utils.sql_tools")
+ANALYZE_MODULES = ("analysis.load_from_csv", "analysis.understandDataset", "utils.frame_io")
+VISUALIZE_MODULES = ("analysis.visualize_dataset", "databaseOperations.warehouse_rollups",
+                     "utils.datetime_tools", "utils.frame_io")
+
+def save_frame(df: pd.DataFrame, path: str, append: bool,
+               file_format: IFrameFormat = FRAME_FORMAT) -> None:
+    """
+    Write a DataFrame to an intermediate, either replacing it or appending to it.
+
+    Parameters:
+    -----------
+    df (pd.DataFrame): The rows to write.
+    path (str): The intermediate (a file, or a directory of part files for columnar formats).
+    append (bool): Append to the intermediate (a CSV header only if the file does not exist yet).
+    file_format (IFrameFormat): The intermediate format (default: `intermediate_format`).
+
+    Returns:
+    --------
+    None
+    """
+    file_format.write(df, path, append=append)
+
+def save_chunks(chunks: Iterator[pd.DataFrame], path: str, append: bool = False,
+                file_format: IFrameFormat = FRAME_FORMAT) -> Iterator[pd.DataFrame]:
+    """
+    Append each extracted chunk to an intermediate and pass it on unchanged.
+
+    Parameters:
+    -----------
+    chunks (Iterator[pd.DataFrame]): Chunks produced by the extractor.
+    path (str): The intermediate to write; it is replaced by the first chunk
+                unless `append` is set.
+    append (bool): Keep the existing rows of the intermediate (incremental runs).
+    file_format (IFrameFormat): The intermediate format (default: `intermediate_format`).
+
+    Returns:
+    --------
+    Iterator[pd.DataFrame]: The same chunks, in order.
+    """
+    for chunk_number, chunk in enumerate(chunks):
+        save_frame(chunk, path, append=append or chunk_number > 0, file_format=file_format)
+        yield chunk
+
+def extracted_key_path(path: str) -> str:
+    """Sidecar of the extracted intermediate `path`: the query cache key of the rows it holds."""
+    return f"{path}.key"
+
+def holds_query_result(path: str, key: str) -> bool:
+    """
+    Whether the extracted intermediate `path` was written from the query result `key`.
+
+    Parameters:
+    -----------
+    path (str): The extracted intermediate.
+    key (str): Query cache key (see `CachingExtractor.key`).
+
+    Returns:
+    --------
+    bool: True if `path` exists and its sidecar records `key`.
+    """
+    key_path = extracted_key_path(path)
+    if not os.path.exists(path) or not os.path.exists(key_path):
+        return False
+    with open(key_path) as f:
+        return f.read().strip() == key
+
+def record_query_result(path: str, key: Optional[str]) -> None:
+    """
+    Record in the sidecar of `path` which query result it holds; None removes the record.
+
+    Parameters:
+    -----------
+    path (str): The extracted intermediate.
+    key (Optional[str]): Query cache key of its rows; None when they are not (or not
+                         yet) one cached query result, e.g. while it is rewritten.
+
+    Returns:
+    --------
+    None
+    """
+    key_path = extracted_key_path(path)
+    if key is None:
+        if os.path.exists(key_path):
+            os.remove(key_path)
+        return
+    with open(f"{key_path}.tmp", "w") as f:
+        f.write(key)
+    os.replace(f"{key_path}.tmp", key_path)
+
+def stage_key(stage: str, inputs: Iterable[str], config: Dict[str, Any], modules: Iterable[str]) -> Optional[str]:
+    """
+    Key of a stage run in `STAGE_CACHE`, None when the stage store is disabled.
+
+    Parameters:
+    -----------
+    stage (str): The stage name (one of `STAGES`).
+    inputs (Iterable[str]): Files the stage reads; empty paths (disabled settings) are left out.
+    config (Dict[str, Any]): Settings the stage depends on.
+    modules (Iterable[str]): Modules whose code the stage runs.
+
+    Returns:
+    --------
+    Optional[str]: The key.
+    """
+    if STAGE_CACHE is None:
+        return None
+    return STAGE_CACHE.key(stage, [path for path in inputs if path], config, modules)
+
+def stage_is_current(stage: str, key: Optional[str]) -> bool:
+    """True if the stage store has the stage's outputs for `key`, so the stage can be skipped."""
+    return key is not None and STAGE_CACHE.lookup(stage, key)
+
+def record_stage(stage: str, key: Optional[str], outputs: Iterable[str], stored: Iterable[str] = ()) -> None:
+    """Record the outputs of a stage that ran (see `StageCache.record`); no-op without a stage store."""
+    if key is not None:
+        STAGE_CACHE.record(stage, key, [path for path in outputs if path], stored)
+
+def etl_pipeline(full_refresh: bool = False, rerun: Iterable[str] = ()):
     """
     Main function to execute the ETL pipeline.
+
+    Parameters:
+    -----------
+    full_refresh (bool): With incremental extraction enabled, ignore the stored
+                         high-water mark and rebuild every output from scratch.
+                         Steps 3-4 then run even if the stage store has them.
+    rerun (Iterable[str]): Stages of `STAGES` (or "all") whose stored outputs are
+                           invalidated first, so they run again.
+
+    Raises:
+    -------
+    ValueError: If `rerun` names an unknown stage.
     """
+    rerun = list(rerun)
+    unknown = [stage for stage in rerun if stage != "all" and stage not in STAGES]
+    if unknown:
+        error_msg = f"Unknown stages to rerun: {unknown}. Choose from {list(STAGES)} or 'all'."
+        ErrorTrack(error_msg)
+        raise ValueError(error_msg)
+
     try:
-        # Step 1: Load dataset from Google Drive
-        PipelineTrack("Starting dataset ingestion from Google Drive...")
-        drive_loader = LoadFromDrive()
-        drive_loader.load(url=DATASETURL, save_archive=ARCHIVEDIR, name=DATABASENAME)
-        PipelineTrack("Dataset successfully downloaded.")
-
-        # Step 2: Unzip the dataset
-        PipelineTrack("Unzipping dataset...")
-        unzipper = UnzipFile()
-        zip_path = os.path.join(ARCHIVEDIR, f"{DATABASENAME}.zip")
-        unzipper.unzip(zip_path=zip_path, extract_to=EXTRACTEDDIR)
-        PipelineTrack("Dataset successfully unzipped.")
-
-        # Step 3: Extract data from SQLite database
-        PipelineTrack("Extracting data from SQLite database...")
+        if STAGE_CACHE is not None:
+            for stage in rerun:
+                STAGE_CACHE.invalidate(None if stage == "all" else stage)
+
+        if STREAMINGEST:
+            # Steps 1-2: Download and unzip in one pass
+            PipelineTrack("Starting streamed dataset ingestion from Google Drive...")
+            downloaded = StreamIngest().ingest(url=DATASETURL, save_archive=ARCHIVEDIR, name=DATABASENAME,
+                                               extract_to=EXTRACTEDDIR, keep_archive=KEEPARCHIVE,
+                                               members=EXTRACTMEMBERS or None)
+            PipelineTrack("Dataset successfully downloaded and unzipped." if downloaded else "Dataset unchanged, download skipped.")
+        else:
+            # Step 1: Load dataset from Google Drive
+            PipelineTrack("Starting dataset ingestion from Google Drive...")
+            if DOWNLOADWORKERS > 1:
+                drive_loader = SegmentedLoadFromDrive(workers=DOWNLOADWORKERS,
+                                                      segment_size=DOWNLOADSEGMENTMB * 1024 * 1024)
+            else:
+                drive_loader = LoadFromDrive()
+            downloaded = drive_loader.load(url=DATASETURL, save_archive=ARCHIVEDIR, name=DATABASENAME)
+            PipelineTrack("Dataset successfully downloaded." if downloaded else "Dataset unchanged, download skipped.")
+
+            # Step 2: Unzip the dataset
+            PipelineTrack("Unzipping dataset...")
+            unzipper = ParallelUnzipFile(workers=UNZIPWORKERS) if UNZIPWORKERS > 1 else UnzipFile()
+            zip_path = os.path.join(ARCHIVEDIR, f"{DATABASENAME}.zip")
+            extracted = unzipper.unzip(zip_path=zip_path, extract_to=EXTRACTEDDIR, members=EXTRACTMEMBERS or None)
+            PipelineTrack(f"Dataset successfully unzipped ({len(extracted)} members written).")
+
+        # Steps 3-4 (extract, transform and the warehouse load) only run when the
+        # source database, the settings or the code changed since the recorded run
         db_path = os.path.join(EXTRACTEDDIR, f"{DATABASENAME}.sqlite")
-        extractor = SQLiteExtractor()
-        extractor.connect(db_path=db_path)
-        EXTRACTEDDATA = extractor.execute_query(query=QUERY)
-        EXTRACTEDDATA.to_csv(f"{CSVDATA}/csv_from_sql.csv")
-        PipelineTrack(f"Data extraction completed. Rows fetched: {len(EXTRACTEDDATA)}")
-
-        # Step 4: Transform the data
-        PipelineTrack("Transforming data...")
-        transformer = TransformData()
-        TRANSFORMEDDATA = transformer.transform(df=EXTRACTEDDATA, df_wheresave=DATAWHARESAVE)
-        PipelineTrack("Data transformation completed.")
-
-        # Step 5: Load data from CSV (if needed for additional analysis)
-        PipelineTrack("Loading data from CSV for analysis...")
-        csv_loader = CSVLoader()
-        csv_data = csv_loader.load_csv(file_path=f"{CSVDATA}csv_from_sql.csv")
-        PipelineTrack("CSV data loaded successfully.")
-
-        # Step 6: Analyze the dataset
-        PipelineTrack("Analyzing the dataset...")
-        analyzer = DataSetAnalyzer()
-        analysis_report = analyzer.analyze(csv_data)
-        analysis_report = pd.DataFrame(analysis_report)
-        analysis_report.to_csv(f"{VISUALIZEOUTPUTDIR}/REPORT.csv")
-        PipelineTrack(f"Dataset analysis report saved at: {DATAWHARESAVE}")
+        extracted_csv = FRAME_FORMAT.path(CSVDATA, "csv_from_sql")
+        transformed_outputs = [extracted_csv, extracted_key_path(extracted_csv), FRAME_FORMAT.path(DATAWHARESAVE, "df"),
+                               FRAME_FORMAT.path(DATAWHARESAVE, "delay_summary")]
+        transform_key = stage_key("transform", inputs=[db_path], config=TRANSFORM_CONFIG, modules=TRANSFORM_MODULES)
+        # Incremental runs add the new rows to the outputs of earlier runs
+        TRANSFORMEDDATA, append = None, INCREMENTAL and not full_refresh
+        if full_refresh or not stage_is_current("transform", transform_key):
+            # Step 3: Extract data from SQLite database
+            PipelineTrack("Extracting data from SQLite database...")
+            query, extract_dtypes, pushed_steps = QUERY, EXTRACTDTYPES, []
+            if PUSHDOWNSTEPS or OUTPUTCOLUMNS:
+                # Let SQLite read only the needed columns (and filter or rename), so less reaches pandas
+                watermark = [WATERMARKCOLUMN] if INCREMENTAL and WATERMARKCOLUMN != "rowid" else []
+                plan = PushdownPlanner(PUSHDOWNSTEPS).plan(QUERY, db_path, EXTRACTDTYPES, OUTPUTCOLUMNS or None,
+                                                           keep_columns=watermark)
+                query, extract_dtypes, pushed_steps = plan.query, plan.dtypes, plan.pushed_steps
+            if EXTRACTWORKERS > 1:
+                extractor = ParallelSQLiteExtractor(workers=EXTRACTWORKERS, profile=SOURCE_PROFILE, dtypes=extract_dtypes)
+            else:
+                extractor = SQLiteExtractor(pool=SOURCE_POOL, dtypes=extract_dtypes)
+            cached_extractor = None
+            if QUERY_CACHE is not None:
+                extractor = cached_extractor = CachingExtractor(extractor, QUERY_CACHE)
+            if INCREMENTAL:
+                extractor = IncrementalExtractor(extractor, ExtractionStateFile(EXTRACTSTATEFILE),
+                                                 watermark_column=WATERMARKCOLUMN, full_refresh=full_refresh)
+            extractor.connect(db_path=db_path)
+            aggregate_store = AggregateStore(AGGREGATEDB) if AGGREGATEDB else None
+            loader = None
+            if WAREHOUSEDB:
+                # Step 5 (load) runs inside the transform, per frame or chunk
+                # Merge loads make overlapping scheduled runs idempotent
+                loader_class = StarSchemaLoader if WAREHOUSEMODEL == "star" else SQLiteWarehouseLoader
+                partitions = WarehousePartitions(PARTITIONDIR) if PARTITIONDIR else None
+                loader = loader_class(batch_rows=LOADBATCHROWS, merge=LOADMODE == "merge", rollups=WAREHOUSEROLLUPS,
+                                      partitions=partitions)
+                loader.connect(WAREHOUSEDB)
+            if TRANSFORMWORKERS > 1:
+                transformer = ParallelTransformData(workers=TRANSFORMWORKERS, partition_by=TRANSFORMPARTITIONBY,
+                                                    skip_steps=pushed_steps, output_columns=OUTPUTCOLUMNS or None,
+                                                    aggregate_store=aggregate_store, loader=loader,
+                                                    frame_format=FRAME_FORMAT)
+            else:
+                transformer = TransformData(skip_steps=pushed_steps, output_columns=OUTPUTCOLUMNS or None,
+                                            aggregate_store=aggregate_store, loader=loader,
+                                            frame_format=FRAME_FORMAT)
+            # Same query against an unchanged database, and the extracted file was written
+            # from that result (not by a run with other settings): it is still current
+            result_key = cached_extractor.key(query) if cached_extractor is not None and not INCREMENTAL else None
+            keep_extracted_csv = (result_key is not None and cached_extractor.is_cached(query)
+                                  and holds_query_result(extracted_csv, result_key))
+            if not keep_extracted_csv:
+                # Until the new rows are all written, the file holds no known result
+                record_query_result(extracted_csv, None)
+
+            if CHUNKROWS:
+                # Steps 3-4 streamed: each chunk is extracted, saved, transformed and
+                # written before the next one is read, so memory is bounded by CHUNKROWS.
+                PipelineTrack(f"Streaming extract and transform in chunks of {CHUNKROWS} rows...")
+                chunks = extractor.iter_query(query=query, chunk_rows=CHUNKROWS)
+                if not keep_extracted_csv:
+                    chunks = save_chunks(chunks, extracted_csv, append=append)
+                transformer.transform_stream(chunks=chunks, df_wheresave=DATAWHARESAVE, append=append)
+                extractor.close_connection()
+                PipelineTrack("Data extraction and transformation completed.")
+            else:
+                EXTRACTEDDATA = extractor.execute_query(query=query)
+                if not keep_extracted_csv:
+                    save_frame(EXTRACTEDDATA, extracted_csv, append=append)
+                extractor.close_connection()
+                PipelineTrack(f"Data extraction completed. Rows fetched: {len(EXTRACTEDDATA)}")
+
+                # Step 4: Transform the data
+                PipelineTrack("Transforming data...")
+                TRANSFORMEDDATA = transformer.transform(df=EXTRACTEDDATA, df_wheresave=DATAWHARESAVE, append=append)
+                PipelineTrack("Data transformation completed.")
+
+            if not keep_extracted_csv:
+                record_query_result(extracted_csv, result_key)
+            if INCREMENTAL:
+                # The new rows are saved, so the next run can start after them
+                extractor.commit()
+            if aggregate_store is not None:
+                aggregate_store.close()
+            if isinstance(transformer, ParallelTransformData):
+                transformer.close()
+            if loader is not None:
+                if loader.partitions is not None and ARCHIVEAFTERMONTHS:
+                    for table in loader.PARTITION_COLUMNS:
+                        loader.partitions.archive_older_than(loader.connection, table, ARCHIVEAFTERMONTHS)
+                loader.close_connection()
+            record_stage("transform", transform_key,
+                         outputs=transformed_outputs + [WAREHOUSEDB, PARTITIONDIR, AGGREGATEDB,
+                                                        EXTRACTSTATEFILE if INCREMENTAL else ""],
+                         stored=transformed_outputs)
+
+        report_path = f"{VISUALIZEOUTPUTDIR}/REPORT.csv"
+        analyze_key = stage_key("analyze", inputs=[extracted_csv], config={"report": report_path},
+                                modules=ANALYZE_MODULES)
+        if not stage_is_current("analyze", analyze_key):
+            # Step 5: Load data from CSV (if needed for additional analysis)
+            # (in the intermediate format, typed unless it is CSV)
+            PipelineTrack("Loading data from CSV for analysis...")
+            csv_loader = CSVLoader()
+            csv_data = csv_loader.load_csv(file_path=extracted_csv)
+            PipelineTrack("CSV data loaded successfully.")
+
+            # Step 6: Analyze the dataset
+            PipelineTrack("Analyzing the dataset...")
+            analyzer = DataSetAnalyzer()
+            analysis_report = analyzer.analyze(csv_data)
+            analysis_report = pd.DataFrame(analysis_report)
+            analysis_report.to_csv(report_path)
+            PipelineTrack(f"Dataset analysis report saved at: {DATAWHARESAVE}")
+            record_stage("analyze", analyze_key, outputs=[report_path], stored=[report_path])
 
         # Step 7: Visualize the dataset
-        visualizer = TrainVisualization(avg_delay_file=AVGDELAYFILE,
-                                        train_status_file=TRAINSTATUSFILES, 
-                                        output_dir=VISUALIZEOUTPUTDIR)
-        PipelineTrack("Train Visualization Pipeline")
-        visualizer.load_data()
-        visualizer.process_data()
-        visualizer.create_plots()
-        PipelineTrack("Train Visualization Pipeline")
+        from_rollups = bool(WAREHOUSEDB and WAREHOUSEROLLUPS)
+        avg_delay_file = with_format(AVGDELAYFILE, FRAME_FORMAT)
+        train_status_file = with_format(TRAINSTATUSFILES, FRAME_FORMAT)
+        visualize_key = stage_key("visualize",
+                                  inputs=[WAREHOUSEDB] if from_rollups else [avg_delay_file, train_status_file],
+                                  config={"from_rollups": from_rollups, "output_dir": VISUALIZEOUTPUTDIR},
+                                  modules=VISUALIZE_MODULES)
+        if not stage_is_current("visualize", visualize_key):
+            if from_rollups:
+                # The charts only need the rollups the load keeps up to date
+                visualizer = WarehouseTrainVisualization(warehouse_db=WAREHOUSEDB, output_dir=VISUALIZEOUTPUTDIR)
+            else:
+                visualizer = TrainVisualization(avg_delay_file=avg_delay_file,
+                                                train_status_file=train_status_file,
+                                                output_dir=VISUALIZEOUTPUTDIR)
+            PipelineTrack("Train Visualization Pipeline")
+            # Without appending or chunking the transformed frame is all of the saved df, already typed
+            reuse_transformed = (TRANSFORMEDDATA is not None and not CHUNKROWS and not append and
+                                 os.path.abspath(train_status_file) ==
+                                 os.path.abspath(FRAME_FORMAT.path(DATAWHARESAVE, "df")))
+            visualizer.load_data(train_status_df=TRANSFORMEDDATA[0] if reuse_transformed else None)
+            visualizer.process_data()
+            visualizer.create_plots()
+            PipelineTrack("Train Visualization Pipeline")
+            charts = [os.path.join(VISUALIZEOUTPUTDIR, name) for name in sorted(os.listdir(VISUALIZEOUTPUTDIR))
+                      if name.endswith(".png")]
+            record_stage("visualize", visualize_key, outputs=charts, stored=charts)
 
         PipelineTrack("ETL pipeline execution completed successfully.")
 
@@ -80,4 +382,7 @@ def etl_pipeline():
 
 
 if __name__ == "__main__":
-    etl_pipeline()
+    # python src/pipeline_etl/run.py [--full-refresh] [--rerun=transform,visualize | --rerun=all]
+    rerun = [stage for argument in sys.argv if argument.startswith("--rerun=")
+             for stage in argument.split("=", 1)[1].split(",") if stage]
+    etl_pipeline(full_refresh="--full-refresh" in sys.argv, rerun=rerun)
@@ -8,10 +8,11 @@ def run_etl():
     # Call your ETL pipeline function here
     etl_pipeline()
 
-# Schedule the ETL to run every 2 hours
-schedule.every(10).minutes.do(run_etl)
+if __name__ == "__main__":
+    # Schedule the ETL to run every 2 hours
+    schedule.every(10).minutes.do(run_etl)
 
-# Keep the script running
-while True:
-    schedule.run_pending()
-    time.sleep(1)
+    # Keep the script running
+    while True:
+        schedule.run_pending()
+        time.sleep(1)
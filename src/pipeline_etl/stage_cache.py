@@ -0,0 +1,340 @@
+import hashlib, json, sys, os
+import importlib
+import shutil
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+# Define MAIN_DIR to point to the project root directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+from utils import ErrorTrack, PipelineTrack
+
+# Bumped when the manifest layout changes, so older entries no longer match.
+STORE_VERSION = 1
+
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def path_fingerprint(path: str) -> Any:
+    """
+    Identity of a file or directory on disk: (size, mtime_ns) per file.
+
+    Directories (columnar intermediates, partition directories) are
+    fingerprinted file by file, so adding or replacing a part changes them.
+    Nothing is read, which keeps the check cheap for multi-GB databases.
+
+    Parameters:
+    -----------
+    path (str): The file or directory.
+
+    Returns:
+    --------
+    Any: A JSON-serialisable fingerprint; None if the path does not exist.
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+    if os.path.isdir(path):
+        return {os.path.relpath(file_path, path): path_fingerprint(file_path) for file_path in _files(path)}
+    return None
+
+
+def code_version(modules: Iterable[str]) -> str:
+    """
+    Hash of the source files of `modules`, so editing a stage's code invalidates it.
+
+    Parameters:
+    -----------
+    modules (Iterable[str]): Module names, e.g. "databaseOperations.transform_database".
+
+    Returns:
+    --------
+    str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(set(modules)):
+        module = sys.modules.get(name) or importlib.import_module(name)
+        digest.update(name.encode())
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _files(path: str) -> List[str]:
+    """Files under a directory, in a stable order."""
+    found = []
+    for root, _, names in os.walk(path):
+        found.extend(os.path.join(root, name) for name in names)
+    return sorted(found)
+
+
+class StageCache:
+    """
+    Artifact store that lets the runner skip stages whose inputs have not changed.
+
+    A stage's key hashes the fingerprints of its input files, the config
+    values it reads and the source of its modules. After a stage runs, its
+    manifest (`manifests/{stage}-{key}.json`) records the fingerprint of every
+    output. Stored outputs are also copied into content-addressed blobs
+    (`blobs/<sha256>`); large or shared outputs (databases) are only
+    fingerprinted. A later run with the same key is a hit when every output
+    is still as recorded. A stored output that was deleted or overwritten is
+    restored from its blobs first. Manifest mtimes mark their last use, and
+    `evict` drops the least recently used manifests until the blobs they
+    reference fit in `max_bytes`.
+    """
+
+    def __init__(self, store_dir: str, max_bytes: int = 1024 ** 3) -> None:
+        """
+        Parameters:
+        -----------
+        store_dir (str): Directory of the store; created if missing.
+        max_bytes (int): Total blob size the store is evicted down to after every record.
+        """
+        if not isinstance(store_dir, str):
+            error_msg = f"The store directory must be a string. Provided type: {type(store_dir)}"
+            ErrorTrack(error_msg)
+            raise TypeError(error_msg)
+        self.store_dir = store_dir
+        self.manifest_dir = os.path.join(store_dir, "manifests")
+        self.blob_dir = os.path.join(store_dir, "blobs")
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, stage: str, inputs: Iterable[str] = (), config: Optional[Dict[str, Any]] = None,
+            modules: Iterable[str] = ()) -> str:
+        """
+        Key of a stage run.
+
+        Parameters:
+        -----------
+        stage (str): The stage name.
+        inputs (Iterable[str]): Files or directories the stage reads.
+        config (Optional[Dict[str, Any]]): Config values the stage depends on.
+        modules (Iterable[str]): Modules whose code the stage runs.
+
+        Returns:
+        --------
+        str: Hex digest.
+        """
+        identity = {
+            "version": STORE_VERSION,
+            "stage": stage,
+            "inputs": {path: path_fingerprint(path) for path in inputs},
+            "config": config or {},
+            "code": code_version(modules),
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()
+
+    def lookup(self, stage: str, key: str) -> bool:
+        """
+        Check whether a stage can be skipped, restoring stored outputs that were removed.
+
+        Parameters:
+        -----------
+        stage (str): The stage name.
+        key (str): The key from `key`.
+
+        Returns:
+        --------
+        bool: True if the stage's outputs are current and it can be skipped.
+        """
+        manifest_path = self._manifest_path(stage, key)
+        manifest = self._read_manifest(manifest_path)
+        if manifest is None:
+            return self._miss(stage, "no entry")
+
+        for path, output in manifest["outputs"].items():
+            if path_fingerprint(path) == output["fingerprint"]:
+                continue
+            if output["blobs"] is None or not self._restore(path, output["blobs"]):
+                return self._miss(stage, f"{path} changed since it was recorded")
+            # Restored files have new mtimes; later lookups compare against them
+            output["fingerprint"] = path_fingerprint(path)
+            self._write_manifest(manifest_path, manifest)
+
+        os.utime(manifest_path)
+        self.hits += 1
+        PipelineTrack(f"Stage {stage} is up to date, skipped ({self._stats_text()})")
+        return True
+
+    def record(self, stage: str, key: str, outputs: Iterable[str], stored: Iterable[str] = ()) -> None:
+        """
+        Record a stage's outputs under its key, then evict old entries past the size limit.
+
+        Parameters:
+        -----------
+        stage (str): The stage name.
+        key (str): The key from `key`, computed before the stage ran.
+        outputs (Iterable[str]): Files or directories the stage wrote; all must be
+                                 unchanged for a later hit.
+        stored (Iterable[str]): The outputs (among `outputs`) copied into the store,
+                                so they can be restored if they go missing.
+
+        Returns:
+        --------
+        None
+        """
+        stored = set(stored)
+        entries = {}
+        for path in outputs:
+            blobs = self._store(path) if path in stored and os.path.exists(path) else None
+            entries[path] = {"fingerprint": path_fingerprint(path), "blobs": blobs}
+        manifest = {"stage": stage, "key": key, "recorded": time.time(), "outputs": entries}
+        self._write_manifest(self._manifest_path(stage, key), manifest)
+        PipelineTrack(f"Recorded stage {stage} ({len(entries)} outputs, {len(stored)} stored)")
+        self.evict()
+
+    def invalidate(self, stage: Optional[str] = None) -> int:
+        """
+        Drop the entries of one stage (or all of them), so the next run executes it.
+
+        Parameters:
+        -----------
+        stage (Optional[str]): The stage name; None = every stage.
+
+        Returns:
+        --------
+        int: Entries removed.
+        """
+        removed = 0
+        for name in os.listdir(self.manifest_dir):
+            if name.endswith(".json") and (stage is None or name.rsplit("-", 1)[0] == stage):
+                os.remove(os.path.join(self.manifest_dir, name))
+                removed += 1
+        self._collect_blobs()
+        PipelineTrack(f"Invalidated {removed} entries of stage {stage or 'all'}")
+        return removed
+
+    def evict(self) -> None:
+        """
+        Remove least-recently-used manifests until their blobs fit in `max_bytes`.
+
+        Returns:
+        --------
+        None
+        """
+        entries = []
+        for name in os.listdir(self.manifest_dir):
+            if name.endswith(".json"):
+                path = os.path.join(self.manifest_dir, name)
+                manifest = self._read_manifest(path)
+                blobs = set() if manifest is None else {
+                    digest for output in manifest["outputs"].values() for digest in (output["blobs"] or {}).values()}
+                entries.append((os.stat(path).st_mtime_ns, name, blobs))
+
+        # A blob shared by several manifests counts once, until its last user goes
+        referenced = {}
+        for _, _, blobs in entries:
+            for digest in blobs:
+                referenced[digest] = referenced.get(digest, 0) + 1
+        total = sum(self._blob_size(digest) for digest in referenced)
+        for _, name, blobs in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.manifest_dir, name))
+            self.evictions += 1
+            for digest in blobs:
+                referenced[digest] -= 1
+                if referenced[digest] == 0:
+                    total -= self._blob_size(digest)
+            PipelineTrack(f"Evicted stage entry {name}")
+        self._collect_blobs()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters of this store instance and the current blob size on disk.
+
+        Returns:
+        --------
+        Dict[str, Any]: hits, misses, evictions, entries and size_bytes.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": sum(name.endswith(".json") for name in os.listdir(self.manifest_dir)),
+            "size_bytes": sum(os.path.getsize(os.path.join(self.blob_dir, name)) for name in os.listdir(self.blob_dir)),
+        }
+
+    def _store(self, path: str) -> Dict[str, str]:
+        """Copy an output into the blobs; returns relative file path -> digest ("" for a file output)."""
+        files = {"": path} if os.path.isfile(path) else {os.path.relpath(file_path, path): file_path
+                                                         for file_path in _files(path)}
+        blobs = {}
+        for relative, file_path in files.items():
+            digest = file_digest(file_path)
+            blob_path = os.path.join(self.blob_dir, digest)
+            if not os.path.exists(blob_path):
+                shutil.copyfile(file_path, f"{blob_path}.tmp")
+                os.replace(f"{blob_path}.tmp", blob_path)
+            blobs[relative] = digest
+        return blobs
+
+    def _restore(self, path: str, blobs: Dict[str, str]) -> bool:
+        """Put a stored output back from its blobs; False if a blob was evicted."""
+        if not all(os.path.exists(os.path.join(self.blob_dir, digest)) for digest in blobs.values()):
+            return False
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+        for relative, digest in blobs.items():
+            target = os.path.join(path, relative) if relative else path
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            shutil.copyfile(os.path.join(self.blob_dir, digest), target)
+        PipelineTrack(f"Restored {path} from the stage store")
+        return True
+
+    def _collect_blobs(self) -> None:
+        """Delete blobs no manifest references."""
+        referenced = set()
+        for name in os.listdir(self.manifest_dir):
+            if name.endswith(".json"):
+                manifest = self._read_manifest(os.path.join(self.manifest_dir, name))
+                if manifest is not None:
+                    for output in manifest["outputs"].values():
+                        referenced.update((output["blobs"] or {}).values())
+        for name in os.listdir(self.blob_dir):
+            if name not in referenced:
+                os.remove(os.path.join(self.blob_dir, name))
+
+    def _blob_size(self, digest: str) -> int:
+        path = os.path.join(self.blob_dir, digest)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _read_manifest(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, path: str, manifest: Dict[str, Any]) -> None:
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _manifest_path(self, stage: str, key: str) -> str:
+        return os.path.join(self.manifest_dir, f"{stage}-{key}.json")
+
+    def _miss(self, stage: str, reason: str) -> bool:
+        self.misses += 1
+        PipelineTrack(f"Stage {stage} must run: {reason} ({self._stats_text()})")
+        return False
+
+    def _stats_text(self) -> str:
+        return f"hits={self.hits}, misses={self.misses}, evictions={self.evictions}"
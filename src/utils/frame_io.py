@@ -0,0 +1,382 @@
+import os
+import sys
+import glob
+import shutil
+import pandas as pd
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Sequence
+# Set the base directory relative to the script's location
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+
+from utils import ErrorTrack, PipelineTrack
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; only the CSV format is available without it
+    pa = feather = pq = None
+
+# Rows per record batch of a Feather part, the unit `iter_read` hands out without copying.
+FEATHER_BATCH_ROWS = 65_536
+
+
+class IFrameFormat(ABC):
+    """
+    Abstract Base Class for the file format of the frames passed between pipeline stages
+    (`csv_from_sql`, `df`, `delay_summary`).
+    """
+
+    # File extension, also used to recognise the format of an existing path
+    extension = ""
+
+    def path(self, directory: str, name: str) -> str:
+        """
+        Path of the intermediate `name` in `directory`, e.g. `df.parquet`.
+
+        Parameters:
+        -----------
+        directory (str): The stage output directory.
+        name (str): The intermediate's name without extension.
+
+        Returns:
+        --------
+        str: The path.
+        """
+        return os.path.join(directory, f"{name}.{self.extension}")
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame, path: str, append: bool = False) -> None:
+        """
+        Write the rows of `df` to `path`.
+
+        Parameters:
+        -----------
+        df (pd.DataFrame): The rows.
+        path (str): The intermediate's path.
+        append (bool): Add the rows to an existing intermediate instead of replacing it.
+
+        Returns:
+        --------
+        None
+        """
+        pass
+
+    @abstractmethod
+    def read(self, path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Read an intermediate.
+
+        Parameters:
+        -----------
+        path (str): The intermediate's path.
+        columns (Optional[Sequence[str]]): Columns to read (default: all).
+
+        Returns:
+        --------
+        pd.DataFrame: The rows.
+        """
+        pass
+
+    @abstractmethod
+    def iter_read(self, path: str, columns: Optional[Sequence[str]] = None,
+                  chunk_rows: int = 500_000) -> Iterator[pd.DataFrame]:
+        """
+        Read an intermediate in chunks of at most `chunk_rows` rows.
+
+        Parameters:
+        -----------
+        path (str): The intermediate's path.
+        columns (Optional[Sequence[str]]): Columns to read (default: all).
+        chunk_rows (int): Maximum rows per chunk.
+
+        Returns:
+        --------
+        Iterator[pd.DataFrame]: The rows, chunk by chunk.
+        """
+        pass
+
+    @abstractmethod
+    def columns(self, path: str) -> List[str]:
+        """Column names of an intermediate, without reading its rows."""
+        pass
+
+
+class CSVFormat(IFrameFormat):
+    """
+    CSV intermediates, as the pipeline always wrote them: the index is written
+    as the first column, and every value is parsed back from text.
+    """
+
+    extension = "csv"
+
+    def write(self, df: pd.DataFrame, path: str, append: bool = False) -> None:
+        if append:
+            df.to_csv(path, mode='a', header=not os.path.exists(path))
+        else:
+            df.to_csv(path)
+
+    def read(self, path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        return pd.read_csv(path, usecols=columns)
+
+    def iter_read(self, path: str, columns: Optional[Sequence[str]] = None,
+                  chunk_rows: int = 500_000) -> Iterator[pd.DataFrame]:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+
+    def columns(self, path: str) -> List[str]:
+        return list(pd.read_csv(path, nrows=0).columns)
+
+
+class ColumnarFormat(IFrameFormat):
+    """
+    Arrow-based intermediates, stored as a directory of part files.
+
+    Every write that does not append replaces the directory; an appending
+    write (a streamed chunk, an incremental run) adds one part, so nothing
+    already written is read or rewritten. Column types (categories, nullable
+    integers, datetimes) are kept, and the index is not stored. Categorical
+    columns are written with 32-bit codes, so parts with different numbers of
+    categories still share one schema.
+    """
+
+    def __init__(self) -> None:
+        if pa is None:
+            error_msg = f"The {self.extension} intermediate format needs pyarrow; install it or use csv."
+            ErrorTrack(error_msg)
+            raise ImportError(error_msg)
+
+    def write(self, df: pd.DataFrame, path: str, append: bool = False) -> None:
+        if not append or not os.path.isdir(path):
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+            os.makedirs(path)
+        part_path = os.path.join(path, f"part-{len(self._parts(path)):05d}.{self.extension}")
+        tmp_path = f"{part_path}.tmp"
+        self._write_table(self._table(df), tmp_path)
+        os.replace(tmp_path, part_path)
+
+    def read(self, path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        tables = [self._read_table(part, columns) for part in self._parts(path)]
+        if not tables:
+            return pd.DataFrame(columns=columns)
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+    def iter_read(self, path: str, columns: Optional[Sequence[str]] = None,
+                  chunk_rows: int = 500_000) -> Iterator[pd.DataFrame]:
+        offset = 0
+        for part in self._parts(path):
+            for batch in self._iter_batches(part, columns, chunk_rows):
+                chunk = batch.to_pandas()
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                yield chunk
+
+    def columns(self, path: str) -> List[str]:
+        parts = self._parts(path)
+        return self._schema(parts[0]).names if parts else []
+
+    def _parts(self, path: str) -> List[str]:
+        """Part files in write order; a single file written by another tool is its only part."""
+        if os.path.isfile(path):
+            return [path]
+        return sorted(glob.glob(os.path.join(path, f"part-*.{self.extension}")))
+
+    def _table(self, df: pd.DataFrame) -> "pa.Table":
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        schema = pa.schema(
+            [pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+             if pa.types.is_dictionary(field.type) else field for field in table.schema],
+            metadata=table.schema.metadata,
+        )
+        return table.cast(schema)
+
+    @abstractmethod
+    def _write_table(self, table: "pa.Table", path: str) -> None:
+        pass
+
+    @abstractmethod
+    def _read_table(self, path: str, columns: Optional[Sequence[str]]) -> "pa.Table":
+        pass
+
+    @abstractmethod
+    def _iter_batches(self, path: str, columns: Optional[Sequence[str]], chunk_rows: int) -> Iterator["pa.RecordBatch"]:
+        pass
+
+    @abstractmethod
+    def _schema(self, path: str) -> "pa.Schema":
+        pass
+
+
+class ParquetFormat(ColumnarFormat):
+    """
+    Parquet parts: compressed column chunks, so reads of a few columns
+    (e.g. the delay summary's train_id and delay_minutes) skip the others on disk.
+    """
+
+    extension = "parquet"
+
+    def _write_table(self, table: "pa.Table", path: str) -> None:
+        pq.write_table(table, path)
+
+    def _read_table(self, path: str, columns: Optional[Sequence[str]]) -> "pa.Table":
+        return pq.read_table(path, columns=columns)
+
+    def _iter_batches(self, path: str, columns: Optional[Sequence[str]], chunk_rows: int) -> Iterator["pa.RecordBatch"]:
+        yield from pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns)
+
+    def _schema(self, path: str) -> "pa.Schema":
+        return pq.read_schema(path)
+
+
+class FeatherFormat(ColumnarFormat):
+    """
+    Feather (Arrow IPC) parts, written uncompressed and read through a memory
+    map: the Arrow buffers are the file's pages, so selecting columns or
+    slicing batches copies nothing until the frame is built. Larger on disk
+    than Parquet, cheaper to read.
+    """
+
+    extension = "feather"
+
+    def _write_table(self, table: "pa.Table", path: str) -> None:
+        feather.write_feather(table, path, compression="uncompressed", chunksize=FEATHER_BATCH_ROWS)
+
+    def _read_table(self, path: str, columns: Optional[Sequence[str]]) -> "pa.Table":
+        return feather.read_table(path, columns=columns, memory_map=True)
+
+    def _iter_batches(self, path: str, columns: Optional[Sequence[str]], chunk_rows: int) -> Iterator["pa.RecordBatch"]:
+        yield from self._read_table(path, columns).to_batches(max_chunksize=chunk_rows)
+
+    def _schema(self, path: str) -> "pa.Schema":
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).schema
+
+
+FRAME_FORMATS: Dict[str, type] = {"csv": CSVFormat, "parquet": ParquetFormat, "feather": FeatherFormat}
+
+
+def frame_format(name: str) -> IFrameFormat:
+    """
+    The intermediate format called `name`.
+
+    Parameters:
+    -----------
+    name (str): One of `FRAME_FORMATS`.
+
+    Raises:
+    -------
+    ValueError: For an unknown format.
+    ImportError: For a columnar format without pyarrow.
+
+    Returns:
+    --------
+    IFrameFormat: The format.
+    """
+    if name not in FRAME_FORMATS:
+        error_msg = f"Unknown intermediate format {name}. Use one of {list(FRAME_FORMATS)}."
+        ErrorTrack(error_msg)
+        raise ValueError(error_msg)
+    return FRAME_FORMATS[name]()
+
+
+def format_of_path(path: str) -> IFrameFormat:
+    """
+    The format of an intermediate, from its extension (anything unknown is read as CSV).
+
+    Parameters:
+    -----------
+    path (str): The intermediate's path.
+
+    Returns:
+    --------
+    IFrameFormat: The format.
+    """
+    extension = os.path.splitext(path.rstrip(os.sep))[1].lstrip(".").lower()
+    return frame_format(extension if extension in FRAME_FORMATS else "csv")
+
+
+def with_format(path: str, file_format: IFrameFormat) -> str:
+    """
+    `path` with its extension replaced by the format's, e.g. `df.csv` -> `df.parquet`.
+
+    Parameters:
+    -----------
+    path (str): A configured intermediate path.
+    file_format (IFrameFormat): The format the intermediate is written in.
+
+    Returns:
+    --------
+    str: The path.
+    """
+    return f"{os.path.splitext(path)[0]}.{file_format.extension}"
+
+
+def read_frame(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Read an intermediate in the format its extension names.
+
+    Parameters:
+    -----------
+    path (str): The intermediate's path.
+    columns (Optional[Sequence[str]]): Columns to read (default: all).
+
+    Returns:
+    --------
+    pd.DataFrame: The rows.
+    """
+    return format_of_path(path).read(path, columns)
+
+
+def benchmark(rows: int = 1_000_000, directory: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Time writing and reading transformed synthetic rows in every format.
+
+    Parameters:
+    -----------
+    rows (int): Rows in the synthetic frame (before the 'On Time' filter).
+    directory (Optional[str]): Where the files are written (default: a temporary directory).
+
+    Returns:
+    --------
+    Dict[str, Dict[str, float]]: Format -> write and read seconds, summary-column read
+                                 seconds and megabytes on disk.
+    """
+    import tempfile
+    import time
+    from utils.synthetic_data import make_otp_frame
+    from databaseOperations.extract_database import apply_schema
+    from databaseOperations.parallel_transform import BENCHMARK_DTYPES
+    from databaseOperations.transform_database import TransformData
+
+    df = TransformData().transform_rows(apply_schema(make_otp_frame(rows), BENCHMARK_DTYPES))
+    results = {}
+    with tempfile.TemporaryDirectory(dir=directory) as tmp_dir:
+        for name in FRAME_FORMATS:
+            file_format = frame_format(name)
+            path = file_format.path(tmp_dir, "df")
+            start = time.perf_counter()
+            file_format.write(df, path)
+            write_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded = file_format.read(path)
+            read_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            file_format.read(path, columns=["train_id", "delay_minutes"])
+            column_seconds = time.perf_counter() - start
+            paths = [path] if os.path.isfile(path) else glob.glob(os.path.join(path, "*"))
+            megabytes = sum(os.path.getsize(part) for part in paths) / 1024 ** 2
+            assert len(loaded) == len(df)
+            results[name] = {"write": write_seconds, "read": read_seconds, "read_columns": column_seconds,
+                             "mb": megabytes}
+            print(f"{name:8} write {write_seconds:6.2f}s  read {read_seconds:6.2f}s  "
+                  f"read 2 columns {column_seconds:6.2f}s  {megabytes:7.1f} MB")
+    PipelineTrack(f"Benchmarked intermediate formats on {len(df)} rows")
+    return results
+
+
+if __name__ == "__main__":
+    # Benchmark: python src/utils/frame_io.py [rows]
+    benchmark(rows=int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
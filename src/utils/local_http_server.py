@@ -0,0 +1,150 @@
+import os
+import re
+import sys
+import time
+import hashlib
+import threading
+from email.utils import formatdate
+from typing import Tuple
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+# Set the base directory relative to the script's location
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+
+from utils import PipelineTrack
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler with the HTTP features the downloaders rely on.
+
+    Adds ETag/Last-Modified validators, conditional requests (If-None-Match,
+    If-Modified-Since, If-Range), single byte-range requests, an optional
+    per-request latency and an optional per-connection bandwidth limit, on top
+    of `SimpleHTTPRequestHandler`. Stands in for Google Drive or any other
+    HTTP(S) source in demos and benchmarks.
+    """
+
+    # Set per server by `serve_directory`
+    latency = 0.0
+    bandwidth = 0
+    support_ranges = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body: bool) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404, "File not found")
+            return
+
+        stat = os.stat(path)
+        size = stat.st_size
+        etag = '"' + hashlib.md5(f"{stat.st_ino}-{size}-{stat.st_mtime_ns}".encode()).hexdigest() + '"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+        if self.headers.get("If-None-Match") == etag or (
+                "If-None-Match" not in self.headers and self.headers.get("If-Modified-Since") == last_modified):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            return
+
+        start, end = 0, size - 1
+        partial = False
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if self.support_ranges and range_header and (if_range is None or if_range in (etag, last_modified)):
+            match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+            if match and (match.group(1) or match.group(2)):
+                if match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+                else:
+                    start = max(0, size - int(match.group(2)))
+                if start >= size or start > end:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.end_headers()
+                    return
+                partial = True
+
+        self.send_response(206 if partial else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        if self.support_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if partial:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        if send_body:
+            block_size = 64 * 1024 if self.bandwidth else 1024 * 1024
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                try:
+                    while remaining > 0:
+                        block = f.read(min(block_size, remaining))
+                        if not block:
+                            break
+                        self.wfile.write(block)
+                        remaining -= len(block)
+                        if self.bandwidth:
+                            time.sleep(len(block) / self.bandwidth)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading, e.g. a probe that only wanted the headers
+                    self.close_connection = True
+
+
+def serve_directory(directory: str, latency: float = 0.0, support_ranges: bool = True,
+                    bandwidth: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve a directory over HTTP on a free localhost port, in a background thread.
+
+    Parameters:
+    -----------
+    directory (str): Directory to serve.
+    latency (float): Seconds to wait before answering each request.
+    support_ranges (bool): Whether byte-range requests are honoured.
+    bandwidth (int): Bytes per second sent on each connection (0 = unlimited).
+
+    Returns:
+    --------
+    Tuple[ThreadingHTTPServer, str]: The server (call `shutdown()` when done) and its base URL.
+    """
+    handler = type("ConfiguredRangeRequestHandler", (RangeRequestHandler,), {
+        "latency": latency,
+        "bandwidth": bandwidth,
+        "support_ranges": support_ranges,
+        "__init__": lambda self, *args, **kwargs: RangeRequestHandler.__init__(self, *args, directory=directory, **kwargs),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    PipelineTrack(f"Serving {directory} at {base_url} (latency={latency}s, bandwidth={bandwidth or 'unlimited'}, ranges={support_ranges})")
+    return server, base_url
+
+
+if __name__ == "__main__":
+    server, url = serve_directory(os.getcwd())
+    print(f"Serving {os.getcwd()} at {url}, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,102 @@
+import os
+import re
+import sys
+from typing import List, Optional
+# Set the base directory relative to the script's location
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+
+from utils import ErrorTrack
+
+# SELECT <columns> FROM <table> [WHERE <condition>] [ORDER BY <columns>]
+SIMPLE_SELECT = re.compile(
+    r"^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<table>[A-Za-z_][A-Za-z0-9_]*)"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+(?P<order_by>.+?))?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class SelectQuery:
+    """
+    A single-table SELECT statement that can be rewritten before execution.
+
+    Only the simple form `SELECT <columns> FROM <table> [WHERE ...] [ORDER BY ...]`
+    is supported, which is what the pipeline's configured query uses. Extra
+    predicates are AND-ed onto the WHERE clause.
+    """
+
+    def __init__(self, columns: str, table: str, where: Optional[List[str]] = None,
+                 order_by: Optional[str] = None) -> None:
+        self.columns = columns
+        self.table = table
+        self.where = list(where or [])
+        self.order_by = order_by
+
+    @classmethod
+    def parse(cls, query: str) -> "SelectQuery":
+        """
+        Parse a simple single-table SELECT statement.
+
+        Parameters:
+        -----------
+        query (str): The SQL query.
+
+        Raises:
+        -------
+        ValueError: If the query is not a simple single-table SELECT.
+
+        Returns:
+        --------
+        SelectQuery: The parsed query.
+        """
+        match = SIMPLE_SELECT.match(query) if isinstance(query, str) else None
+        if match is None:
+            error_msg = f"Only 'SELECT <columns> FROM <table> [WHERE ...] [ORDER BY ...]' queries can be rewritten: {query}"
+            ErrorTrack(error_msg)
+            raise ValueError(error_msg)
+
+        where = [match.group("where").strip()] if match.group("where") else []
+        order_by = match.group("order_by").strip() if match.group("order_by") else None
+        return cls(match.group("columns").strip(), match.group("table"), where, order_by)
+
+    def with_columns(self, columns: str) -> "SelectQuery":
+        """Return a copy of the query selecting `columns` instead."""
+        return SelectQuery(columns, self.table, self.where, self.order_by)
+
+    def with_predicate(self, predicate: str) -> "SelectQuery":
+        """Return a copy of the query with `predicate` AND-ed onto the WHERE clause."""
+        return SelectQuery(self.columns, self.table, self.where + [predicate], self.order_by)
+
+    def to_sql(self) -> str:
+        """Render the query back to SQL."""
+        sql = f"SELECT {self.columns} FROM {self.table}"
+        if self.where:
+            sql += " WHERE " + " AND ".join(f"({condition})" for condition in self.where)
+        if self.order_by:
+            sql += f" ORDER BY {self.order_by}"
+        return sql
+
+
+def sql_literal(value) -> str:
+    """
+    Render a Python value as an SQLite literal.
+
+    Parameters:
+    -----------
+    value: None, int, float or str.
+
+    Returns:
+    --------
+    str: The SQL literal.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+if __name__ == "__main__":
+    query = SelectQuery.parse("SELECT * FROM otp WHERE status != 'On Time'")
+    print(query.with_predicate(f"rowid > {sql_literal(10)}").to_sql())
@@ -0,0 +1,88 @@
+import os
+import sys
+import sqlite3
+import numpy as np
+import pandas as pd
+# Set the base directory relative to the script's location
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+
+from utils import PipelineTrack
+
+# Value pools that mimic the shape of the SEPTA `otp` table.
+STATIONS = [
+    "Trenton", "Thorndale", "Elm", "Airport Terminal E-F", "Stenton", "Narberth",
+    "Ridley Park", "Suburban Station", "Jenkintown-Wyncote", "30th Street Station",
+    "Temple U", "Glenside", "Norristown", "Media", "Doylestown", "Chestnut Hill East",
+]
+STATUSES = ["On Time"] * 6 + [f"{minutes} min" for minutes in range(1, 60)] + ["999 min"]
+
+
+def make_otp_frame(rows: int, seed: int = 0, start: str = "2016-03-23") -> pd.DataFrame:
+    """
+    Build a synthetic frame with the columns and string formats of the `otp` table.
+
+    Used by the benchmarks in this package; all columns are strings, as they come
+    out of the source SQLite database.
+
+    Parameters:
+    -----------
+    rows (int): Number of rows to generate.
+    seed (int): Random seed, so runs are reproducible.
+    start (str): First timestamp; rows are a few seconds apart.
+
+    Returns:
+    --------
+    pd.DataFrame: The synthetic otp rows.
+    """
+    rng = np.random.default_rng(seed)
+    stations = np.array(STATIONS, dtype=object)
+    timestamps = pd.Timestamp(start) + pd.to_timedelta(np.arange(rows) * 7, unit="s")
+    return pd.DataFrame({
+        "train_id": rng.integers(100, 1000, rows).astype(str).astype(object),
+        "direction": np.array(["N", "S"], dtype=object)[rng.integers(0, 2, rows)],
+        "origin": stations[rng.integers(0, len(STATIONS), rows)],
+        "next_station": stations[rng.integers(0, len(STATIONS), rows)],
+        "date": np.asarray(timestamps.strftime("%Y-%m-%d"), dtype=object),
+        "status": np.array(STATUSES, dtype=object)[rng.integers(0, len(STATUSES), rows)],
+        "timeStamp": np.asarray(timestamps.strftime("%Y-%m-%d %H:%M:%S"), dtype=object),
+    })
+
+
+def make_otp_database(db_path: str, rows: int, seed: int = 0, batch_rows: int = 500_000) -> str:
+    """
+    Write a synthetic `otp` table to a new SQLite database file.
+
+    Parameters:
+    -----------
+    db_path (str): Path of the database file; an existing file is replaced.
+    rows (int): Number of rows to generate.
+    seed (int): Random seed, so runs are reproducible.
+    batch_rows (int): Rows generated and inserted per batch.
+
+    Returns:
+    --------
+    str: The database path.
+    """
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute(
+            "CREATE TABLE otp (train_id TEXT, direction TEXT, origin TEXT, "
+            "next_station TEXT, date TEXT, status TEXT, timeStamp TEXT)"
+        )
+        for offset in range(0, rows, batch_rows):
+            frame = make_otp_frame(min(batch_rows, rows - offset), seed=seed + offset,
+                                   start=str(pd.Timestamp("2016-03-23") + pd.Timedelta(seconds=7 * offset)))
+            connection.executemany("INSERT INTO otp VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   frame.itertuples(index=False, name=None))
+        connection.commit()
+    finally:
+        connection.close()
+    PipelineTrack(f"Synthetic otp database with {rows} rows written to {db_path}")
+    return db_path
+
+
+if __name__ == "__main__":
+    print(make_otp_frame(5).to_string())